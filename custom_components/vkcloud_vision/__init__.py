@@ -4,43 +4,90 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+from datetime import timedelta
 from functools import cache
 
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import (EntityServiceResponse, HomeAssistant,
-                                ServiceCall, SupportsResponse)
+                                ServiceCall, ServiceResponse, SupportsResponse)
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.discovery import async_load_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity_platform import async_get_platforms
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 
+from .aliases import PersonAliasRegistry
 from .api.vkcloud.auth import VKCloudAuth
 from .api.vkcloud.vision import VKCloudVision
-from .const import (ATTR_BOUNDING_BOXES, ATTR_CONFIDENCE_THRESHOLD,
-                    ATTR_CREATE_NEW, ATTR_FILE_OUT, ATTR_LANG,
-                    ATTR_MAX_RETRIES, ATTR_MODES, ATTR_NUM_SNAPSHOTS,
-                    ATTR_PROB_THRESHOLD, ATTR_SNAPSHOT_INTERVAL_SEC,
-                    ATTR_SPACE, ATTR_UPDATE_EMBEDDING, CONF_API_KEY,
-                    CONF_CLIENT_ID, CONF_CREATE_NEW, CONF_PERSON_ALIASES,
-                    CONF_REFRESH_TOKEN,
-                    CONF_UPDATE_EMBEDDING, DEFAULT_CONFIDENCE_THRESHOLD,
-                    DEFAULT_CREATE_NEW, DEFAULT_FACE_BOUNDING_BOXES,
-                    DEFAULT_MAX_RETRIES, DEFAULT_MODES, DEFAULT_NUM_SNAPSHOTS,
+from .api.vkcloud.vision.response import LabelFilter
+from .const import (ATTR_ANALYSES, ATTR_BEST_FRAMES, ATTR_BOUNDING_BOXES,
+                    ATTR_CASCADE, ATTR_CONFIDENCE_THRESHOLD, ATTR_CREATE_NEW,
+                    ATTR_CROP_PERSONS, ATTR_DETECTION_EVENTS, ATTR_END,
+                    ATTR_EVENT_OFF_DELAY, ATTR_EVENT_ON_DELAY, ATTR_FILE_OUT,
+                    ATTR_GROUP_BY, ATTR_LABELS, ATTR_LABELS_EXCLUDE,
+                    ATTR_LABELS_INCLUDE, ATTR_LANG, ATTR_MAX_RETRIES,
+                    ATTR_MAX_TILES, ATTR_MERGE_IOU_THRESHOLD,
+                    ATTR_MERGE_OVERLAPS, ATTR_MIN_PROB, ATTR_MIN_SHARPNESS,
+                    ATTR_MODES, ATTR_MOTION_CROP, ATTR_MOTION_FILTER,
+                    ATTR_MOTION_THRESHOLD, ATTR_NUM_SNAPSHOTS, ATTR_PATH,
+                    ATTR_PERSON_BOXES, ATTR_PROB_THRESHOLD, ATTR_QUEUE_OFFLINE,
+                    ATTR_RESPONSE_FORMAT, ATTR_SNAPSHOT_INTERVAL_SEC,
+                    ATTR_SPACE, ATTR_SPLIT_MODES, ATTR_START,
+                    ATTR_STREAM_UPLOAD, ATTR_SUMMARY_EVENT,
+                    ATTR_TILE_FULL_FRAME, ATTR_TILE_OVERLAP, ATTR_TILE_SIZE,
+                    ATTR_TILED, ATTR_TRACK_OBJECTS, ATTR_UPDATE_EMBEDDING,
+                    CONF_API_KEY, CONF_CAMERA, CONF_CLIENT_ID, CONF_CREATE_NEW,
+                    CONF_HISTORY_DAYS, CONF_NAME, CONF_PERSON_ALIASES,
+                    CONF_REFRESH_TOKEN, CONF_UPDATE_EMBEDDING, CONF_ZONES,
+                    DEFAULT_CASCADE, DEFAULT_CONFIDENCE_THRESHOLD,
+                    DEFAULT_CREATE_NEW, DEFAULT_CROP_PERSONS,
+                    DEFAULT_DETECTION_EVENTS, DEFAULT_EVENT_OFF_DELAY,
+                    DEFAULT_EVENT_ON_DELAY, DEFAULT_FACE_BOUNDING_BOXES,
+                    DEFAULT_HISTORY_DAYS, DEFAULT_HISTORY_PERIOD,
+                    DEFAULT_MAX_RETRIES, DEFAULT_MAX_TILES,
+                    DEFAULT_MERGE_IOU_THRESHOLD, DEFAULT_MERGE_OVERLAPS,
+                    DEFAULT_MODES, DEFAULT_MOTION_CROP, DEFAULT_MOTION_FILTER,
+                    DEFAULT_MOTION_THRESHOLD, DEFAULT_NUM_SNAPSHOTS,
                     DEFAULT_OBJECT_BOUNDING_BOXES, DEFAULT_PROB_THRESHOLD,
+                    DEFAULT_QUEUE_OFFLINE, DEFAULT_RESPONSE_FORMAT,
                     DEFAULT_SNAPSHOT_INTERVAL_SEC, DEFAULT_SPACE,
-                    DEFAULT_UPDATE_EMBEDDING, DOMAIN, LOGGER,
-                    SERVICE_DETECT_OBJECTS, SERVICE_RECOGNIZE_FACES,
-                    SERVICE_RECOGNIZE_TEXT, VALID_MODES, BoundingBoxesType,
-                    ResponseType)
+                    DEFAULT_SPLIT_MODES, DEFAULT_STREAM_UPLOAD,
+                    DEFAULT_SUMMARY_EVENT, DEFAULT_TILE_FULL_FRAME,
+                    DEFAULT_TILE_OVERLAP, DEFAULT_TILE_SIZE, DEFAULT_TILED,
+                    DEFAULT_TRACK_OBJECTS, DEFAULT_UPDATE_EMBEDDING, DOMAIN,
+                    LOGGER, MAX_SNAPSHOT_INTERVAL_SEC, SERVICE_ANALYZE,
+                    SERVICE_DETECT_OBJECTS, SERVICE_QUERY_HISTORY,
+                    SERVICE_RECOGNIZE_FACES, SERVICE_RECOGNIZE_TEXT,
+                    SERVICE_TRAIN_PERSONS, SIGNAL_ENTRIES_UPDATED,
+                    VALID_ANALYSES, VALID_MODES, BoundingBoxesType,
+                    ResponseFormat, ResponseType)
+from .data import VKCloudVisionConfigEntry, VKCloudVisionData
+from .history import (GROUP_CAMERA, GROUP_LABEL, VALID_GROUPS,
+                      VKCloudVisionHistory)
 from .image_processing import VKCloudVisionEntity
+from .monitoring import VKCloudVisionMonitorCoordinator, get_monitor_configs
+from .offline import VKCloudVisionOfflineQueue
+from .plates import get_plate_index
+from .training import async_train_persons
+from .websocket_api import async_setup_websocket
 
-PLATFORMS = (Platform.IMAGE_PROCESSING,)
+PLATFORMS = (Platform.IMAGE_PROCESSING, Platform.SENSOR)
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 
+def _frame_selection(call: ServiceCall) -> tuple[int | None, float | None] | None:
+    """Return `(best_frames, min_sharpness)` if a service call asks for frame selection."""
+    best_frames = call.data.get(ATTR_BEST_FRAMES)
+    min_sharpness = call.data.get(ATTR_MIN_SHARPNESS)
+    if best_frames is None and min_sharpness is None:
+        return None
+    return best_frames, min_sharpness
+
+
 @cache
 def get_vision_entity(hass: HomeAssistant) -> VKCloudVisionEntity:
     """Get the VK Cloud Vision entity."""
@@ -55,6 +102,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the VK Cloud Vision integration."""
     for platform in PLATFORMS:
         hass.async_create_task(async_load_platform(hass, platform, DOMAIN, {}, config))
+    async_setup_websocket(hass)
 
     async def detect_objects(call: ServiceCall) -> EntityServiceResponse:
         """Detect objects in images from multiple cameras."""
@@ -73,6 +121,44 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
                     call.data.get(ATTR_NUM_SNAPSHOTS, DEFAULT_NUM_SNAPSHOTS),
                     call.data.get(ATTR_SNAPSHOT_INTERVAL_SEC, DEFAULT_SNAPSHOT_INTERVAL_SEC),
                     call.data.get(ATTR_MAX_RETRIES, DEFAULT_MAX_RETRIES),
+                    merge_iou_threshold=(
+                        call.data.get(ATTR_MERGE_IOU_THRESHOLD, DEFAULT_MERGE_IOU_THRESHOLD)
+                        if call.data.get(ATTR_MERGE_OVERLAPS, DEFAULT_MERGE_OVERLAPS) else None
+                    ),
+                    track_objects=call.data.get(ATTR_TRACK_OBJECTS, DEFAULT_TRACK_OBJECTS),
+                    tiling=(
+                        (
+                            call.data.get(ATTR_TILE_SIZE, DEFAULT_TILE_SIZE),
+                            call.data.get(ATTR_TILE_OVERLAP, DEFAULT_TILE_OVERLAP),
+                            call.data.get(ATTR_MAX_TILES, DEFAULT_MAX_TILES),
+                            call.data.get(ATTR_TILE_FULL_FRAME, DEFAULT_TILE_FULL_FRAME),
+                        )
+                        if call.data.get(ATTR_TILED, DEFAULT_TILED) else None
+                    ),
+                    cascade=call.data.get(ATTR_CASCADE, DEFAULT_CASCADE),
+                    split_modes=call.data.get(ATTR_SPLIT_MODES, DEFAULT_SPLIT_MODES),
+                    motion_filter=(
+                        (
+                            call.data.get(ATTR_MOTION_THRESHOLD, DEFAULT_MOTION_THRESHOLD),
+                            call.data.get(ATTR_MOTION_CROP, DEFAULT_MOTION_CROP),
+                        )
+                        if call.data.get(ATTR_MOTION_FILTER, DEFAULT_MOTION_FILTER) else None
+                    ),
+                    frame_selection=_frame_selection(call),
+                    stream_upload=call.data.get(ATTR_STREAM_UPLOAD, DEFAULT_STREAM_UPLOAD),
+                    queue_offline=call.data.get(ATTR_QUEUE_OFFLINE, DEFAULT_QUEUE_OFFLINE),
+                    label_filter=LabelFilter.from_names(
+                        call.data.get(ATTR_LABELS_INCLUDE), call.data.get(ATTR_LABELS_EXCLUDE)
+                    ),
+                    response_format=call.data.get(ATTR_RESPONSE_FORMAT, DEFAULT_RESPONSE_FORMAT),
+                    detection_events=(
+                        (
+                            call.data.get(ATTR_EVENT_ON_DELAY, DEFAULT_EVENT_ON_DELAY),
+                            call.data.get(ATTR_EVENT_OFF_DELAY, DEFAULT_EVENT_OFF_DELAY),
+                        )
+                        if call.data.get(ATTR_DETECTION_EVENTS, DEFAULT_DETECTION_EVENTS) else None
+                    ),
+                    summary_event=call.data.get(ATTR_SUMMARY_EVENT, DEFAULT_SUMMARY_EVENT),
                 )
             except HomeAssistantError as err:
                 result[camera_id] = {
@@ -117,28 +203,70 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         update_embedding = call.data.get(ATTR_UPDATE_EMBEDDING, update_embedding_default)
         LOGGER.debug("Create new: %s, update embedding: %s", create_new, update_embedding)
 
-        # Get and filter person aliases by current space
         space = call.data.get(ATTR_SPACE, DEFAULT_SPACE)
-        alias_entries = vision_entry.options.get(CONF_PERSON_ALIASES, [])
-        tag_to_alias_map = {
-            f"person{alias_entry['person_id']}": alias_entry["alias"]
-            for alias_entry in alias_entries
-            if alias_entry["space"] == space
-        }
+        tag_to_alias_map = vision_entry.runtime_data.aliases.tag_to_alias_map(space)
+
+        # All cameras and snapshots are sent in one request
+        camera_ids = call.data.get("entity_id", [])
+        if ATTR_PERSON_BOXES in call.data and len(camera_ids) > 1:
+            raise HomeAssistantError("Person boxes can only be given for a single camera")
+        try:
+            return await vision_entity.recognize_faces(
+                camera_ids,
+                space,
+                create_new,
+                update_embedding,
+                call.data.get(ATTR_CONFIDENCE_THRESHOLD, DEFAULT_CONFIDENCE_THRESHOLD),
+                call.data.get(ATTR_FILE_OUT),
+                call.data.get(ATTR_BOUNDING_BOXES, DEFAULT_FACE_BOUNDING_BOXES),
+                call.data.get(ATTR_MAX_RETRIES, DEFAULT_MAX_RETRIES),
+                tag_to_alias_map,
+                crop_persons=call.data.get(ATTR_CROP_PERSONS, DEFAULT_CROP_PERSONS),
+                person_boxes=call.data.get(ATTR_PERSON_BOXES),
+                num_snapshots=call.data.get(ATTR_NUM_SNAPSHOTS, DEFAULT_NUM_SNAPSHOTS),
+                snapshot_interval_sec=call.data.get(ATTR_SNAPSHOT_INTERVAL_SEC, DEFAULT_SNAPSHOT_INTERVAL_SEC),
+                frame_selection=_frame_selection(call),
+            )
+        except HomeAssistantError as err:
+            return {
+                camera_id: {
+                    "response": None,
+                    "file_out": None,
+                    "response_type": ResponseType.ERROR,
+                    "error": str(err),
+                }
+                for camera_id in camera_ids
+            }
+
+    async def analyze(call: ServiceCall) -> EntityServiceResponse:
+        """Detect objects, recognize text and faces on one snapshot per camera."""
+        vision_entity = get_vision_entity(hass)
+        vision_entry = hass.config_entries.async_loaded_entries(DOMAIN)[0]
+
+        space = call.data.get(ATTR_SPACE, DEFAULT_SPACE)
+        create_new = call.data.get(ATTR_CREATE_NEW, vision_entry.options.get(CONF_CREATE_NEW, DEFAULT_CREATE_NEW))
+        update_embedding = call.data.get(
+            ATTR_UPDATE_EMBEDDING, vision_entry.options.get(CONF_UPDATE_EMBEDDING, DEFAULT_UPDATE_EMBEDDING)
+        )
 
+        # FIXME: Workaround to process multiple entities in a way `entity_service_call` does
         result = {}
         for camera_id in call.data.get("entity_id", []):
             try:
-                result[camera_id] = await vision_entity.recognize_faces(
+                result[camera_id] = await vision_entity.async_analyze(
                     camera_id,
+                    call.data.get(ATTR_ANALYSES, VALID_ANALYSES),
+                    call.data.get(ATTR_MODES, DEFAULT_MODES),
+                    call.data.get(ATTR_PROB_THRESHOLD, DEFAULT_PROB_THRESHOLD),
+                    call.data.get(ATTR_LANG),
                     space,
                     create_new,
                     update_embedding,
                     call.data.get(ATTR_CONFIDENCE_THRESHOLD, DEFAULT_CONFIDENCE_THRESHOLD),
                     call.data.get(ATTR_FILE_OUT),
-                    call.data.get(ATTR_BOUNDING_BOXES, DEFAULT_FACE_BOUNDING_BOXES),
+                    call.data.get(ATTR_BOUNDING_BOXES, DEFAULT_OBJECT_BOUNDING_BOXES),
                     call.data.get(ATTR_MAX_RETRIES, DEFAULT_MAX_RETRIES),
-                    tag_to_alias_map,
+                    vision_entry.runtime_data.aliases.tag_to_alias_map(space),
                 )
             except HomeAssistantError as err:
                 result[camera_id] = {
@@ -150,6 +278,38 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
         return result
 
+    async def train_persons(call: ServiceCall) -> ServiceResponse:
+        """Train persons from a directory or zip archive of labelled photos."""
+        vision_entry = hass.config_entries.async_loaded_entries(DOMAIN)[0]
+        path = call.data[ATTR_PATH]
+        if not hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"Path {path} is not allowed, add it to allowlist_external_dirs")
+
+        return await async_train_persons(hass, vision_entry.runtime_data, path, call.data[ATTR_SPACE])
+
+    async def query_history(call: ServiceCall) -> ServiceResponse:
+        """Aggregate detections stored in the history."""
+        vision_entry = hass.config_entries.async_loaded_entries(DOMAIN)[0]
+        history = vision_entry.runtime_data.history
+        if history is None:
+            raise HomeAssistantError("Detection history is disabled in the integration options")
+
+        # Naive times are local
+        end = dt_util.as_utc(call.data[ATTR_END]) if ATTR_END in call.data else dt_util.utcnow()
+        start = dt_util.as_utc(call.data[ATTR_START]) if ATTR_START in call.data else end - DEFAULT_HISTORY_PERIOD
+        if start >= end:
+            raise HomeAssistantError("Start of the period must be before its end")
+
+        return await history.async_query(
+            start,
+            end,
+            cameras=call.data.get("entity_id"),
+            labels=call.data.get(ATTR_LABELS),
+            modes=call.data.get(ATTR_MODES),
+            min_prob=call.data.get(ATTR_MIN_PROB),
+            group_by=call.data[ATTR_GROUP_BY],
+        )
+
     hass.services.async_register(
         DOMAIN,
         SERVICE_DETECT_OBJECTS,
@@ -170,10 +330,50 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
             ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
             vol.Optional(
                 ATTR_SNAPSHOT_INTERVAL_SEC, default=DEFAULT_SNAPSHOT_INTERVAL_SEC
-            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=10)),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=MAX_SNAPSHOT_INTERVAL_SEC)),
             vol.Optional(
                 ATTR_MAX_RETRIES, default=DEFAULT_MAX_RETRIES
             ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+            vol.Optional(ATTR_MERGE_OVERLAPS, default=DEFAULT_MERGE_OVERLAPS): cv.boolean,
+            vol.Optional(
+                ATTR_MERGE_IOU_THRESHOLD, default=DEFAULT_MERGE_IOU_THRESHOLD
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=1.0)),
+            vol.Optional(ATTR_TRACK_OBJECTS, default=DEFAULT_TRACK_OBJECTS): cv.boolean,
+            vol.Optional(ATTR_TILED, default=DEFAULT_TILED): cv.boolean,
+            vol.Optional(
+                ATTR_TILE_SIZE, default=DEFAULT_TILE_SIZE
+            ): vol.All(vol.Coerce(int), vol.Range(min=256, max=4096)),
+            vol.Optional(
+                ATTR_TILE_OVERLAP, default=DEFAULT_TILE_OVERLAP
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1024)),
+            vol.Optional(
+                ATTR_MAX_TILES, default=DEFAULT_MAX_TILES
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+            vol.Optional(ATTR_TILE_FULL_FRAME, default=DEFAULT_TILE_FULL_FRAME): cv.boolean,
+            vol.Optional(ATTR_CASCADE, default=DEFAULT_CASCADE): cv.boolean,
+            vol.Optional(ATTR_SPLIT_MODES, default=DEFAULT_SPLIT_MODES): cv.boolean,
+            vol.Optional(ATTR_MOTION_FILTER, default=DEFAULT_MOTION_FILTER): cv.boolean,
+            vol.Optional(
+                ATTR_MOTION_THRESHOLD, default=DEFAULT_MOTION_THRESHOLD
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=100.0)),
+            vol.Optional(ATTR_MOTION_CROP, default=DEFAULT_MOTION_CROP): cv.boolean,
+            vol.Optional(ATTR_STREAM_UPLOAD, default=DEFAULT_STREAM_UPLOAD): cv.boolean,
+            vol.Optional(ATTR_QUEUE_OFFLINE, default=DEFAULT_QUEUE_OFFLINE): cv.boolean,
+            vol.Optional(ATTR_LABELS_INCLUDE): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_LABELS_EXCLUDE): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(
+                ATTR_RESPONSE_FORMAT, default=DEFAULT_RESPONSE_FORMAT
+            ): vol.In([response_format.value for response_format in ResponseFormat]),
+            vol.Optional(ATTR_DETECTION_EVENTS, default=DEFAULT_DETECTION_EVENTS): cv.boolean,
+            vol.Optional(
+                ATTR_EVENT_ON_DELAY, default=DEFAULT_EVENT_ON_DELAY
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=3600)),
+            vol.Optional(
+                ATTR_EVENT_OFF_DELAY, default=DEFAULT_EVENT_OFF_DELAY
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=3600)),
+            vol.Optional(ATTR_SUMMARY_EVENT, default=DEFAULT_SUMMARY_EVENT): cv.boolean,
+            vol.Optional(ATTR_BEST_FRAMES): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+            vol.Optional(ATTR_MIN_SHARPNESS): vol.All(vol.Coerce(float), vol.Range(min=0)),
         }),
         supports_response=SupportsResponse.ONLY,
     )
@@ -212,6 +412,80 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
             vol.Optional(
                 ATTR_MAX_RETRIES, default=DEFAULT_MAX_RETRIES
             ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+            vol.Optional(
+                ATTR_NUM_SNAPSHOTS, default=DEFAULT_NUM_SNAPSHOTS
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+            vol.Optional(
+                ATTR_SNAPSHOT_INTERVAL_SEC, default=DEFAULT_SNAPSHOT_INTERVAL_SEC
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=MAX_SNAPSHOT_INTERVAL_SEC)),
+            vol.Optional(ATTR_CROP_PERSONS, default=DEFAULT_CROP_PERSONS): cv.boolean,
+            vol.Optional(ATTR_PERSON_BOXES): vol.All(
+                cv.ensure_list,
+                [vol.ExactSequence([vol.Coerce(float)] * 4)],
+            ),
+            vol.Optional(ATTR_BEST_FRAMES): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+            vol.Optional(ATTR_MIN_SHARPNESS): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        }),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ANALYZE,
+        analyze,
+        schema=cv.make_entity_service_schema({
+            vol.Optional(
+                ATTR_ANALYSES, default=VALID_ANALYSES
+            ): vol.All(cv.ensure_list, [vol.In(VALID_ANALYSES)]),
+            vol.Optional(
+                ATTR_MODES, default=DEFAULT_MODES
+            ): vol.All(cv.ensure_list, [vol.In(VALID_MODES)]),
+            vol.Optional(
+                ATTR_PROB_THRESHOLD, default=DEFAULT_PROB_THRESHOLD
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.01, max=1.0)),
+            vol.Optional(ATTR_LANG): vol.In(["rus", "eng"]),
+            vol.Optional(ATTR_SPACE, default=DEFAULT_SPACE): vol.All(vol.Coerce(int), vol.Range(min=0, max=9)),
+            vol.Optional(ATTR_CREATE_NEW): cv.boolean,
+            vol.Optional(ATTR_UPDATE_EMBEDDING): cv.boolean,
+            vol.Optional(
+                ATTR_CONFIDENCE_THRESHOLD, default=DEFAULT_CONFIDENCE_THRESHOLD
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.01, max=1.0)),
+            vol.Optional(ATTR_FILE_OUT): cv.string,
+            vol.Optional(
+                ATTR_BOUNDING_BOXES, default=DEFAULT_OBJECT_BOUNDING_BOXES
+            ): vol.In([bb.value for bb in BoundingBoxesType]),
+            vol.Optional(
+                ATTR_MAX_RETRIES, default=DEFAULT_MAX_RETRIES
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+        }),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_TRAIN_PERSONS,
+        train_persons,
+        schema=vol.Schema({
+            vol.Required(ATTR_PATH): cv.string,
+            vol.Required(ATTR_SPACE, default=DEFAULT_SPACE): vol.All(vol.Coerce(int), vol.Range(min=0, max=9)),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_HISTORY,
+        query_history,
+        schema=vol.Schema({
+            vol.Optional("entity_id"): cv.entity_ids,
+            vol.Optional(ATTR_LABELS): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_MODES): vol.All(cv.ensure_list, [vol.In(VALID_MODES)]),
+            vol.Optional(ATTR_MIN_PROB): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=1.0)),
+            vol.Optional(ATTR_START): cv.datetime,
+            vol.Optional(ATTR_END): cv.datetime,
+            vol.Optional(
+                ATTR_GROUP_BY, default=[GROUP_CAMERA, GROUP_LABEL]
+            ): vol.All(cv.ensure_list, [vol.In(VALID_GROUPS)]),
         }),
         supports_response=SupportsResponse.ONLY,
     )
@@ -219,7 +493,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+async def async_setup_entry(hass: HomeAssistant, entry: VKCloudVisionConfigEntry) -> bool:
     """Set up a config entry."""
 
     auth_client = VKCloudAuth(
@@ -229,12 +503,55 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         refresh_token=entry.data.get(CONF_REFRESH_TOKEN),
     )
     client = VKCloudVision(hass, auth_client)
-    entry.runtime_data = client
+    aliases = PersonAliasRegistry(hass)
+    await aliases.async_load()
+    history = None
+    if history_days := entry.options.get(CONF_HISTORY_DAYS, DEFAULT_HISTORY_DAYS):
+        history = VKCloudVisionHistory(hass, timedelta(days=history_days))
+        await history.async_setup()
+        entry.async_on_unload(history.async_start())
+    queue = VKCloudVisionOfflineQueue(hass, client, history)
+    await queue.async_load()
+    entry.async_on_unload(queue.async_start())
+    plates = await hass.async_add_executor_job(get_plate_index, entry.options)
+    entry.runtime_data = VKCloudVisionData(client, aliases, queue, history, plates)
+
+    # Spread first checks over the interval, so cameras don't hit the API at the same time
+    monitor_configs = get_monitor_configs(entry.options)
+    for idx, monitor_config in enumerate(monitor_configs):
+        stagger = timedelta(seconds=monitor_config.interval * idx / len(monitor_configs))
+        coordinator = VKCloudVisionMonitorCoordinator(hass, monitor_config, get_vision_entity, stagger)
+        entry.async_on_unload(coordinator.async_start())
+        entry.runtime_data.monitors[monitor_config.camera_id] = coordinator
+    entry.runtime_data.zones = {(zone[CONF_CAMERA], zone[CONF_NAME]) for zone in entry.options.get(CONF_ZONES, [])}
+    async_dispatcher_send(hass, SIGNAL_ENTRIES_UPDATED)
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+async def async_update_options(hass: HomeAssistant, entry: VKCloudVisionConfigEntry) -> None:
+    """Reload the entry to apply monitoring options."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: VKCloudVisionConfigEntry) -> bool:
     """Unload config entry."""
+    for coordinator in entry.runtime_data.monitors.values():
+        await coordinator.async_shutdown()
+    entry.runtime_data.monitors.clear()
+    entry.runtime_data.zones.clear()
+    async_dispatcher_send(hass, SIGNAL_ENTRIES_UPDATED)
+
+    # The entity outlives the entry, start over with the new options
+    try:
+        get_vision_entity(hass).async_reset_state()
+    except HomeAssistantError:
+        pass
+
+    await entry.runtime_data.aliases.async_save()
+    if entry.runtime_data.history is not None:
+        await entry.runtime_data.history.async_close()
     return True
 
 
@@ -256,4 +573,13 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
         hass.config_entries.async_update_entry(config_entry, version=4, options=new_options)
         LOGGER.info("Migrated VK Cloud Vision config entry from v3 to v4")
 
+    if config_entry.version == 4:
+        # v4 → v5: Move person aliases from options to their own storage
+        new_options = dict(config_entry.options)
+        aliases = PersonAliasRegistry(hass)
+        aliases.async_replace(new_options.pop(CONF_PERSON_ALIASES, []))
+        await aliases.async_save()
+        hass.config_entries.async_update_entry(config_entry, version=5, options=new_options)
+        LOGGER.info("Migrated VK Cloud Vision config entry from v4 to v5")
+
     return True
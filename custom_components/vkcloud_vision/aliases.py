@@ -0,0 +1,133 @@
+"""Person alias registry for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_KEY = f"{DOMAIN}.person_aliases"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+
+def person_tag(person_id: int) -> str:
+    """Return the API tag of a person."""
+    return f"person{person_id}"
+
+
+class PersonAliasRegistry:
+    """Person aliases indexed by (space, person_id) and persisted in `.storage`.
+
+    Tag to alias maps are cached per space and rebuilt only after that space
+    changes. Writes are batched with a delayed save.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._aliases: dict[tuple[int, int], str] = {}
+        self._tag_maps: dict[int, dict[str, str]] = {}
+
+    async def async_load(self) -> None:
+        """Load aliases from storage."""
+        data = await self._store.async_load() or {}
+        self._aliases = {
+            (int(entry["space"]), int(entry["person_id"])): entry["alias"]
+            for entry in data.get("aliases", [])
+        }
+        self._tag_maps.clear()
+
+    async def async_save(self) -> None:
+        """Save aliases immediately, e.g. before unloading."""
+        await self._store.async_save(self._data_to_save())
+
+    def tag_to_alias_map(self, space: int) -> dict[str, str]:
+        """Return a cached `{"person<id>": alias}` map of a space."""
+        tag_map = self._tag_maps.get(space)
+        if tag_map is None:
+            tag_map = self._tag_maps[space] = {
+                person_tag(person_id): alias
+                for (alias_space, person_id), alias in self._aliases.items()
+                if alias_space == space
+            }
+        return tag_map
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return aliases in the options form format."""
+        return [
+            {"alias": alias, "person_id": person_id, "space": space}
+            for (space, person_id), alias in sorted(self._aliases.items())
+        ]
+
+    @callback
+    def async_set(self, space: int, person_id: int, alias: str) -> None:
+        """Set the alias of a person."""
+        if self._aliases.get((space, person_id)) == alias:
+            return
+        self._aliases[(space, person_id)] = alias
+        self._async_changed({space})
+
+    @callback
+    def async_set_many(self, space: int, aliases: Mapping[int, str]) -> None:
+        """Set aliases of several persons with a single save."""
+        changed = False
+        for person_id, alias in aliases.items():
+            if self._aliases.get((space, person_id)) != alias:
+                self._aliases[(space, person_id)] = alias
+                changed = True
+        if changed:
+            self._async_changed({space})
+
+    @callback
+    def async_add_persons(self, space: int, person_ids: Iterable[int]) -> None:
+        """Add default aliases for persons that don't have one yet."""
+        added = False
+        for person_id in person_ids:
+            if (space, person_id) not in self._aliases:
+                self._aliases[(space, person_id)] = person_tag(person_id)
+                added = True
+        if added:
+            self._async_changed({space})
+
+    @callback
+    def async_remove(self, space: int, person_ids: Iterable[int]) -> None:
+        """Remove aliases of deleted persons."""
+        removed = [self._aliases.pop((space, person_id), None) for person_id in person_ids]
+        if any(alias is not None for alias in removed):
+            self._async_changed({space})
+
+    @callback
+    def async_truncate(self, space: int) -> None:
+        """Remove all aliases of a space."""
+        keys = [key for key in self._aliases if key[0] == space]
+        for key in keys:
+            del self._aliases[key]
+        if keys:
+            self._async_changed({space})
+
+    @callback
+    def async_replace(self, entries: Iterable[Mapping[str, Any]]) -> None:
+        """Replace all aliases, e.g. with the list edited in the options flow."""
+        aliases = {(int(entry["space"]), int(entry["person_id"])): entry["alias"] for entry in entries}
+        changed = {
+            key[0] for key in aliases.keys() | self._aliases.keys() if aliases.get(key) != self._aliases.get(key)
+        }
+        self._aliases = aliases
+        if changed:
+            self._async_changed(changed)
+
+    @callback
+    def _async_changed(self, spaces: set[int]) -> None:
+        for space in spaces:
+            self._tag_maps.pop(space, None)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"aliases": self.as_list()}
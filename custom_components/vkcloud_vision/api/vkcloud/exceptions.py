@@ -56,6 +56,11 @@ class VKCloudVisionForbiddenError(VKCloudVisionAPIError):
     pass
 
 
+class VKCloudVisionUnavailableError(VKCloudVisionAPIError):
+    """Exception for requests not sent because the API is known to be unavailable."""
+    pass
+
+
 class VKCloudVisionDetectionError(VKCloudVisionAPIError):
     """Exception for object detection errors."""
 
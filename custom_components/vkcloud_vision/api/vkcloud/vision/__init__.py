@@ -5,6 +5,7 @@
 from homeassistant.core import HomeAssistant
 
 from ..auth import VKCloudAuth
+from .circuit import VKCloudVisionCircuitBreaker
 from .clients import (VKCloudVisionObjectsClient, VKCloudVisionPersonsClient,
                       VKCloudVisionTextClient)
 
@@ -20,11 +21,13 @@ class VKCloudVision:
         """Initialize the VK Cloud Vision SDK."""
         self._hass = hass
         self._auth = auth
+        # Shared by all clients, any failing endpoint means the API is down
+        self.circuit = VKCloudVisionCircuitBreaker()
 
-        self.objects = VKCloudVisionObjectsClient(self._hass, self._auth)
-        self.text = VKCloudVisionTextClient(self._hass, self._auth)
+        self.objects = VKCloudVisionObjectsClient(self._hass, self._auth, circuit=self.circuit)
+        self.text = VKCloudVisionTextClient(self._hass, self._auth, circuit=self.circuit)
         # TODO: Face recognition
-        self.persons = VKCloudVisionPersonsClient(self._hass, self._auth)
+        self.persons = VKCloudVisionPersonsClient(self._hass, self._auth, circuit=self.circuit)
 
         # These APIs aren't really useful in the context of home automation, are they?
         # self.docs = DocsClient(self._hass, self._auth, self._oauth_provider)
@@ -7,9 +7,10 @@
 import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, AsyncIterator, Dict, List, Optional, cast
 
-from aiohttp import ClientSession, ClientTimeout, FormData
+from aiohttp import (ClientError, ClientSession, ClientTimeout, FormData,
+                     MultipartWriter)
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.util.json import JsonObjectType, JsonValueType
@@ -17,10 +18,15 @@ from homeassistant.util.json import JsonObjectType, JsonValueType
 from ..auth import VKCloudAuth
 from ..exceptions import (VKCloudVisionAPIError, VKCloudVisionAuthError,
                           VKCloudVisionDetectionError)
+from .circuit import VKCloudVisionCircuitBreaker, is_unavailable
+from .frames import FrameData
+from .streaming import VKCloudVisionFrameStream
 
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 10
+# Maximum time to produce the next frame of a streaming upload
+STREAM_FRAME_TIMEOUT = 60
 RETRY_DELAY = 1
 
 
@@ -30,22 +36,51 @@ class VKCloudVisionBaseClient:
         hass: HomeAssistant,
         auth: VKCloudAuth,
         base_url: str = "https://smarty.mail.ru/api",
+        circuit: Optional[VKCloudVisionCircuitBreaker] = None,
     ) -> None:
         """Initialize the base client."""
         self._hass = hass
         self._auth = auth
         self._base_url = base_url
+        self.circuit = circuit or VKCloudVisionCircuitBreaker()
         self._session: ClientSession = async_get_clientsession(hass)
 
     async def _make_request(
         self,
         endpoint: str,
         meta: Dict[str, Any],
-        files: Optional[List[bytes]] = None,
+        files: Optional[List[FrameData] | AsyncIterator[FrameData]] = None,
         params: Optional[Dict[str, Any]] = None,
         max_retries: int = 3,
     ) -> JsonObjectType:
-        """Make an API request with multipart/form-data."""
+        """Make an API request with multipart/form-data.
+
+        `files` may be memoryviews of spooled frames (see
+        `VKCloudVisionFrameStore`), they are sent as is by every attempt. An
+        async iterator is uploaded as frames are produced (see
+        `VKCloudVisionFrameStream`). The outcome is recorded by the circuit
+        breaker.
+        """
+        try:
+            result = await self._send_request(endpoint, meta, files, params, max_retries)
+        except BaseException as err:
+            if is_unavailable(err):
+                self.circuit.record_failure()
+            else:
+                self.circuit.release_probe()
+            raise
+        self.circuit.record_success()
+        return result
+
+    async def _send_request(
+        self,
+        endpoint: str,
+        meta: Dict[str, Any],
+        files: Optional[List[FrameData] | AsyncIterator[FrameData]],
+        params: Optional[Dict[str, Any]],
+        max_retries: int,
+    ) -> JsonObjectType:
+        """Send a request with a fresh access token."""
         access_token = await self._auth.get_access_token()
         if not access_token:
             raise VKCloudVisionAuthError("Failed to obtain access token")
@@ -59,9 +94,16 @@ class VKCloudVisionBaseClient:
         if params:
             query_params.update(params)
 
-        return await self._execute_request_with_retries(url, query_params, meta, files, max_retries)
+        if files is None or isinstance(files, list):
+            return await self._execute_request_with_retries(url, query_params, meta, files, max_retries)
+
+        stream = VKCloudVisionFrameStream(self._hass, files)
+        try:
+            return await self._execute_request_with_retries(url, query_params, meta, stream, max_retries)
+        finally:
+            await self._hass.async_add_executor_job(stream.close)
 
-    def _prepare_form_data(self, meta: Dict[str, Any], files: Optional[List[bytes]]) -> FormData:
+    def _prepare_form_data(self, meta: Dict[str, Any], files: Optional[List[FrameData]]) -> FormData:
         """Prepare multipart form data for the request using file names from meta."""
 
         data = FormData(default_to_multipart=True)
@@ -91,12 +133,14 @@ class VKCloudVisionBaseClient:
         return data
 
     async def _execute_request(
-        self, url: str, query_params: Dict[str, Any], data: FormData
+        self,
+        url: str,
+        query_params: Dict[str, Any],
+        data: FormData | MultipartWriter,
+        timeout: ClientTimeout = ClientTimeout(total=DEFAULT_TIMEOUT),
     ) -> JsonObjectType:
         """Execute single request attempt."""
-        async with self._session.post(
-            url, params=query_params, data=data, timeout=ClientTimeout(total=DEFAULT_TIMEOUT)
-        ) as response:
+        async with self._session.post(url, params=query_params, data=data, timeout=timeout) as response:
             # Handle HTTP status codes
             if response.status >= 502 and response.status <= 504:
                 _LOGGER.warning("Received HTTP %d, retrying", response.status)
@@ -168,20 +212,45 @@ class VKCloudVisionBaseClient:
 
             return response_body
 
+    async def _execute_stream_request(
+        self, url: str, query_params: Dict[str, Any], meta: Dict[str, Any], stream: VKCloudVisionFrameStream
+    ) -> JsonObjectType:
+        """Execute single streaming request attempt.
+
+        The upload takes as long as producing the frames, so the response
+        timeout starts only after the last frame has been sent.
+        """
+        loop = asyncio.get_running_loop()
+        async with asyncio.timeout_at(loop.time() + STREAM_FRAME_TIMEOUT) as deadline:
+            data = stream.writer(meta, on_frame=lambda last: deadline.reschedule(
+                loop.time() + (DEFAULT_TIMEOUT if last else STREAM_FRAME_TIMEOUT)
+            ))
+            try:
+                return await self._execute_request(
+                    url, query_params, data, ClientTimeout(total=None, sock_connect=DEFAULT_TIMEOUT)
+                )
+            except ClientError:
+                # Producing a frame failed (e.g. the camera is unavailable), retrying won't help
+                if stream.error is not None:
+                    raise stream.error from None
+                raise
+
     async def _execute_request_with_retries(
         self,
         url: str,
         query_params: Dict[str, Any],
         meta: Dict[str, Any],
-        files: Optional[List[bytes]],
+        files: Optional[List[FrameData] | VKCloudVisionFrameStream],
         max_retries: int
     ) -> Dict[str, Any]:
         """Execute request with retry logic."""
         last_error = None
 
         for attempt in range(max_retries):
-            data = self._prepare_form_data(meta, files)
             try:
+                if isinstance(files, VKCloudVisionFrameStream):
+                    return await self._execute_stream_request(url, query_params, meta, files)
+                data = self._prepare_form_data(meta, files)
                 return await self._execute_request(url, query_params, data)
             except TimeoutError as err:
                 last_error = err
@@ -198,4 +267,4 @@ class VKCloudVisionBaseClient:
         raise VKCloudVisionAPIError(
             message=f"Failed after {max_retries} attempts",
             error_details=str(last_error),
-        )
+        ) from last_error
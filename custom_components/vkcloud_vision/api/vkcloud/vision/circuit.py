@@ -0,0 +1,83 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import logging
+import time
+from typing import Optional
+
+from aiohttp import ClientError
+
+from ..exceptions import VKCloudVisionAPIError, VKCloudVisionUnavailableError
+
+_LOGGER = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 3
+COOL_DOWN = 60
+
+
+def is_unavailable(err: BaseException) -> bool:
+    """Return True if an error means the API or the uplink is down, rather than a bad request."""
+    if isinstance(err, (ClientError, TimeoutError, VKCloudVisionUnavailableError)):
+        return True
+    if isinstance(err, VKCloudVisionAPIError):
+        if err.http_status is not None:
+            return err.http_status >= 500
+        # Retries exhausted, the last error tells why
+        return err.__cause__ is not None and is_unavailable(err.__cause__)
+    return False
+
+
+class VKCloudVisionCircuitBreaker:
+    """Tracks API availability across all clients.
+
+    The circuit opens after `FAILURE_THRESHOLD` consecutive unavailability
+    errors. After `COOL_DOWN` seconds it lets exactly one probe request
+    through and rejects the other callers until the probe resolves; a
+    successful request closes the circuit, a failed one restarts the
+    cool-down. A probe that never reports back expires after another
+    `COOL_DOWN`.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the circuit breaker."""
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        # Start of the half-open probe in flight, if any
+        self._probe_started: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow_request(self) -> bool:
+        """Return True if the circuit is closed or the caller may send the half-open probe."""
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now < self._opened_at + COOL_DOWN:
+            return False
+        if self._probe_started is not None and now < self._probe_started + COOL_DOWN:
+            return False
+        self._probe_started = now
+        return True
+
+    def release_probe(self) -> None:
+        """Let another caller probe, the request told nothing about availability (e.g. it was cancelled)."""
+        self._probe_started = None
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            _LOGGER.info("VK Cloud Vision API is available again")
+        self._failures = 0
+        self._opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self._probe_started = None
+        self._failures += 1
+        if self._failures >= FAILURE_THRESHOLD:
+            if self._opened_at is None:
+                _LOGGER.warning("VK Cloud Vision API is unavailable after %d failed requests", self._failures)
+            # A failed probe restarts the cool-down
+            self._opened_at = time.monotonic()
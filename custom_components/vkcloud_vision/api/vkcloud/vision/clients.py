@@ -2,32 +2,89 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-from typing import Any, Dict, List, Optional
+import asyncio
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, cast
 
+from ..exceptions import VKCloudVisionAPIError
 from .base_client import VKCloudVisionBaseClient
-from .response import (VKCloudVisionFaceRecognitionResponse,
+from .frames import FrameData
+from .response import (LabelFilter, VKCloudVisionFaceRecognitionResponse,
                        VKCloudVisionObjectDetectionResponse,
                        VKCloudVisionTextRecognitionResponse)
 
+# Images the API accepts in one request
+MAX_IMAGES_PER_REQUEST = 100
+
 
 class VKCloudVisionObjectsClient(VKCloudVisionBaseClient):
     """Client for objects-related VK Cloud Vision API endpoints."""
 
     async def detect(
         self,
-        files: List[bytes],
+        files: List[FrameData] | AsyncIterator[FrameData],
         modes: List[str],
         images: List[Dict[str, str]],
         prob_threshold: float,
         max_retries: int = 3,
+        label_filter: Optional[LabelFilter] = None,
     ) -> VKCloudVisionObjectDetectionResponse:
-        """Detect objects in a photo."""
+        """Detect objects in a photo, keeping only labels passing `label_filter`."""
         meta = {
             "mode": modes,  # e.g., ["object", "object2", "scene"]
             "images": images,  # Expected format: [{"name": str}]
         }
         raw_response = await self._make_request("/v1/objects/detect", meta, files, max_retries=max_retries)
-        return VKCloudVisionObjectDetectionResponse(raw_response=raw_response, prob_threshold=prob_threshold)
+        return VKCloudVisionObjectDetectionResponse(
+            raw_response=raw_response, prob_threshold=prob_threshold, label_filter=label_filter
+        )
+
+    async def detect_per_mode(
+        self,
+        files: List[bytes],
+        modes: List[str],
+        images: List[Dict[str, str]],
+        prob_threshold: float,
+        max_retries: int = 3,
+        on_result: Optional[
+            Callable[[str, VKCloudVisionObjectDetectionResponse | VKCloudVisionAPIError], None]
+        ] = None,
+        label_filter: Optional[LabelFilter] = None,
+    ) -> VKCloudVisionObjectDetectionResponse:
+        """Detect objects with one concurrent request per mode.
+
+        `on_result` is called for every mode as soon as its request completes,
+        so fast modes don't wait for slow ones. The returned response merges
+        all modes; failed modes are reported as image errors.
+        """
+        async def detect_mode(mode: str) -> tuple[str, VKCloudVisionObjectDetectionResponse | VKCloudVisionAPIError]:
+            try:
+                return mode, await self.detect(files, [mode], images, prob_threshold, max_retries, label_filter)
+            except VKCloudVisionAPIError as err:
+                return mode, err
+
+        results: Dict[str, VKCloudVisionObjectDetectionResponse | VKCloudVisionAPIError] = {}
+        for next_result in asyncio.as_completed([detect_mode(mode) for mode in modes]):
+            mode, result = await next_result
+            results[mode] = result
+            if on_result is not None:
+                on_result(mode, result)
+
+        failed = [result for result in results.values() if isinstance(result, VKCloudVisionAPIError)]
+        if len(failed) == len(modes):
+            raise failed[0]
+
+        merged = VKCloudVisionObjectDetectionResponse(raw_response={}, prob_threshold=prob_threshold)
+        for mode in modes:
+            result = results[mode]
+            if isinstance(result, VKCloudVisionAPIError):
+                result = VKCloudVisionObjectDetectionResponse(
+                    raw_response={mode: [{"name": img["name"], "status": 1, "error": str(result)} for img in images]},
+                    prob_threshold=prob_threshold,
+                )
+            merged.extend(result)
+        return merged
 
 
 class VKCloudVisionTextClient(VKCloudVisionBaseClient):
@@ -50,8 +107,46 @@ class VKCloudVisionTextClient(VKCloudVisionBaseClient):
         return VKCloudVisionTextRecognitionResponse(raw_response)
 
 
+MAX_IMAGES_PER_SET = MAX_IMAGES_PER_REQUEST
+
+
+@dataclass(eq=False)
+class _PendingSet:
+    """A queued `persons/set` call waiting to be sent."""
+
+    files: List[bytes]
+    images: List[Dict[str, Any]]
+    future: asyncio.Future
+
+
+@dataclass
+class _SpaceWriteQueue:
+    """Serializes mutating calls of a person space.
+
+    `persons/set` calls queued while another write is in flight are sent
+    together in one request by whoever gets the lock first.
+    """
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    pending_sets: List[_PendingSet] = field(default_factory=list)
+
+
 class VKCloudVisionPersonsClient(VKCloudVisionBaseClient):
-    """Client for persons-related VK Cloud Vision API endpoints."""
+    """Client for persons-related VK Cloud Vision API endpoints.
+
+    Calls that change a space (`set`, `delete`, `truncate` and `recognize`
+    with `create_new` or `update_embedding`) run one at a time per space, so
+    concurrent training can't create duplicate persons. Read-only
+    recognitions run in parallel.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the client."""
+        super().__init__(*args, **kwargs)
+        self._space_queues: Dict[int, _SpaceWriteQueue] = {}
+
+    def _space_queue(self, space: int) -> _SpaceWriteQueue:
+        return self._space_queues.setdefault(space, _SpaceWriteQueue())
 
     async def set(
         self,
@@ -60,11 +155,59 @@ class VKCloudVisionPersonsClient(VKCloudVisionBaseClient):
         images: List[Dict[str, Any]],
     ) -> Dict[str, Any]:
         """Set a relationship between a photo and person_id."""
+        queue = self._space_queue(space)
+        pending = _PendingSet(files, images, asyncio.get_running_loop().create_future())
+        queue.pending_sets.append(pending)
+
+        try:
+            async with queue.lock:
+                while not pending.future.done():
+                    await self._flush_sets(space, queue)
+        except BaseException:
+            # Cancelled while waiting or flushing: nobody else should send this call
+            if pending in queue.pending_sets:
+                queue.pending_sets.remove(pending)
+            raise
+
+        return pending.future.result()
+
+    async def _flush_sets(self, space: int, queue: _SpaceWriteQueue) -> None:
+        """Send queued `set` calls of a space in one request, up to `MAX_IMAGES_PER_SET` images."""
+        if not queue.pending_sets:
+            return
+        batch = [queue.pending_sets.pop(0)]
+        count = len(batch[0].files)
+        while queue.pending_sets and count + len(queue.pending_sets[0].files) <= MAX_IMAGES_PER_SET:
+            count += len(queue.pending_sets[0].files)
+            batch.append(queue.pending_sets.pop(0))
+
+        # Image names are only unique within a call, prefix them with the call index
         meta = {
             "space": str(space),
-            "images": images,  # Expected format: [{"name": str, "person_id": int}]
+            "images": [  # Expected format: [{"name": str, "person_id": int}]
+                {**image, "name": f"{idx}_{image['name']}"} for idx, call in enumerate(batch) for image in call.images
+            ],
         }
-        return await self._make_request("/v1/persons/set", meta, files, max_retries=1)
+        try:
+            response = await self._make_request(
+                "/v1/persons/set", meta, [file for call in batch for file in call.files], max_retries=1
+            )
+        except asyncio.CancelledError:
+            # The flushing caller is cancelled, the others are sent by the next one to get the lock
+            queue.pending_sets[:0] = batch
+            raise
+        except Exception as err:
+            for call in batch:
+                call.future.set_exception(err)
+            return
+
+        objects: Dict[int, List[Any]] = {idx: [] for idx in range(len(batch))}
+        for obj in cast(List[Dict[str, Any]], response.get("objects", [])):
+            idx, _, name = str(obj.get("name", "")).partition("_")
+            if idx.isdigit() and int(idx) in objects:
+                objects[int(idx)].append({**obj, "name": name})
+        for idx, call in enumerate(batch):
+            call.future.set_result({**response, "objects": objects[idx]})
 
     async def delete(
         self,
@@ -77,12 +220,14 @@ class VKCloudVisionPersonsClient(VKCloudVisionBaseClient):
             "space": str(space),
             "images": [{"name": str(pid), "person_id": pid} for pid in person_ids],
         }
-        return await self._make_request("/v1/persons/delete", meta, max_retries=1)
+        async with self._space_queue(space).lock:
+            return await self._make_request("/v1/persons/delete", meta, max_retries=1)
 
     async def truncate(self, space: int) -> Dict[str, Any]:
         """Clear the entire space."""
         meta = {"space": str(space)}
-        return await self._make_request("/v1/persons/truncate", meta, max_retries=1)
+        async with self._space_queue(space).lock:
+            return await self._make_request("/v1/persons/truncate", meta, max_retries=1)
 
     async def recognize(
         self,
@@ -95,14 +240,21 @@ class VKCloudVisionPersonsClient(VKCloudVisionBaseClient):
         tag_to_alias_map: dict | None = None,
         max_retries: int = 3,
     ) -> VKCloudVisionFaceRecognitionResponse:
-        """Recognize a person in a photo."""
+        """Recognize a person in a photo.
+
+        With `create_new` or `update_embedding` the call trains the space and
+        waits for other writes to it, pass both as False for a read-only call.
+        """
         meta = {
             "space": str(space),
             "create_new": create_new,
             "update_embedding": update_embedding,
             "images": images,  # Expected format: [{"name": str}]
         }
-        raw_response = await self._make_request("/v1/persons/recognize", meta, files, max_retries=max_retries)
+        # Training changes the space, read-only recognitions don't need to wait for writes
+        write_lock = self._space_queue(space).lock if create_new or update_embedding else nullcontext()
+        async with write_lock:
+            raw_response = await self._make_request("/v1/persons/recognize", meta, files, max_retries=max_retries)
         return VKCloudVisionFaceRecognitionResponse(
             raw_response,
             confidence_threshold=confidence_threshold,
@@ -0,0 +1,112 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import mmap
+import tempfile
+import threading
+import weakref
+from typing import List, Optional
+
+FrameData = bytes | memoryview
+
+# Frames above this size are spooled to disk, smaller ones aren't worth a file and a mapping
+SPOOL_THRESHOLD = 256 * 1024
+
+
+class VKCloudVisionFrame:
+    """Frame bytes kept in memory or in a memory-mapped temporary file.
+
+    The frame is freed when its reference count drops to zero. Memoryviews
+    handed out by `data` stay valid until then.
+    """
+
+    def __init__(self, data: FrameData, spool: bool) -> None:
+        """Initialize the frame, spooling it to disk if asked. Blocking."""
+        self._size = len(data)
+        self._bytes: Optional[FrameData] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._refs = 1
+        self._lock = threading.Lock()
+
+        if spool and data:
+            with tempfile.TemporaryFile() as file:
+                file.write(data)
+                file.flush()
+                # The mapping keeps the (already unlinked) file alive after it is closed
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._bytes = data
+
+    @property
+    def spooled(self) -> bool:
+        return self._mmap is not None
+
+    @property
+    def data(self) -> FrameData:
+        """Return the frame as bytes or as a memoryview of the mapping, without copying."""
+        if self._mmap is not None:
+            return memoryview(self._mmap)
+        if self._bytes is None:
+            raise ValueError("Frame has been released")
+        return self._bytes
+
+    def __len__(self) -> int:
+        return self._size
+
+    def acquire(self) -> "VKCloudVisionFrame":
+        """Take another reference to the frame."""
+        with self._lock:
+            if self._refs == 0:
+                raise ValueError("Frame has been released")
+            self._refs += 1
+        return self
+
+    def release(self) -> None:
+        """Drop a reference, the last one frees the frame."""
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        self._bytes = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Memoryviews are still exported (e.g. to a finished request), the mapping is closed with them
+                pass
+            self._mmap = None
+
+
+class VKCloudVisionFrameStore:
+    """Frames of a single call, spooled to memory-mapped temporary files above `spool_threshold` bytes.
+
+    The store holds one reference to every frame it created and releases
+    them on `close` or when the store itself is garbage collected; callers
+    that keep frames longer `acquire` them.
+    """
+
+    def __init__(self, spool_threshold: int = SPOOL_THRESHOLD) -> None:
+        """Initialize the store."""
+        self._spool_threshold = spool_threshold
+        self._frames: List[VKCloudVisionFrame] = []
+        self._finalizer = weakref.finalize(self, _release_frames, self._frames)
+        self.spooled_bytes = 0
+
+    def add(self, data: FrameData) -> VKCloudVisionFrame:
+        """Store a frame. Blocking, run in the executor."""
+        frame = VKCloudVisionFrame(data, spool=len(data) >= self._spool_threshold)
+        if frame.spooled:
+            self.spooled_bytes += len(frame)
+        self._frames.append(frame)
+        return frame
+
+    def close(self) -> None:
+        """Release all frames of the store."""
+        self._finalizer()
+        self.spooled_bytes = 0
+
+
+def _release_frames(frames: List[VKCloudVisionFrame]) -> None:
+    while frames:
+        frames.pop().release()
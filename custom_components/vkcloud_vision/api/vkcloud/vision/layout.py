@@ -0,0 +1,115 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from typing import Any, Dict, List, Optional, Tuple
+
+Box = Tuple[float, float, float, float]
+
+# Words overlapping a line by this share of the lower one's height belong to it
+LINE_OVERLAP = 0.5
+# Words further apart than this many line heights start a new segment of the line (e.g. another column)
+WORD_GAP = 2.0
+# Lines closer than this many line heights, overlapping horizontally, belong to one block
+BLOCK_GAP = 1.0
+
+
+def word_box(coord: Any) -> Optional[Box]:
+    """Return `(x1, y1, x2, y2)` of a word, coordinates may be a box or a list of corner points."""
+    if not coord:
+        return None
+    if isinstance(coord[0], (list, tuple)):
+        xs = [point[0] for point in coord]
+        ys = [point[1] for point in coord]
+        return min(xs), min(ys), max(xs), max(ys)
+    x1, y1, x2, y2 = coord[:4]
+    return x1, y1, x2, y2
+
+
+def _union(boxes: List[Box]) -> Box:
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+def _height(box: Box) -> float:
+    return max(box[3] - box[1], 1)
+
+
+def reconstruct_layout(words: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Group words into lines and lines into blocks by their coordinates.
+
+    Words are swept top to bottom by their vertical center and join the
+    open line they overlap most; lines are split at wide horizontal gaps
+    and read left to right. Lines that follow each other closely and
+    overlap horizontally form a block. Returns `(lines, blocks)` with
+    `text` and `coord`, lines also have the index of their `block`.
+    """
+    boxed = []
+    for word in words:
+        box = word_box(word.get("coord"))
+        if box is not None and word.get("text"):
+            boxed.append((box, str(word["text"])))
+    boxed.sort(key=lambda item: (item[0][1] + item[0][3]) / 2)
+
+    # Sweep: [box, [(word box, text), ...]] of lines, those ending above the current word are closed
+    rows: List[List[Any]] = []
+    open_rows: List[List[Any]] = []
+    for box, text in boxed:
+        open_rows = [row for row in open_rows if row[0][3] > box[1]]
+        best = None
+        best_overlap = 0.0
+        for row in open_rows:
+            overlap = min(box[3], row[0][3]) - max(box[1], row[0][1])
+            if overlap >= LINE_OVERLAP * min(_height(box), _height(row[0])) and overlap > best_overlap:
+                best, best_overlap = row, overlap
+        if best is None:
+            row = [box, [(box, text)]]
+            rows.append(row)
+            open_rows.append(row)
+        else:
+            best[1].append((box, text))
+            best[0] = _union([best[0], box])
+
+    segments: List[Tuple[Box, str]] = []
+    for _row_box, row_words in rows:
+        row_words.sort(key=lambda item: item[0][0])
+        height = sorted(_height(word[0]) for word in row_words)[len(row_words) // 2]
+        current = [row_words[0]]
+        for word in row_words[1:]:
+            if word[0][0] - current[-1][0][2] > WORD_GAP * height:
+                segments.append((_union([w[0] for w in current]), " ".join(w[1] for w in current)))
+                current = []
+            current.append(word)
+        segments.append((_union([w[0] for w in current]), " ".join(w[1] for w in current)))
+
+    # Reading order: top to bottom, then left to right
+    segments.sort(key=lambda segment: (segment[0][1], segment[0][0]))
+    block_boxes: List[Box] = []
+    block_lines: List[List[int]] = []
+    lines: List[Dict[str, Any]] = []
+    for box, text in segments:
+        block_idx = None
+        for idx, block_box in enumerate(block_boxes):
+            last = lines[block_lines[idx][-1]]["coord"]
+            gap = box[1] - last[3]
+            if -_height(box) < gap <= BLOCK_GAP * _height(last) and box[0] < block_box[2] and box[2] > block_box[0]:
+                block_idx = idx
+                break
+        if block_idx is None:
+            block_idx = len(block_boxes)
+            block_boxes.append(box)
+            block_lines.append([])
+        else:
+            block_boxes[block_idx] = _union([block_boxes[block_idx], box])
+        block_lines[block_idx].append(len(lines))
+        lines.append({"text": text, "coord": list(box), "block": block_idx})
+
+    blocks = [
+        {"text": "\n".join(lines[idx]["text"] for idx in line_idxs), "coord": list(block_box)}
+        for block_box, line_idxs in zip(block_boxes, block_lines)
+    ]
+    return lines, blocks
@@ -0,0 +1,138 @@
+"""Vectorized box overlap helpers for VK Cloud Vision responses."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Boxes this close to a tile border (in pixels) are considered cut by it
+SEAM_MARGIN = 4
+
+
+def _areas_and_intersections(boxes_a: np.ndarray, boxes_b: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+
+    area_a = np.clip(boxes_a[:, 2] - boxes_a[:, 0], 0, None) * np.clip(boxes_a[:, 3] - boxes_a[:, 1], 0, None)
+    area_b = np.clip(boxes_b[:, 2] - boxes_b[:, 0], 0, None) * np.clip(boxes_b[:, 3] - boxes_b[:, 1], 0, None)
+
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    return area_a, area_b, wh[..., 0] * wh[..., 1]
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Return the IoU matrix between two sets of (x1, y1, x2, y2) boxes."""
+    area_a, area_b, intersection = _areas_and_intersections(boxes_a, boxes_b)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, intersection / union, 0.0)
+
+
+def box_iom(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Return the intersection-over-minimum-area matrix, which stays high for a partial box inside a full one."""
+    area_a, area_b, intersection = _areas_and_intersections(boxes_a, boxes_b)
+    smaller = np.minimum(area_a[:, None], area_b[None, :])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(smaller > 0, intersection / smaller, 0.0)
+
+
+def seam_overlap(
+    boxes: np.ndarray, tile_boxes: np.ndarray, frame_box: Sequence[float], margin: float = SEAM_MARGIN
+) -> np.ndarray:
+    """Return how well boxes cut by tile borders continue each other across a seam, as an (N, N) matrix.
+
+    A box is cut on a side when it touches the border of its tile inside the
+    frame. Boxes facing each other across a vertical seam (one cut on the
+    right, the other on the left) score the IoU of their vertical extents,
+    likewise across a horizontal seam; corner parts facing each other on both
+    axes score 1 if they intersect. Other pairs score 0.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    tile_boxes = np.asarray(tile_boxes, dtype=np.float64).reshape(-1, 4)
+    frame = np.asarray(frame_box, dtype=np.float64)
+
+    # (N, 2) per axis: cut on the left/top and on the right/bottom side
+    cut_low = (boxes[:, :2] <= tile_boxes[:, :2] + margin) & (tile_boxes[:, :2] > frame[:2] + margin)
+    cut_high = (boxes[:, 2:] >= tile_boxes[:, 2:] - margin) & (tile_boxes[:, 2:] < frame[2:] - margin)
+    faces = cut_high[:, None, :] & cut_low[None, :, :] & (boxes[None, :, :2] < boxes[:, None, 2:])
+    faces = faces | faces.transpose(1, 0, 2)
+
+    intersection = np.clip(
+        np.minimum(boxes[:, None, 2:], boxes[None, :, 2:]) - np.maximum(boxes[:, None, :2], boxes[None, :, :2]), 0, None
+    )
+    lengths = boxes[:, 2:] - boxes[:, :2]
+    union = lengths[:, None, :] + lengths[None, :, :] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        extent_iou = np.where(union > 0, intersection / union, 0.0)
+
+    overlap = np.where(faces[..., 0] & ~faces[..., 1], extent_iou[..., 1], 0.0)
+    overlap = np.where(faces[..., 1] & ~faces[..., 0], extent_iou[..., 0], overlap)
+    overlap = np.where(faces.all(axis=-1) & (intersection > 0).all(axis=-1), 1.0, overlap)
+    np.fill_diagonal(overlap, 0.0)
+    return overlap
+
+
+def group_boxes(
+    boxes: Sequence[Sequence[float]],
+    scores: Sequence[float],
+    iou_threshold: float,
+    sources: Optional[Sequence[int]] = None,
+    classes: Optional[Sequence[int]] = None,
+    metric: str = "iou",
+    overlaps: Optional[np.ndarray] = None,
+) -> list[list[int]]:
+    """Greedily group overlapping boxes, best score first.
+
+    Returns a list of groups, each one a list of box indices with the keeper
+    (highest score) first. When `sources` is given, boxes sharing a source id
+    are never merged with each other and a keeper absorbs at most one box per
+    other source (the one it overlaps most). When `classes` is given, only
+    boxes of the same class are merged. `metric` is either "iou" or "iom"
+    (intersection over the smaller box), `overlaps` is a precomputed (N, N)
+    matrix used instead of it. Groups never chain: a box joins a keeper only
+    by overlapping the keeper itself.
+    """
+    count = len(boxes)
+    if count == 0:
+        return []
+
+    if overlaps is not None:
+        iou = np.array(overlaps, dtype=np.float64)
+    else:
+        overlap_fn = box_iom if metric == "iom" else box_iou
+        iou = overlap_fn(np.asarray(boxes), np.asarray(boxes))
+    source_ids = np.asarray(sources) if sources is not None else None
+    if source_ids is not None:
+        iou[source_ids[:, None] == source_ids[None, :]] = 0.0
+    if classes is not None:
+        class_ids = np.asarray(classes)
+        iou[class_ids[:, None] != class_ids[None, :]] = 0.0
+
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    taken = np.zeros(count, dtype=bool)
+    groups: list[list[int]] = []
+
+    for idx in order:
+        if taken[idx]:
+            continue
+        taken[idx] = True
+
+        candidates = (iou[idx] >= iou_threshold) & ~taken
+        if source_ids is None:
+            members = np.flatnonzero(candidates)
+        else:
+            members = np.array([
+                # Best-overlapping box from every other source
+                np.flatnonzero(mask)[np.argmax(iou[idx][mask])]
+                for mask in (candidates & (source_ids == src) for src in np.unique(source_ids[candidates]))
+            ], dtype=np.int64)
+
+        taken[members] = True
+        groups.append([int(idx), *(int(m) for m in members)])
+
+    return groups
@@ -4,19 +4,66 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-from typing import List, cast
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Mapping, Optional, cast
 
+import numpy as np
 from homeassistant.util.json import JsonObjectType, JsonValueType
 
+from .layout import reconstruct_layout
+from .nms import box_iom, group_boxes, seam_overlap
+
+
+@dataclass(frozen=True)
+class LabelFilter:
+    """Keep labels named in `include` (if any) and not in `exclude`, in English or Russian, case-insensitively."""
+
+    include: frozenset[str] = frozenset()
+    exclude: frozenset[str] = frozenset()
+
+    @classmethod
+    def from_names(
+        cls, include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None
+    ) -> Optional["LabelFilter"]:
+        """Return a filter, or None if no names are given."""
+        if not include and not exclude:
+            return None
+        return cls(
+            frozenset(name.strip().lower() for name in include or ()),
+            frozenset(name.strip().lower() for name in exclude or ()),
+        )
+
+    def matches(self, label: Mapping) -> bool:
+        names = {str(label.get("eng", "")).lower(), str(label.get("rus", "")).lower()}
+        if self.include and not names & self.include:
+            return False
+        return not names & self.exclude
+
+
+def label_counts(labels: Iterable[Mapping[str, Any]]) -> dict[str, int]:
+    """Return `{label: count}` of detected labels."""
+    counts: dict[str, int] = {}
+    for label in labels:
+        name = str(label.get("eng") or "unknown")
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
 
 class VKCloudVisionObjectDetectionResponse:
     """Class to handle and parse VK Cloud Vision object detection API responses."""
 
-    def __init__(self, raw_response: JsonObjectType, prob_threshold: float = 0.1):
+    def __init__(
+        self,
+        raw_response: JsonObjectType,
+        prob_threshold: float = 0.1,
+        label_filter: Optional[LabelFilter] = None,
+    ):
         """Initialize with API response."""
         self._errors: List[str] = []
         self._labels: list[JsonObjectType] = []
+        self._merged: JsonObjectType | None = None
         self._prob_threshold = prob_threshold
+        self._label_filter = label_filter
         self._data = self._process_response(raw_response)
 
     @property
@@ -39,6 +86,212 @@ class VKCloudVisionObjectDetectionResponse:
         """Return extracted labels for the first snapshot."""
         return self._labels
 
+    @property
+    def merged(self) -> JsonObjectType | None:
+        """Return label counts before and after the cross-mode merge, if merging was applied."""
+        return self._merged
+
+    def _labels_by_image(self) -> dict[str, list[JsonObjectType]]:
+        """Return labels of every image, all modes together."""
+        labels: dict[str, list[JsonObjectType]] = {}
+        for images in self._data.values():
+            for image in cast(List[dict[str, JsonValueType]], images):
+                labels.setdefault(str(image.get("name", "unknown")), []).extend(
+                    cast(list[JsonObjectType], image.get("labels", []))
+                )
+        return labels
+
+    def compact(self) -> JsonObjectType:
+        """Return `{image: {label: [max_prob, count, boxes]}}`, all modes together."""
+        compact: dict[str, JsonValueType] = {}
+        for image_name, labels in self._labels_by_image().items():
+            image_compact: dict[str, list] = {}
+            for label in labels:
+                name = str(label.get("eng") or "unknown")
+                entry = image_compact.setdefault(name, [0.0, 0, []])
+                entry[0] = max(entry[0], cast(float, label.get("prob", 0)))
+                entry[1] += 1
+                if label.get("coord"):
+                    entry[2].append(label["coord"])
+            compact[image_name] = cast(JsonValueType, image_compact)
+        return compact
+
+    def counts(self) -> JsonObjectType:
+        """Return `{image: {label: count}}`, all modes together."""
+        return {
+            image_name: cast(JsonValueType, label_counts(labels))
+            for image_name, labels in self._labels_by_image().items()
+        }
+
+    def extend(self, other: "VKCloudVisionObjectDetectionResponse") -> None:
+        """Add modes of another response for the same images (e.g. a follow-up request)."""
+        self._data.update(other._data)
+        self._errors.extend(other._errors)
+        self._labels.extend(other._labels)
+
+    def translate(self, offsets: Mapping[str, tuple[int, int]]) -> None:
+        """Shift label coordinates of each image by its (dx, dy) offset, e.g. to map crops back to the frame."""
+        for images in self._data.values():
+            for image in cast(List[dict[str, JsonValueType]], images):
+                offset = offsets.get(str(image.get("name")))
+                if offset is None:
+                    continue
+                dx, dy = offset
+                for label in cast(list[dict], image.get("labels", [])):
+                    coord = label.get("coord")
+                    if coord:
+                        label["coord"] = [coord[0] + dx, coord[1] + dy, coord[2] + dx, coord[3] + dy]
+
+    def merge_tiles(self, tiles: Mapping[str, tuple[str, tuple[int, int, int, int]]], overlap_threshold: float) -> None:
+        """Fold tile results back into their frames.
+
+        `tiles` maps each tile image name to its frame name and (left, top,
+        right, bottom) box in the frame. Coordinates are shifted to frame
+        coordinates and boxes of the same label are merged with at most one box
+        of every other tile: a duplicate found where tiles overlap, or a part
+        of the object cut by a tile border that continues it across the seam.
+        Boxes never join through a third box, so separate objects touching the
+        same seam box stay apart.
+        """
+        self.translate({name: (box[0], box[1]) for name, (_, box) in tiles.items()})
+
+        frame_boxes: dict[str, tuple[int, int, int, int]] = {}
+        for frame_name, box in tiles.values():
+            known = frame_boxes.get(frame_name, box)
+            frame_boxes[frame_name] = (
+                min(known[0], box[0]), min(known[1], box[1]), max(known[2], box[2]), max(known[3], box[3])
+            )
+
+        for mode, images in self._data.items():
+            frames: dict[str, list[dict[str, JsonValueType]]] = {}
+            for image in cast(List[dict[str, JsonValueType]], images):
+                frame_name, _ = tiles.get(str(image.get("name")), (str(image.get("name")), (0, 0, 0, 0)))
+                frames.setdefault(frame_name, []).append(image)
+
+            merged_images: list[JsonValueType] = []
+            for frame_name, frame_tiles in frames.items():
+                labels: list[dict] = []
+                sources: list[int] = []
+                tile_boxes: list[tuple[int, int, int, int] | None] = []
+                for tile_idx, tile in enumerate(frame_tiles):
+                    _, tile_box = tiles.get(str(tile.get("name")), (frame_name, None))
+                    for label in cast(list[dict], tile.get("labels", [])):
+                        labels.append(label)
+                        sources.append(tile_idx)
+                        tile_boxes.append(tile_box)
+
+                boxed = [i for i, label in enumerate(labels) if label.get("coord")]
+                class_ids = {name: i for i, name in enumerate(dict.fromkeys(labels[i].get("eng") for i in boxed))}
+                coords = np.array([labels[i]["coord"][:4] for i in boxed], dtype=np.float64).reshape(-1, 4)
+                overlaps = box_iom(coords, coords)
+                if (frame_box := frame_boxes.get(frame_name)) is not None:
+                    seams = seam_overlap(coords, [tile_boxes[i] or frame_box for i in boxed], frame_box)
+                    overlaps = np.maximum(overlaps, seams)
+                groups = group_boxes(
+                    coords,
+                    [labels[i].get("prob", 0.0) for i in boxed],
+                    overlap_threshold,
+                    sources=[sources[i] for i in boxed],
+                    classes=[class_ids[labels[i].get("eng")] for i in boxed],
+                    overlaps=overlaps,
+                )
+
+                frame_labels: list[JsonValueType] = []
+                seen_unboxed: set[str] = set()
+                for label in labels:
+                    # Scene-like labels are reported once per tile, keep the first one
+                    if not label.get("coord") and label.get("eng") not in seen_unboxed:
+                        seen_unboxed.add(label.get("eng"))
+                        frame_labels.append(label)
+                for group in groups:
+                    members = [labels[boxed[i]] for i in group]
+                    coords = [member["coord"] for member in members]
+                    frame_labels.append({
+                        **members[0],
+                        "coord": [
+                            min(c[0] for c in coords),
+                            min(c[1] for c in coords),
+                            max(c[2] for c in coords),
+                            max(c[3] for c in coords),
+                        ],
+                    })
+
+                statuses = [tile.get("status", 0) for tile in frame_tiles]
+                merged_images.append({
+                    **frame_tiles[0],
+                    "name": frame_name,
+                    "status": 0 if 0 in statuses else statuses[0],
+                    "labels": frame_labels,
+                    "tiles": len(frame_tiles),
+                })
+
+            self._data[mode] = merged_images
+
+        first_frame = next(iter(dict.fromkeys(frame for frame, _ in tiles.values())), None)
+        self._labels = [
+            cast(JsonObjectType, label)
+            for images in self._data.values()
+            for image in cast(List[dict[str, JsonValueType]], images)
+            if image.get("name") == first_frame
+            for label in cast(list[JsonValueType], image.get("labels", []))
+        ]
+
+    def merge_overlapping(self, iou_threshold: float) -> JsonObjectType:
+        """Merge overlapping boxes reported by different modes for the same image.
+
+        Every group of overlapping boxes keeps the best-scoring label in its
+        mode, with the other modes' labels attached as `alternates` and removed
+        from the response. Labels without coordinates (e.g. scenes) are passed
+        through unchanged. Return the label counts before and after merging.
+        """
+        per_image: dict[str, list[tuple[str, JsonObjectType]]] = {}
+        for mode, images in self._data.items():
+            for image in cast(List[dict[str, JsonValueType]], images):
+                labels = cast(list[JsonObjectType], image.get("labels", []))
+                per_image.setdefault(str(image.get("name", "unknown")), []).extend(
+                    (mode, label) for label in labels
+                )
+
+        before = sum(len(entries) for entries in per_image.values())
+        absorbed: set[int] = set()
+        # Keepers get a copy with alternates, the parsed labels are shared with the raw response
+        keepers: dict[int, JsonObjectType] = {}
+        for entries in per_image.values():
+            boxed = [(mode, label) for mode, label in entries if label.get("coord")]
+            mode_ids = {mode: i for i, mode in enumerate(dict.fromkeys(mode for mode, _ in boxed))}
+            groups = group_boxes(
+                [cast(list[float], label["coord"]) for _, label in boxed],
+                [cast(float, label.get("prob", 0.0)) for _, label in boxed],
+                iou_threshold,
+                sources=[mode_ids[mode] for mode, _ in boxed],
+            )
+            for group in groups:
+                if len(group) == 1:
+                    continue
+                best_label = boxed[group[0]][1]
+                keepers[id(best_label)] = {**best_label, "alternates": [
+                    {
+                        "mode": boxed[i][0],
+                        "eng": boxed[i][1].get("eng"),
+                        "rus": boxed[i][1].get("rus"),
+                        "prob": boxed[i][1].get("prob"),
+                    }
+                    for i in group[1:]
+                ]}
+                absorbed.update(id(boxed[i][1]) for i in group[1:])
+
+        for images in self._data.values():
+            for image in cast(List[dict[str, JsonValueType]], images):
+                if "labels" in image:
+                    image["labels"] = [
+                        keepers.get(id(label), label)
+                        for label in cast(list[JsonValueType], image["labels"]) if id(label) not in absorbed
+                    ]
+        self._labels = [keepers.get(id(label), label) for label in self._labels if id(label) not in absorbed]
+
+        self._merged = {"before": before, "after": before - len(absorbed)}
+        return self._merged
+
     def _process_response(self, response: JsonObjectType) -> JsonObjectType:
         """Process and filter API response."""
         processed = {}
@@ -58,6 +311,7 @@ class VKCloudVisionObjectDetectionResponse:
                     processed_image["labels"] = [
                         label for label in cast(list[JsonValueType], image["labels"])
                         if cast(dict, label).get("prob", 0) >= self._prob_threshold
+                        and (self._label_filter is None or self._label_filter.matches(cast(dict, label)))
                     ]
 
                     # FIXME: Proper parsing of multiple snapshot labels (good enough for now)
@@ -75,6 +329,7 @@ class VKCloudVisionFaceRecognitionResponse:
 
     def __init__(self, raw_response: dict, confidence_threshold: float = 0.1, tag_to_alias_map: dict | None = None):
         self._persons: list[dict] = []
+        self._persons_by_image: dict[str, list[dict]] = {}
         self._aliases_changed: bool = False
         self._errors: list[str] = []
         self._confidence_threshold = confidence_threshold
@@ -93,6 +348,10 @@ class VKCloudVisionFaceRecognitionResponse:
     def persons(self) -> list[dict]:
         return self._persons
 
+    @property
+    def persons_by_image(self) -> dict[str, list[dict]]:
+        return self._persons_by_image
+
     @property
     def aliases_changed(self) -> bool:
         return self._aliases_changed
@@ -105,6 +364,54 @@ class VKCloudVisionFaceRecognitionResponse:
     def error_message(self) -> str | None:
         return "; ".join(self._errors) if self._errors else None
 
+    def translate(self, offsets: Mapping[str, tuple[int, int]]) -> None:
+        """Shift person coordinates of each image by its (dx, dy) offset, e.g. to map crops back to the frame."""
+        for image_name, persons in self._persons_by_image.items():
+            offset = offsets.get(image_name)
+            if offset is None:
+                continue
+            dx, dy = offset
+            for person in persons:
+                coord = person.get("coord")
+                if coord:
+                    person["coord"] = [coord[0] + dx, coord[1] + dy, coord[2] + dx, coord[3] + dy]
+
+    def aggregate(self, image_groups: Mapping[str, tuple[str, str]]) -> dict[str, list[dict]]:
+        """Keep the best-similarity observation of each person across the images of a group.
+
+        `image_groups` maps each image name to its group and frame names, e.g.
+        a person crop to its camera and snapshot. Every kept observation gets
+        the frame it came from and the number of images the person was seen in. Unrecognized faces
+        can't be matched between images, so they are taken from the frame
+        with the most of them.
+        """
+        best: dict[str, dict[str, dict]] = {}
+        seen: dict[str, dict[str, int]] = {}
+        undefined: dict[str, dict[str, list[dict]]] = {}
+        for image_name, persons in self._persons_by_image.items():
+            group, frame = image_groups.get(image_name, (image_name, image_name))
+            group_best = best.setdefault(group, {})
+            group_seen = seen.setdefault(group, {})
+            frame_undefined = undefined.setdefault(group, {}).setdefault(frame, [])
+
+            for person in persons:
+                tag = person.get("tag", "undefined")
+                if tag == "undefined":
+                    frame_undefined.append({**person, "image": frame, "observations": 1})
+                    continue
+                group_seen[tag] = group_seen.get(tag, 0) + 1
+                current = group_best.get(tag)
+                if current is None or person.get("similarity", 0) > current.get("similarity", 0):
+                    group_best[tag] = {**person, "image": frame}
+
+        return {
+            group: [
+                *({**person, "observations": seen[group][tag]} for tag, person in group_best.items()),
+                *max(undefined[group].values(), key=len),
+            ]
+            for group, group_best in best.items()
+        }
+
     def _parse_persons(self, response: JsonObjectType) -> None:
         objects = response.get("objects", [])
         self._aliases_changed = cast(bool, response.get("aliases_changed", False))
@@ -112,20 +419,24 @@ class VKCloudVisionFaceRecognitionResponse:
         if not objects:
             return
 
-        # We only handle a single image per request
-        obj = cast(List[dict], objects)[0]
-        status = obj.get("status", 0)
-        if status != 0:
-            self._errors.append(f"{obj.get('name', 'unknown')}: {obj.get('error', 'unknown')}")
-
         self._persons = []
-        for person in obj.get("persons", []):
-            if person.get("confidence", 0) < self._confidence_threshold:
-                continue
+        for obj in cast(List[dict], objects):
+            name = obj.get("name", "unknown")
+            status = obj.get("status", 0)
+            if status != 0:
+                self._errors.append(f"{name}: {obj.get('error', 'unknown')}")
+
+            image_persons = []
+            for person in obj.get("persons", []):
+                if person.get("confidence", 0) < self._confidence_threshold:
+                    continue
 
-            tag = person.get("tag", "undefined")
-            person["alias"] = self._tag_to_alias_map.get(tag, tag)
-            self._persons.append(person)
+                tag = person.get("tag", "undefined")
+                person["alias"] = self._tag_to_alias_map.get(tag, tag)
+                image_persons.append(person)
+
+            self._persons_by_image[name] = image_persons
+            self._persons.extend(image_persons)
 
 
 class VKCloudVisionTextRecognitionResponse:
@@ -148,6 +459,13 @@ class VKCloudVisionTextRecognitionResponse:
             return self._objects[0].get("words", [])
         return []
 
+    @property
+    def lines(self) -> list[dict]:
+        """Return text lines reconstructed from word coordinates for the first image."""
+        if self._objects:
+            return self._objects[0].get("lines", [])
+        return []
+
     @property
     def text(self) -> str | None:
         """Return joined text string for the first image (backward compatible)."""
@@ -183,4 +501,5 @@ class VKCloudVisionTextRecognitionResponse:
             processed_obj = obj.copy()
             processed_obj["words"] = words
             processed_obj["text"] = text
+            processed_obj["lines"], processed_obj["blocks"] = reconstruct_layout(words)
             self._objects.append(processed_obj)
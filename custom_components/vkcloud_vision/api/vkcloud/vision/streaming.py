@@ -0,0 +1,105 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from aiohttp import MultipartWriter
+from aiohttp.payload import AsyncIterablePayload
+from homeassistant.core import HomeAssistant
+
+from ..exceptions import VKCloudVisionAPIError
+from .frames import FrameData, VKCloudVisionFrameStore
+
+# Frames sent by a failed attempt are kept in memory up to this size to be resent by the next attempt,
+# later frames are spilled to disk up to MAX_SPILL_BYTES
+MAX_BUFFER_BYTES = 32 * 1024 * 1024
+MAX_SPILL_BYTES = 256 * 1024 * 1024
+
+
+class VKCloudVisionFrameStream:
+    """Frames uploaded as soon as they are produced.
+
+    Sent frames are kept, so a retry can resend them and then continue with
+    frames that haven't been produced yet. They stay in memory while they fit
+    in `MAX_BUFFER_BYTES`, only a longer burst is spilled to memory-mapped
+    temporary files. Bursts larger than `MAX_SPILL_BYTES` on top of that
+    can't be retried once the spill overflows.
+    """
+
+    def __init__(self, hass: HomeAssistant, frames: AsyncIterator[FrameData]) -> None:
+        """Initialize the stream."""
+        self._hass = hass
+        self._source = frames
+        self._spill = VKCloudVisionFrameStore(spool_threshold=0)
+        # Frames sent so far, bytes or memoryviews of spilled frames
+        self._sent: List[FrameData] = []
+        self._buffered_bytes = 0
+        self._overflowed = False
+        self.error: Optional[BaseException] = None
+
+    async def _async_frames(self) -> AsyncIterator[FrameData]:
+        """Yield frames sent by previous attempts first, then new frames from the source."""
+        for data in list(self._sent):
+            yield data
+
+        if self._overflowed:
+            raise VKCloudVisionAPIError(
+                message="Unable to resend frames",
+                error_details=f"burst exceeds the {MAX_SPILL_BYTES} bytes spill limit",
+            )
+
+        try:
+            async for data in self._source:
+                if not self._overflowed:
+                    await self._async_keep(data)
+                yield data
+        except Exception as err:
+            # aiohttp wraps errors raised while sending the body, keep the original one for the caller
+            self.error = err
+            raise
+
+    async def _async_keep(self, data: FrameData) -> None:
+        """Keep a sent frame for retries, in memory while the buffer has room."""
+        if self._buffered_bytes + len(data) <= MAX_BUFFER_BYTES:
+            self._sent.append(data)
+            self._buffered_bytes += len(data)
+            return
+        await self._hass.async_add_executor_job(self._spill_frame, data)
+
+    def _spill_frame(self, data: FrameData) -> None:
+        if self._spill.spooled_bytes + len(data) > MAX_SPILL_BYTES:
+            self._overflowed = True
+            return
+        self._sent.append(self._spill.add(data).data)
+
+    def writer(self, meta: Dict[str, Any], on_frame: Callable[[bool], None]) -> MultipartWriter:
+        """Return a multipart body pulling one frame per image of `meta`.
+
+        `on_frame` is called after every frame with True for the last one.
+        """
+        names: List[str] = [image["name"] for image in meta.get("images", [])]
+        frames = self._async_frames()
+
+        async def frame_part(name: str, last: bool) -> AsyncIterator[FrameData]:
+            try:
+                yield await anext(frames)
+            except StopAsyncIteration:
+                raise VKCloudVisionAPIError(message="Frame stream ended early", error_details=name) from None
+            on_frame(last)
+
+        writer = MultipartWriter("form-data")
+        meta_part = writer.append(json.dumps(meta))
+        meta_part.set_content_disposition("form-data", name="meta")
+        for index, name in enumerate(names):
+            payload = AsyncIterablePayload(frame_part(name, index == len(names) - 1))
+            payload.set_content_disposition("form-data", name=name, filename=name)
+            writer.append_payload(payload)
+        return writer
+
+    def close(self) -> None:
+        """Release sent frames."""
+        self._sent.clear()
+        self._buffered_bytes = 0
+        self._spill.close()
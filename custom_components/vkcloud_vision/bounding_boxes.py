@@ -16,6 +16,17 @@ from propcache.api import cached_property
 
 from .const import LOGGER, BoundingBoxesType
 
+DEFAULT_COLOR = (255, 255, 0)
+
+
+def get_image_size(image_data: bytes) -> tuple[int, int]:
+    """Return (width, height) of an encoded image without decoding pixel data."""
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            return image.size
+    except UnidentifiedImageError as err:
+        raise HomeAssistantError("Unable to process image: bad data") from err
+
 
 class BoundingBoxes:
     """Helper class for image processing tasks."""
@@ -25,6 +36,7 @@ class BoundingBoxes:
         self.image_data = image_data
         self.labels = labels
         self.mode = mode
+        self._layers: list[tuple[list[dict[str, Any]], BoundingBoxesType, tuple[int, int, int]]] = []
 
     @cached_property
     def _font(self) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
@@ -35,6 +47,10 @@ class BoundingBoxes:
             LOGGER.warning("Failed to load custom font: %s. Using default font.", err)
             return ImageFont.load_default()
 
+    def add_layer(self, labels: list[dict[str, Any]], mode: BoundingBoxesType, color: tuple[int, int, int]) -> None:
+        """Draw another set of labels (e.g. faces over objects) in its own color."""
+        self._layers.append((labels, mode, color))
+
     def save_image(self, output_path: str) -> str:
         """Draw bounding boxes with labels and save image."""
         try:
@@ -42,36 +58,62 @@ class BoundingBoxes:
         except UnidentifiedImageError as err:
             raise HomeAssistantError("Unable to process image: bad data") from err
 
+        self._draw(image)
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        image.save(output_path)
+        LOGGER.debug("Image saved: %s", output_path)
+
+        return output_path
+
+    def to_jpeg(self, max_width: int, quality: int = 75) -> bytes:
+        """Draw bounding boxes with labels on a copy at most `max_width` wide and encode it as JPEG."""
+        try:
+            image = Image.open(io.BytesIO(self.image_data))
+            width, height = image.size
+            scale = min(max_width / width, 1.0)
+            size = (max(round(width * scale), 1), max(round(height * scale), 1))
+            # JPEG frames are decoded at a reduced scale right away, the rest is resized after decoding
+            image.draft("RGB", size)
+            image = image.convert("RGB")
+        except UnidentifiedImageError as err:
+            raise HomeAssistantError("Unable to process image: bad data") from err
+        if image.size != size:
+            image = image.resize(size, Image.Resampling.BILINEAR)
+
+        self._draw(image, scale)
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality)
+        return output.getvalue()
+
+    def _draw(self, image: Image.Image, scale: float = 1.0) -> None:
         draw = Draw(image)
 
-        if self.mode != BoundingBoxesType.NONE:
-            for label in self.labels:
+        for labels, mode, color in [(self.labels, self.mode, DEFAULT_COLOR), *self._layers]:
+            if mode == BoundingBoxesType.NONE:
+                continue
+            for label in labels:
                 coord = label.get("coord")
                 if not coord:
                     continue
 
                 text = None
                 score = 0.0
-                if self.mode == BoundingBoxesType.RUS:
+                if mode == BoundingBoxesType.RUS:
                     text = label.get("rus")
                     score = label.get("prob", 0.0)
-                elif self.mode == BoundingBoxesType.ENG:
+                elif mode == BoundingBoxesType.ENG:
                     text = label.get("eng")
                     score = label.get("prob", 0.0)
-                elif self.mode == BoundingBoxesType.TAG:
+                elif mode == BoundingBoxesType.TAG:
                     text = label.get("tag")
                     score = label.get("similarity", 0.0)
-                elif self.mode == BoundingBoxesType.ALIAS:
+                elif mode == BoundingBoxesType.ALIAS:
                     text = label.get("alias", label.get("tag"))
                     score = label.get("similarity", 0.0)
 
-                self._draw_box(draw, tuple(coord), text, score)
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        image.save(output_path)
-        LOGGER.debug("Image saved: %s", output_path)
-
-        return output_path
+                self._draw_box(draw, tuple(value * scale for value in coord), text, score, color)
 
     def _draw_box(
         self,
@@ -79,7 +121,7 @@ class BoundingBoxes:
         coord: tuple[int, int, int, int],
         text_label: Optional[str] = None,
         probability: float = 0,
-        color: tuple[int, int, int] = (255, 255, 0),
+        color: tuple[int, int, int] = DEFAULT_COLOR,
     ) -> None:
         """Draw a bounding box on an image using direct coordinates.
 
@@ -0,0 +1,66 @@
+"""Cascade rules: run expensive detectors only when a cheap one finds something."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .const import (CASCADE_FACES, CONF_CAMERA, CONF_CASCADE_RULES,
+                    CONF_LABELS, CONF_MIN_PROB, CONF_MODES, CONF_SPACE,
+                    DEFAULT_PROB_THRESHOLD, DEFAULT_SPACE)
+
+
+@dataclass(frozen=True)
+class CascadeRule:
+    """Run `modes` (and/or face recognition in `space`) when any of `labels` is detected."""
+
+    labels: frozenset[str]
+    modes: tuple[str, ...]
+    min_prob: float = DEFAULT_PROB_THRESHOLD
+    space: int = DEFAULT_SPACE
+
+    def matches(self, labels: list[dict[str, Any]]) -> bool:
+        return any(
+            label.get("prob", 0) >= self.min_prob
+            and (str(label.get("eng", "")).lower() in self.labels or str(label.get("rus", "")).lower() in self.labels)
+            for label in labels
+        )
+
+
+def parse_labels(labels: str) -> frozenset[str]:
+    """Parse a comma-separated list of label names (English or Russian)."""
+    return frozenset(label.strip().lower() for label in labels.split(",") if label.strip())
+
+
+def get_camera_cascade_rules(options: Mapping[str, Any], camera_id: str) -> list[CascadeRule]:
+    """Return cascade rules that apply to a camera (rules without a camera apply to all cameras)."""
+    return [
+        CascadeRule(
+            labels=parse_labels(rule[CONF_LABELS]),
+            modes=tuple(rule.get(CONF_MODES, [])),
+            min_prob=float(rule.get(CONF_MIN_PROB, DEFAULT_PROB_THRESHOLD)),
+            space=int(rule.get(CONF_SPACE, DEFAULT_SPACE)),
+        )
+        for rule in options.get(CONF_CASCADE_RULES, [])
+        if not rule.get(CONF_CAMERA) or rule.get(CONF_CAMERA) == camera_id
+    ]
+
+
+def plan_follow_ups(
+    rules: list[CascadeRule], labels: list[dict[str, Any]], done_modes: list[str]
+) -> tuple[list[str], list[int]]:
+    """Return detection modes and face spaces triggered by the labels of the first stage."""
+    modes: dict[str, None] = {}
+    spaces: dict[int, None] = {}
+    for rule in rules:
+        if not rule.matches(labels):
+            continue
+        for mode in rule.modes:
+            if mode == CASCADE_FACES:
+                spaces[rule.space] = None
+            elif mode not in done_modes:
+                modes[mode] = None
+    return list(modes), list(spaces)
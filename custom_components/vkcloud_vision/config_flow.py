@@ -16,22 +16,34 @@ from homeassistant.helpers.selector import (FileSelector, FileSelectorConfig,
                                             NumberSelectorMode, ObjectSelector,
                                             ObjectSelectorConfig, TextSelector)
 
+from .aliases import PersonAliasRegistry
 from .api.vkcloud.auth import VKCloudAuth
 from .api.vkcloud.vision import VKCloudVision
-from .const import (CONF_ALIAS, CONF_CLIENT_ID, CONF_CLIENT_SECRET,
-                    CONF_CONFIRM_DELETE, CONF_CONFIRM_TRUNCATE,
-                    CONF_CREATE_NEW, CONF_DELETE_PERSON_SPACE,
+from .cascade import parse_labels
+from .const import (CASCADE_FACES, CONF_ALIAS, CONF_CAMERA, CONF_CASCADE_RULES,
+                    CONF_CLIENT_ID, CONF_CLIENT_SECRET, CONF_CONFIRM_DELETE,
+                    CONF_CONFIRM_TRUNCATE, CONF_CREATE_NEW,
+                    CONF_DELETE_PERSON_SPACE, CONF_HISTORY_DAYS, CONF_INTERVAL,
+                    CONF_LABELS, CONF_MIN_PROB, CONF_MODES, CONF_MONITORING,
+                    CONF_MOTION_SENSORS, CONF_MOTION_THRESHOLD, CONF_NAME,
                     CONF_PERSON_ALIASES, CONF_PERSON_IDS, CONF_PHOTO,
-                    CONF_REFRESH_TOKEN, CONF_SPACE, CONF_TRUNCATE_SPACE,
-                    CONF_UPDATE_EMBEDDING, DEFAULT_CREATE_NEW, DEFAULT_SPACE,
-                    DEFAULT_UPDATE_EMBEDDING, DOMAIN, LOGGER,
-                    SECTION_PERSON_ALIASES, SECTION_TRAINING_MODE)
+                    CONF_PLATE, CONF_PLATE_LIST, CONF_PLATE_MAX_DISTANCE,
+                    CONF_PLATES, CONF_POINTS, CONF_REFRESH_TOKEN,
+                    CONF_REGIONS_OF_INTEREST, CONF_SPACE, CONF_TRUNCATE_SPACE,
+                    CONF_UPDATE_EMBEDDING, CONF_ZONES, DEFAULT_CREATE_NEW,
+                    DEFAULT_HISTORY_DAYS, DEFAULT_PLATE_MAX_DISTANCE,
+                    DEFAULT_SPACE, DEFAULT_UPDATE_EMBEDDING, DOMAIN, LOGGER,
+                    PLATE_LISTS, SECTION_PERSON_ALIASES, SECTION_TRAINING_MODE,
+                    VALID_MODES)
+from .plates import normalize_plate
+from .roi import parse_polygon
+from .training import async_forget_space
 
 
 class VKCloudVisionConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for VK Cloud Vision."""
 
-    VERSION = 4
+    VERSION = 5
 
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Handle the initial step (OAuth only for new users)."""
@@ -146,20 +158,33 @@ class VKCloudVisionOptionsFlow(OptionsFlow):
         """Show the main menu."""
         return self.async_show_menu(
             step_id="init",
-            menu_options=["face_recognition", "manual_training", "truncate_space", "delete_persons"],
+            menu_options=[
+                "face_recognition",
+                "manual_training",
+                "truncate_space",
+                "delete_persons",
+                "regions_of_interest",
+                "zones",
+                "cascade_rules",
+                "monitoring",
+                "plates",
+                "history",
+            ],
         )
 
     async def async_step_face_recognition(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Manage face recognition options (training mode and aliases)."""
+        aliases: PersonAliasRegistry = self.config_entry.runtime_data.aliases
+
         if user_input is not None:
             new_opts = dict(self.config_entry.options)
             new_opts.update(user_input.get(SECTION_TRAINING_MODE, {}))
-            new_opts.update(user_input.get(SECTION_PERSON_ALIASES, {}))
+            aliases.async_replace(user_input.get(SECTION_PERSON_ALIASES, {}).get(CONF_PERSON_ALIASES, []))
             return self.async_create_entry(data=new_opts)
 
         create_new_default = self.config_entry.options.get(CONF_CREATE_NEW, DEFAULT_CREATE_NEW)
         update_embedding_default = self.config_entry.options.get(CONF_UPDATE_EMBEDDING, DEFAULT_UPDATE_EMBEDDING)
-        existing_aliases = self.config_entry.options.get(CONF_PERSON_ALIASES, [])
+        existing_aliases = aliases.as_list()
 
         training_schema = vol.Schema({
             vol.Required(CONF_CREATE_NEW, default=create_new_default): bool,
@@ -208,6 +233,328 @@ class VKCloudVisionOptionsFlow(OptionsFlow):
             data_schema=schema,
         )
 
+    async def async_step_regions_of_interest(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage per-camera regions of interest."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            regions = user_input.get(CONF_REGIONS_OF_INTEREST, [])
+            try:
+                for region in regions:
+                    parse_polygon(region[CONF_POINTS])
+            except (KeyError, ValueError) as err:
+                errors["base"] = "invalid_points"
+                LOGGER.debug("Invalid region of interest: %s", err)
+            else:
+                new_opts = dict(self.config_entry.options)
+                new_opts[CONF_REGIONS_OF_INTEREST] = regions
+                return self.async_create_entry(data=new_opts)
+
+        existing_regions = (
+            user_input.get(CONF_REGIONS_OF_INTEREST, [])
+            if user_input
+            else self.config_entry.options.get(CONF_REGIONS_OF_INTEREST, [])
+        )
+
+        data_schema = vol.Schema({
+            vol.Optional(CONF_REGIONS_OF_INTEREST, default=existing_regions): ObjectSelector(
+                ObjectSelectorConfig(
+                    fields={
+                        CONF_CAMERA: {
+                            "required": True,
+                            "selector": {"entity": {"domain": "camera"}},
+                        },
+                        CONF_POINTS: {
+                            "required": True,
+                            "selector": {"text": None},
+                        },
+                    },
+                    multiple=True,
+                    translation_key="regions_of_interest",
+                )
+            )
+        })
+
+        return self.async_show_form(
+            step_id="regions_of_interest",
+            data_schema=data_schema,
+            errors=errors,
+        )
+
+    async def async_step_zones(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage per-camera named zones."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            zones = user_input.get(CONF_ZONES, [])
+            try:
+                for zone in zones:
+                    parse_polygon(zone[CONF_POINTS])
+            except (KeyError, ValueError) as err:
+                errors["base"] = "invalid_points"
+                LOGGER.debug("Invalid zone: %s", err)
+            else:
+                if len({(zone[CONF_CAMERA], zone[CONF_NAME]) for zone in zones}) != len(zones):
+                    errors["base"] = "duplicate_zone"
+                else:
+                    new_opts = dict(self.config_entry.options)
+                    new_opts[CONF_ZONES] = zones
+                    return self.async_create_entry(data=new_opts)
+
+        existing_zones = (
+            user_input.get(CONF_ZONES, [])
+            if user_input
+            else self.config_entry.options.get(CONF_ZONES, [])
+        )
+
+        data_schema = vol.Schema({
+            vol.Optional(CONF_ZONES, default=existing_zones): ObjectSelector(
+                ObjectSelectorConfig(
+                    fields={
+                        CONF_CAMERA: {
+                            "required": True,
+                            "selector": {"entity": {"domain": "camera"}},
+                        },
+                        CONF_NAME: {
+                            "required": True,
+                            "selector": {"text": None},
+                        },
+                        CONF_POINTS: {
+                            "required": True,
+                            "selector": {"text": None},
+                        },
+                    },
+                    multiple=True,
+                    translation_key="zones",
+                )
+            )
+        })
+
+        return self.async_show_form(
+            step_id="zones",
+            data_schema=data_schema,
+            errors=errors,
+        )
+
+    async def async_step_cascade_rules(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage cascade rules for `vkcloud_vision.detect_objects`."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            rules = user_input.get(CONF_CASCADE_RULES, [])
+            if any(not parse_labels(rule.get(CONF_LABELS, "")) or not rule.get(CONF_MODES) for rule in rules):
+                errors["base"] = "invalid_cascade_rule"
+            else:
+                new_opts = dict(self.config_entry.options)
+                new_opts[CONF_CASCADE_RULES] = rules
+                return self.async_create_entry(data=new_opts)
+
+        existing_rules = (
+            user_input.get(CONF_CASCADE_RULES, [])
+            if user_input
+            else self.config_entry.options.get(CONF_CASCADE_RULES, [])
+        )
+
+        data_schema = vol.Schema({
+            vol.Optional(CONF_CASCADE_RULES, default=existing_rules): ObjectSelector(
+                ObjectSelectorConfig(
+                    fields={
+                        CONF_CAMERA: {
+                            "required": False,
+                            "selector": {"entity": {"domain": "camera"}},
+                        },
+                        CONF_LABELS: {
+                            "required": True,
+                            "selector": {"text": None},
+                        },
+                        CONF_MIN_PROB: {
+                            "required": False,
+                            "selector": {"number": {"min": 0.01, "max": 1.0, "step": 0.01, "mode": "box"}},
+                        },
+                        CONF_MODES: {
+                            "required": True,
+                            "selector": {
+                                "select": {
+                                    "options": [*VALID_MODES, CASCADE_FACES],
+                                    "multiple": True,
+                                    "translation_key": "cascade_modes",
+                                }
+                            },
+                        },
+                        CONF_SPACE: {
+                            "required": False,
+                            "selector": {"number": {"min": 0, "max": 9, "mode": "box"}},
+                        },
+                    },
+                    multiple=True,
+                    translation_key="cascade_rules",
+                )
+            )
+        })
+
+        return self.async_show_form(
+            step_id="cascade_rules",
+            data_schema=data_schema,
+            errors=errors,
+        )
+
+    async def async_step_monitoring(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage background monitoring of cameras."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            monitors = user_input.get(CONF_MONITORING, [])
+            cameras = [monitor.get(CONF_CAMERA) for monitor in monitors]
+            if len(cameras) != len(set(cameras)):
+                errors["base"] = "duplicate_camera"
+            else:
+                new_opts = dict(self.config_entry.options)
+                new_opts[CONF_MONITORING] = monitors
+                return self.async_create_entry(data=new_opts)
+
+        existing_monitors = (
+            user_input.get(CONF_MONITORING, [])
+            if user_input
+            else self.config_entry.options.get(CONF_MONITORING, [])
+        )
+
+        data_schema = vol.Schema({
+            vol.Optional(CONF_MONITORING, default=existing_monitors): ObjectSelector(
+                ObjectSelectorConfig(
+                    fields={
+                        CONF_CAMERA: {
+                            "required": True,
+                            "selector": {"entity": {"domain": "camera"}},
+                        },
+                        CONF_INTERVAL: {
+                            "required": False,
+                            "selector": {
+                                "number": {"min": 10, "max": 3600, "unit_of_measurement": "s", "mode": "box"}
+                            },
+                        },
+                        CONF_MODES: {
+                            "required": False,
+                            "selector": {
+                                "select": {
+                                    "options": VALID_MODES,
+                                    "multiple": True,
+                                    "translation_key": "modes",
+                                }
+                            },
+                        },
+                        CONF_MIN_PROB: {
+                            "required": False,
+                            "selector": {"number": {"min": 0.01, "max": 1.0, "step": 0.01, "mode": "box"}},
+                        },
+                        CONF_MOTION_SENSORS: {
+                            "required": False,
+                            "selector": {"entity": {"domain": "binary_sensor", "multiple": True}},
+                        },
+                        CONF_MOTION_THRESHOLD: {
+                            "required": False,
+                            "selector": {
+                                "number": {"min": 0, "max": 100, "step": 0.1, "unit_of_measurement": "%", "mode": "box"}
+                            },
+                        },
+                    },
+                    multiple=True,
+                    translation_key="monitoring",
+                )
+            )
+        })
+
+        return self.async_show_form(
+            step_id="monitoring",
+            data_schema=data_schema,
+            errors=errors,
+        )
+
+    async def async_step_plates(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage the allow and deny lists of licence plates."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            plates = user_input.get(CONF_PLATES, [])
+            if any(not normalize_plate(plate.get(CONF_PLATE, "")) for plate in plates):
+                errors["base"] = "invalid_plate"
+            else:
+                new_opts = dict(self.config_entry.options)
+                new_opts.update(user_input)
+                return self.async_create_entry(data=new_opts)
+
+        existing_plates = (
+            user_input.get(CONF_PLATES, [])
+            if user_input
+            else self.config_entry.options.get(CONF_PLATES, [])
+        )
+
+        data_schema = vol.Schema({
+            vol.Optional(CONF_PLATES, default=existing_plates): ObjectSelector(
+                ObjectSelectorConfig(
+                    fields={
+                        CONF_PLATE: {
+                            "required": True,
+                            "selector": {"text": None},
+                        },
+                        CONF_NAME: {
+                            "required": False,
+                            "selector": {"text": None},
+                        },
+                        CONF_PLATE_LIST: {
+                            "required": False,
+                            "selector": {
+                                "select": {
+                                    "options": PLATE_LISTS,
+                                    "translation_key": "plate_lists",
+                                }
+                            },
+                        },
+                    },
+                    multiple=True,
+                    translation_key="plates",
+                )
+            ),
+            vol.Required(
+                CONF_PLATE_MAX_DISTANCE,
+                default=self.config_entry.options.get(CONF_PLATE_MAX_DISTANCE, DEFAULT_PLATE_MAX_DISTANCE),
+            ): vol.All(
+                NumberSelector(
+                    NumberSelectorConfig(min=0, max=3, mode=NumberSelectorMode.BOX),
+                ),
+                vol.Coerce(int),
+            ),
+        })
+
+        return self.async_show_form(
+            step_id="plates",
+            data_schema=data_schema,
+            errors=errors,
+        )
+
+    async def async_step_history(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage detection history retention."""
+        if user_input is not None:
+            new_opts = dict(self.config_entry.options)
+            new_opts.update(user_input)
+            return self.async_create_entry(data=new_opts)
+
+        data_schema = vol.Schema({
+            vol.Required(
+                CONF_HISTORY_DAYS,
+                default=self.config_entry.options.get(CONF_HISTORY_DAYS, DEFAULT_HISTORY_DAYS),
+            ): vol.All(
+                NumberSelector(
+                    NumberSelectorConfig(min=0, max=365, unit_of_measurement="d", mode=NumberSelectorMode.BOX),
+                ),
+                vol.Coerce(int),
+            ),
+        })
+
+        return self.async_show_form(
+            step_id="history",
+            data_schema=data_schema,
+        )
+
     async def async_step_truncate_space(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Truncate a person space."""
         errors: dict[str, str] = {}
@@ -219,13 +566,15 @@ class VKCloudVisionOptionsFlow(OptionsFlow):
             if not confirm:
                 errors["base"] = "confirm_truncate"
             else:
-                client: VKCloudVision = self.config_entry.runtime_data
+                client: VKCloudVision = self.config_entry.runtime_data.client
                 try:
                     await client.persons.truncate(space)
                 except Exception as err:
                     errors["base"] = "truncate_failed"
                     LOGGER.error("Truncate space %s failed: %s", space, err)
                 else:
+                    self.config_entry.runtime_data.aliases.async_truncate(space)
+                    await async_forget_space(self.hass, space)
                     return self.async_abort(reason="truncate_success")
 
         space_default = user_input.get(CONF_TRUNCATE_SPACE, DEFAULT_SPACE) if user_input else DEFAULT_SPACE
@@ -265,13 +614,14 @@ class VKCloudVisionOptionsFlow(OptionsFlow):
                     except ValueError:
                         errors["base"] = "invalid_person_ids"
                 if not errors:
-                    client: VKCloudVision = self.config_entry.runtime_data
+                    client: VKCloudVision = self.config_entry.runtime_data.client
                     try:
                         await client.persons.delete(space, person_ids)
                     except Exception as err:
                         errors["base"] = "delete_failed"
                         LOGGER.error("Delete persons from space %s failed: %s", space, err)
                     else:
+                        self.config_entry.runtime_data.aliases.async_remove(space, person_ids)
                         return self.async_abort(reason="delete_success")
 
         space_default = user_input.get(CONF_DELETE_PERSON_SPACE, DEFAULT_SPACE) if user_input else DEFAULT_SPACE
@@ -331,7 +681,7 @@ class VKCloudVisionOptionsFlow(OptionsFlow):
             alias = user_input.get(CONF_ALIAS, "").strip()
             photo_bytes = await self.hass.async_add_executor_job(self._read_uploaded_photo, file_id)
 
-            client: VKCloudVision = self.config_entry.runtime_data
+            client: VKCloudVision = self.config_entry.runtime_data.client
             response = await client.persons.recognize(
                 files=[photo_bytes],
                 space=space,
@@ -354,11 +704,10 @@ class VKCloudVisionOptionsFlow(OptionsFlow):
                 )
 
             person_ids = [int(t.replace("person", "")) for t in person_tags]
-            aliases = self._update_aliases(person_ids, space, alias)
-
-            new_opts = dict(self.config_entry.options)
-            new_opts[CONF_PERSON_ALIASES] = aliases
-            self.hass.config_entries.async_update_entry(self.config_entry, options=new_opts)
+            aliases: PersonAliasRegistry = self.config_entry.runtime_data.aliases
+            if alias:
+                aliases.async_set(space, person_ids[0], alias)
+            aliases.async_add_persons(space, person_ids)
 
             tags_str = ", ".join(person_tags)
             return self.async_abort(
@@ -374,24 +723,3 @@ class VKCloudVisionOptionsFlow(OptionsFlow):
                 data_schema=self._build_manual_training_schema(),
                 errors=errors,
             )
-
-    def _update_aliases(self, person_ids: list[int], space: int, alias: str) -> list[dict[str, Any]]:
-        aliases: list[dict[str, Any]] = list(self.config_entry.options.get(CONF_PERSON_ALIASES, []))
-        first_pid = person_ids[0]
-
-        if alias:
-            found = False
-            for entry in aliases:
-                if entry.get("person_id") == first_pid and entry.get("space") == space:
-                    entry["alias"] = alias
-                    found = True
-                    break
-
-            if not found:
-                aliases.append({"person_id": first_pid, "space": space, "alias": alias})
-
-        for pid in person_ids:
-            if not any(a["person_id"] == pid and a["space"] == space for a in aliases):
-                aliases.append({"person_id": pid, "space": space, "alias": f"person{pid}"})
-
-        return aliases
@@ -5,6 +5,7 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 import logging
+from datetime import timedelta
 from enum import StrEnum
 
 DOMAIN = "vkcloud_vision"
@@ -30,6 +31,41 @@ ATTR_SPACE = "space"
 ATTR_CREATE_NEW = "create_new"
 ATTR_UPDATE_EMBEDDING = "update_embedding"
 ATTR_CONFIDENCE_THRESHOLD = "confidence_threshold"
+ATTR_MERGE_OVERLAPS = "merge_overlaps"
+ATTR_MERGE_IOU_THRESHOLD = "merge_iou_threshold"
+ATTR_TRACK_OBJECTS = "track_objects"
+ATTR_TILED = "tiled"
+ATTR_TILE_SIZE = "tile_size"
+ATTR_TILE_OVERLAP = "tile_overlap"
+ATTR_MAX_TILES = "max_tiles"
+ATTR_TILE_FULL_FRAME = "tile_full_frame"
+ATTR_CASCADE = "cascade"
+ATTR_SPLIT_MODES = "split_modes"
+ATTR_CROP_PERSONS = "crop_persons"
+ATTR_PERSON_BOXES = "person_boxes"
+ATTR_PATH = "path"
+ATTR_ANALYSES = "analyses"
+ATTR_MOTION_FILTER = "motion_filter"
+ATTR_MOTION_THRESHOLD = "motion_threshold"
+ATTR_MOTION_CROP = "motion_crop"
+ATTR_BEST_FRAMES = "best_frames"
+ATTR_MIN_SHARPNESS = "min_sharpness"
+ATTR_STREAM_UPLOAD = "stream_upload"
+ATTR_QUEUE_OFFLINE = "queue_offline"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_LABELS = "labels"
+ATTR_MIN_PROB = "min_prob"
+ATTR_GROUP_BY = "group_by"
+ATTR_LABELS_INCLUDE = "labels_include"
+ATTR_LABELS_EXCLUDE = "labels_exclude"
+ATTR_RESPONSE_FORMAT = "response_format"
+ATTR_DETECTION_EVENTS = "detection_events"
+ATTR_EVENT_ON_DELAY = "event_on_delay"
+ATTR_EVENT_OFF_DELAY = "event_off_delay"
+ATTR_SUMMARY_EVENT = "summary_event"
+ATTR_CAMERA_IDS = "camera_ids"
+ATTR_FRAME_WIDTH = "frame_width"
 
 VALID_MODES = [
     "object",
@@ -41,18 +77,55 @@ VALID_MODES = [
     "selfie",
 ]
 
+# Pseudo-mode for cascade rules: run face recognition via `persons/recognize`
+CASCADE_FACES = "faces"
+
+ANALYSIS_OBJECTS = "objects"
+ANALYSIS_TEXT = "text"
+ANALYSIS_FACES = "faces"
+VALID_ANALYSES = [ANALYSIS_OBJECTS, ANALYSIS_TEXT, ANALYSIS_FACES]
+
+PLATE_LIST_ALLOW = "allow"
+PLATE_LIST_DENY = "deny"
+PLATE_LISTS = [PLATE_LIST_ALLOW, PLATE_LIST_DENY]
 
 DEFAULT_MODES = ["multiobject"]
+DEFAULT_MONITOR_INTERVAL = 60
 DEFAULT_PROB_THRESHOLD = 0.1
 DEFAULT_CONFIDENCE_THRESHOLD = 0.1
 DEFAULT_OBJECT_BOUNDING_BOXES = "rus"
 DEFAULT_FACE_BOUNDING_BOXES = "alias"
 DEFAULT_NUM_SNAPSHOTS = 1
 DEFAULT_SNAPSHOT_INTERVAL_SEC = .5
+MAX_SNAPSHOT_INTERVAL_SEC = 10
 DEFAULT_MAX_RETRIES = 3
 DEFAULT_SPACE = 0
 DEFAULT_CREATE_NEW = False
 DEFAULT_UPDATE_EMBEDDING = True
+DEFAULT_MERGE_OVERLAPS = False
+DEFAULT_MERGE_IOU_THRESHOLD = 0.5
+DEFAULT_TRACK_OBJECTS = False
+DEFAULT_TILED = False
+DEFAULT_TILE_SIZE = 1024
+DEFAULT_TILE_OVERLAP = 128
+DEFAULT_MAX_TILES = 6
+DEFAULT_TILE_FULL_FRAME = False
+DEFAULT_CASCADE = False
+DEFAULT_SPLIT_MODES = False
+DEFAULT_CROP_PERSONS = False
+DEFAULT_MOTION_FILTER = False
+DEFAULT_MOTION_THRESHOLD = 1.0
+DEFAULT_MOTION_CROP = False
+DEFAULT_STREAM_UPLOAD = False
+DEFAULT_QUEUE_OFFLINE = False
+DEFAULT_RESPONSE_FORMAT = "full"
+DEFAULT_DETECTION_EVENTS = False
+DEFAULT_EVENT_ON_DELAY = 0.0
+DEFAULT_EVENT_OFF_DELAY = 30.0
+DEFAULT_SUMMARY_EVENT = False
+DEFAULT_HISTORY_DAYS = 30
+DEFAULT_PLATE_MAX_DISTANCE = 1
+DEFAULT_HISTORY_PERIOD = timedelta(days=1)
 
 CONF_CREATE_NEW = "create_new"
 CONF_UPDATE_EMBEDDING = "update_embedding"
@@ -65,12 +138,47 @@ CONF_CONFIRM_DELETE = "confirm_delete"
 CONF_PHOTO = "photo"
 CONF_SPACE = "space"
 CONF_ALIAS = "alias"
+CONF_REGIONS_OF_INTEREST = "regions_of_interest"
+CONF_CAMERA = "camera"
+CONF_POINTS = "points"
+CONF_NAME = "name"
+CONF_ZONES = "zones"
+CONF_CASCADE_RULES = "cascade_rules"
+CONF_LABELS = "labels"
+CONF_MIN_PROB = "min_prob"
+CONF_MODES = "modes"
+CONF_MONITORING = "monitoring"
+CONF_INTERVAL = "interval"
+CONF_MOTION_SENSORS = "motion_sensors"
+CONF_MOTION_THRESHOLD = "motion_threshold"
+CONF_HISTORY_DAYS = "history_days"
+CONF_PLATES = "plates"
+CONF_PLATE = "plate"
+CONF_PLATE_LIST = "list"
+CONF_PLATE_MAX_DISTANCE = "plate_max_distance"
 SECTION_TRAINING_MODE = "section_training_mode"
 SECTION_PERSON_ALIASES = "section_person_aliases"
 
 SERVICE_DETECT_OBJECTS = "detect_objects"
 SERVICE_RECOGNIZE_TEXT = "recognize_text"
 SERVICE_RECOGNIZE_FACES = "recognize_faces"
+SERVICE_TRAIN_PERSONS = "train_persons"
+SERVICE_ANALYZE = "analyze"
+SERVICE_QUERY_HISTORY = "query_history"
+
+EVENT_TRACK = f"{DOMAIN}_track"
+EVENT_ZONE_OCCUPANCY = f"{DOMAIN}_zone_occupancy"
+EVENT_MODE_RESULT = f"{DOMAIN}_mode_result"
+EVENT_TRAINING_PROGRESS = f"{DOMAIN}_training_progress"
+EVENT_MONITOR = f"{DOMAIN}_monitor"
+EVENT_QUEUED_RESULT = f"{DOMAIN}_queued_result"
+EVENT_KNOWN_PLATE = f"{DOMAIN}_known_plate"
+EVENT_DETECTION = f"{DOMAIN}_detection"
+EVENT_DETECTION_SUMMARY = f"{DOMAIN}_detection_summary"
+
+SIGNAL_ZONE_OCCUPANCY = f"{DOMAIN}_zone_occupancy"
+SIGNAL_ENTRIES_UPDATED = f"{DOMAIN}_entries_updated"
+SIGNAL_LIVE_RESULT = f"{DOMAIN}_live_result"
 
 
 class BoundingBoxesType(StrEnum):
@@ -83,6 +191,13 @@ class BoundingBoxesType(StrEnum):
     ALIAS = "alias"
 
 
+class ResponseFormat(StrEnum):
+    """Projections of `vkcloud_vision.detect_objects` responses."""
+    FULL = "full"
+    COMPACT = "compact"
+    COUNTS = "counts"
+
+
 class ResponseType(StrEnum):
     """Response types for VK Cloud Vision services."""
     ACTION_DONE = "action_done"
@@ -0,0 +1,34 @@
+"""Runtime data of VK Cloud Vision config entries."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from dataclasses import dataclass, field
+
+from homeassistant.config_entries import ConfigEntry
+
+from .aliases import PersonAliasRegistry
+from .api.vkcloud.vision import VKCloudVision
+from .history import VKCloudVisionHistory
+from .monitoring import VKCloudVisionMonitorCoordinator
+from .offline import VKCloudVisionOfflineQueue
+from .plates import PlateIndex
+
+
+@dataclass
+class VKCloudVisionData:
+    """Objects shared by the integration platforms."""
+
+    client: VKCloudVision
+    aliases: PersonAliasRegistry
+    queue: VKCloudVisionOfflineQueue
+    # None if the detection history is disabled
+    history: VKCloudVisionHistory | None = None
+    plates: PlateIndex = field(default_factory=PlateIndex)
+    monitors: dict[str, VKCloudVisionMonitorCoordinator] = field(default_factory=dict)
+    # (camera, zone name) of configured zones
+    zones: set[tuple[str, str]] = field(default_factory=set)
+
+
+VKCloudVisionConfigEntry = ConfigEntry[VKCloudVisionData]
@@ -0,0 +1,97 @@
+"""Debounced per-label detection events for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+MAX_EVENT_CAMERAS = 32
+MAX_LABELS_PER_CAMERA = 64
+
+EVENT_APPEARED = "appeared"
+EVENT_CLEARED = "cleared"
+
+
+@dataclass
+class _LabelState:
+    # Start of the current run of sightings
+    first_seen: datetime
+    last_seen: datetime
+    count: int
+    max_prob: float
+    present: bool = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "max_prob": round(self.max_prob, 3),
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+        }
+
+
+class DetectionEventEngine:
+    """Turn per-call labels into debounced `appeared`/`cleared` transitions, keyed by camera.
+
+    A label appears once it has been seen for `on_delay` without a gap longer
+    than `off_delay`, and clears once it hasn't been seen for `off_delay`.
+    Absence is only noticed on calls for the same camera.
+    """
+
+    def __init__(self) -> None:
+        self._cameras: OrderedDict[str, dict[str, _LabelState]] = OrderedDict()
+
+    def update(
+        self,
+        camera_id: str,
+        labels: list[dict[str, Any]],
+        now: datetime,
+        on_delay: timedelta,
+        off_delay: timedelta,
+    ) -> tuple[list[dict[str, Any]], list[str]]:
+        """Update label states of a camera, return transitions and labels present after the call."""
+        states = self._cameras.pop(camera_id, None) or {}
+        self._cameras[camera_id] = states
+        while len(self._cameras) > MAX_EVENT_CAMERAS:
+            self._cameras.popitem(last=False)
+
+        seen: dict[str, tuple[int, float]] = {}
+        for label in labels:
+            name = str(label.get("eng") or "unknown")
+            count, max_prob = seen.get(name, (0, 0.0))
+            seen[name] = (count + 1, max(max_prob, float(label.get("prob", 0))))
+
+        transitions = []
+        for name, (count, max_prob) in seen.items():
+            state = states.get(name)
+            if state is None or (not state.present and now - state.last_seen > off_delay):
+                state = states[name] = _LabelState(now, now, count, max_prob)
+            state.last_seen = now
+            state.count = count
+            state.max_prob = max_prob
+            if not state.present and now - state.first_seen >= on_delay:
+                state.present = True
+                transitions.append({"type": EVENT_APPEARED, "label": name, **state.as_dict()})
+
+        for name, state in list(states.items()):
+            if name in seen or now - state.last_seen < off_delay:
+                continue
+            del states[name]
+            if state.present:
+                transitions.append({"type": EVENT_CLEARED, "label": name, **state.as_dict()})
+
+        # Keep per-camera state bounded: forget pending labels first, then the ones seen least recently
+        if len(states) > MAX_LABELS_PER_CAMERA:
+            stale = sorted(states, key=lambda name: (states[name].present, states[name].last_seen))
+            for name in stale[:len(states) - MAX_LABELS_PER_CAMERA]:
+                del states[name]
+
+        return transitions, sorted(name for name, state in states.items() if state.present)
+
+    def reset(self) -> None:
+        """Forget label states of all cameras."""
+        self._cameras.clear()
@@ -0,0 +1,263 @@
+"""Detection history store for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import sqlite3
+import threading
+from collections.abc import Callable, Mapping, Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import (async_call_later,
+                                         async_track_time_interval)
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER
+
+HISTORY_DB = f"{DOMAIN}.history.db"
+# Detections are written in batches: after this delay or once this many rows are pending
+COMMIT_DELAY = 5
+MAX_PENDING_ROWS = 1000
+PURGE_INTERVAL = timedelta(hours=1)
+
+GROUP_CAMERA = "camera"
+GROUP_LABEL = "label"
+GROUP_MODE = "mode"
+GROUP_HOUR = "hour"
+GROUP_DAY = "day"
+VALID_GROUPS = [GROUP_CAMERA, GROUP_LABEL, GROUP_MODE, GROUP_HOUR, GROUP_DAY]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    ts REAL NOT NULL,
+    call INTEGER NOT NULL,
+    camera TEXT NOT NULL,
+    label TEXT NOT NULL COLLATE NOCASE,
+    mode TEXT NOT NULL,
+    prob REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS detections_camera_label_ts ON detections (camera, label, ts);
+CREATE INDEX IF NOT EXISTS detections_ts ON detections (ts);
+"""
+
+# (ts, call, camera, label, mode, prob)
+DetectionRow = tuple[float, int, str, str, str, float]
+
+
+def detection_rows(
+    call_id: int, camera_id: str, timestamp: datetime, response: Mapping[str, Any]
+) -> list[DetectionRow]:
+    """Turn labels of the first image of every mode into history rows."""
+    ts = timestamp.timestamp()
+    rows = []
+    for mode, images in response.items():
+        if not images:
+            continue
+        for label in images[0].get("labels", []):
+            rows.append((ts, call_id, camera_id, label.get("eng") or "unknown", mode, float(label.get("prob", 0))))
+    return rows
+
+
+class VKCloudVisionHistory:
+    """Detection log in a SQLite database under `.storage`.
+
+    Detections are buffered and written in batches in the executor, rows
+    older than `retention` are purged hourly. The connection is shared by
+    executor threads and serialized with a lock.
+    """
+
+    def __init__(self, hass: HomeAssistant, retention: timedelta) -> None:
+        """Initialize the history store."""
+        self.hass = hass
+        self._retention = retention
+        self._path = hass.config.path(STORAGE_DIR, HISTORY_DB)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._pending: list[DetectionRow] = []
+        # Calls are told apart by id, several cameras may be recorded with the same timestamp
+        self._last_call_id = 0
+        self._unsub_commit: CALLBACK_TYPE | None = None
+
+    async def async_setup(self) -> None:
+        """Open the database and purge detections expired while Home Assistant was stopped."""
+        await self.hass.async_add_executor_job(self._open)
+        await self._async_purge()
+
+    def _open(self) -> None:
+        conn = sqlite3.connect(self._path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._last_call_id = conn.execute("SELECT COALESCE(MAX(call), 0) FROM detections").fetchone()[0]
+        self._conn = conn
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Start purging old detections, return a callback to stop it."""
+        return async_track_time_interval(self.hass, self._async_purge, PURGE_INTERVAL)
+
+    async def async_close(self) -> None:
+        """Write pending detections and close the database."""
+        await self.async_commit()
+        await self.hass.async_add_executor_job(self._close)
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @callback
+    def async_record(self, camera_id: str, timestamp: datetime, response: Mapping[str, Any]) -> None:
+        """Buffer labels of a detection response to be written with the next batch."""
+        rows = detection_rows(self._last_call_id + 1, camera_id, timestamp, response)
+        if not rows:
+            return
+        self._last_call_id += 1
+        self._pending.extend(rows)
+        if len(self._pending) >= MAX_PENDING_ROWS:
+            rows, self._pending = self._pending, []
+            self.hass.async_create_task(self._async_insert(rows))
+        elif self._unsub_commit is None:
+            self._unsub_commit = async_call_later(self.hass, COMMIT_DELAY, self._async_scheduled_commit)
+
+    async def _async_scheduled_commit(self, _now: datetime) -> None:
+        self._unsub_commit = None
+        await self.async_commit()
+
+    async def async_commit(self) -> None:
+        """Write pending detections."""
+        if self._unsub_commit is not None:
+            self._unsub_commit()
+            self._unsub_commit = None
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        await self._async_insert(rows)
+
+    async def _async_insert(self, rows: list[DetectionRow]) -> None:
+        try:
+            await self.hass.async_add_executor_job(self._insert, rows)
+        except sqlite3.Error as err:
+            LOGGER.error("Unable to write %d detections to history: %s", len(rows), err)
+
+    def _insert(self, rows: list[DetectionRow]) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO detections (ts, call, camera, label, mode, prob) VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+
+    async def _async_purge(self, _now: datetime | None = None) -> None:
+        cutoff = (dt_util.utcnow() - self._retention).timestamp()
+        try:
+            purged = await self.hass.async_add_executor_job(self._purge, cutoff)
+        except sqlite3.Error as err:
+            LOGGER.error("Unable to purge detection history: %s", err)
+            return
+        if purged:
+            LOGGER.debug("Purged %d detections older than %s", purged, self._retention)
+
+    def _purge(self, cutoff: float) -> int:
+        with self._lock:
+            if self._conn is None:
+                return 0
+            with self._conn:
+                return self._conn.execute("DELETE FROM detections WHERE ts < ?", (cutoff,)).rowcount
+
+    async def async_query(
+        self,
+        start: datetime,
+        end: datetime,
+        cameras: Sequence[str] | None = None,
+        labels: Sequence[str] | None = None,
+        modes: Sequence[str] | None = None,
+        min_prob: float | None = None,
+        group_by: Sequence[str] = (GROUP_CAMERA, GROUP_LABEL),
+    ) -> dict[str, Any]:
+        """Aggregate detections between `start` and `end`.
+
+        Every group has the number of detected objects (`count`), the number
+        of calls they were detected in (`calls`), the best probability and
+        the first and last detection time. Hours and days are local time.
+        """
+        await self.async_commit()
+        # Local buckets are aligned with the UTC offset at the start of the range
+        offset = (dt_util.as_local(start).utcoffset() or timedelta()).total_seconds()
+        try:
+            return await self.hass.async_add_executor_job(
+                self._query, start.timestamp(), end.timestamp(), cameras, labels, modes, min_prob, group_by, offset
+            )
+        except sqlite3.Error as err:
+            raise HomeAssistantError(f"Unable to query detection history: {err}") from err
+
+    def _query(
+        self,
+        start: float,
+        end: float,
+        cameras: Sequence[str] | None,
+        labels: Sequence[str] | None,
+        modes: Sequence[str] | None,
+        min_prob: float | None,
+        group_by: Sequence[str],
+        offset: float,
+    ) -> dict[str, Any]:
+        where = ["ts >= ?", "ts < ?"]
+        params: list[Any] = [start, end]
+        for column, values in ((GROUP_CAMERA, cameras), (GROUP_LABEL, labels), (GROUP_MODE, modes)):
+            if values:
+                where.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if min_prob is not None:
+            where.append("prob >= ?")
+            params.append(min_prob)
+
+        bucket_sizes = {GROUP_HOUR: 3600, GROUP_DAY: 86400}
+        columns = [
+            f"CAST((ts + {offset}) / {bucket_sizes[group]} AS INTEGER)" if group in bucket_sizes else group
+            for group in group_by
+        ]
+        select = [*columns, "COUNT(*)", "COUNT(DISTINCT call)", "MAX(prob)", "MIN(ts)", "MAX(ts)"]
+        sql = f"SELECT {', '.join(select)} FROM detections WHERE {' AND '.join(where)}"
+        if columns:
+            sql += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+
+        with self._lock:
+            if self._conn is None:
+                raise sqlite3.ProgrammingError("History database is closed")
+            rows = self._conn.execute(sql, params).fetchall()
+
+        groups = []
+        for row in rows:
+            count, calls, max_prob, first_ts, last_ts = row[len(columns):]
+            if not count:
+                # Aggregate without GROUP BY over an empty range
+                continue
+            group: dict[str, Any] = {}
+            for name, value in zip(group_by, row):
+                if name in bucket_sizes:
+                    value = dt_util.as_local(dt_util.utc_from_timestamp(value * bucket_sizes[name] - offset))
+                    value = value.isoformat()
+                group[name] = value
+            groups.append({
+                **group,
+                "count": count,
+                "calls": calls,
+                "max_prob": round(max_prob, 3),
+                "first_seen": dt_util.utc_from_timestamp(first_ts).isoformat(),
+                "last_seen": dt_util.utc_from_timestamp(last_ts).isoformat(),
+            })
+
+        return {
+            "start": dt_util.utc_from_timestamp(start).isoformat(),
+            "end": dt_util.utc_from_timestamp(end).isoformat(),
+            "total": sum(group["count"] for group in groups),
+            "groups": groups,
+        }
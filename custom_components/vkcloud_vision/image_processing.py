@@ -7,28 +7,78 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import AsyncIterator, Callable, Coroutine
+from datetime import datetime, timedelta
+from typing import Any, cast
 
 from homeassistant.components.camera import async_get_image
 from homeassistant.components.image_processing import \
     DOMAIN as IMAGE_PROCESSING_DOMAIN
 from homeassistant.components.image_processing import ImageProcessingEntity
-from homeassistant.core import HomeAssistant, split_entity_id
+from homeassistant.core import HomeAssistant, callback, split_entity_id
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 from homeassistant.util import dt as dt_util
-from homeassistant.util.json import JsonObjectType
+from homeassistant.util.json import JsonObjectType, JsonValueType
 
+from .api.vkcloud.exceptions import VKCloudVisionUnavailableError
 from .api.vkcloud.vision import VKCloudVision
-from .bounding_boxes import BoundingBoxes
-from .const import DOMAIN, LOGGER, BoundingBoxesType, ResponseType
+from .api.vkcloud.vision.base_client import STREAM_FRAME_TIMEOUT
+from .api.vkcloud.vision.circuit import is_unavailable
+from .api.vkcloud.vision.clients import MAX_IMAGES_PER_REQUEST
+from .api.vkcloud.vision.frames import FrameData, VKCloudVisionFrameStore
+from .api.vkcloud.vision.layout import word_box
+from .api.vkcloud.vision.response import (LabelFilter,
+                                          VKCloudVisionFaceRecognitionResponse,
+                                          VKCloudVisionObjectDetectionResponse,
+                                          VKCloudVisionTextRecognitionResponse,
+                                          label_counts)
+from .bounding_boxes import BoundingBoxes, get_image_size
+from .cascade import get_camera_cascade_rules, plan_follow_ups
+from .const import (ANALYSIS_FACES, ANALYSIS_OBJECTS, ANALYSIS_TEXT,
+                    DEFAULT_NUM_SNAPSHOTS, DEFAULT_RESPONSE_FORMAT,
+                    DEFAULT_SNAPSHOT_INTERVAL_SEC, DOMAIN, EVENT_DETECTION,
+                    EVENT_DETECTION_SUMMARY, EVENT_KNOWN_PLATE,
+                    EVENT_MODE_RESULT, EVENT_TRACK, EVENT_ZONE_OCCUPANCY,
+                    LOGGER, MAX_SNAPSHOT_INTERVAL_SEC, SIGNAL_ZONE_OCCUPANCY,
+                    BoundingBoxesType, ResponseFormat, ResponseType)
+from .detection_events import (EVENT_APPEARED, EVENT_CLEARED,
+                               DetectionEventEngine)
+from .motion import MotionDetector, crop_to_box
+from .offline import VKCloudVisionOfflineQueue
+from .person_crops import PERSON_PROB_THRESHOLD, crop_upper_bodies
+from .plates import PLATE_MODE, PlateConsensus, PlateIndex, plate_readings
+from .quality import score_frames, select_frames
+from .roi import RegionOfInterest, get_camera_roi
+from .text_state import TextStateCache
+from .tiling import TILE_MERGE_THRESHOLD, split_into_tiles
+from .tracker import ObjectTracker
+from .websocket_api import LiveResult, async_publish_result
+from .zones import ZoneEngine, get_camera_zones
 
 DEFAULT_IMAGE_TIMEOUT = 10
 MAX_IMAGE_RETRIES = 10
+FACES_COLOR = (0, 255, 255)
+TEXT_COLOR = (255, 0, 255)
 RETRY_IMAGE_DELAY = 1
 
 
+def _image_retry_time(retries: int) -> float:
+    """Return the longest time `_async_get_image` takes with `retries` attempts."""
+    return retries * DEFAULT_IMAGE_TIMEOUT + sum(RETRY_IMAGE_DELAY * 2 ** attempt for attempt in range(retries - 1))
+
+
+# Streamed snapshots are taken while the upload waits for them, a camera retrying for longer than
+# the stream frame timeout would fail the request anyway
+STREAM_IMAGE_RETRIES = max(
+    retries for retries in range(1, MAX_IMAGE_RETRIES + 1)
+    if _image_retry_time(retries) + MAX_SNAPSHOT_INTERVAL_SEC <= STREAM_FRAME_TIMEOUT
+)
+
+
 def setup_platform(
     hass: HomeAssistant,
     _config: ConfigType,
@@ -58,12 +108,28 @@ class VKCloudVisionEntity(ImageProcessingEntity):
             entry_type=dr.DeviceEntryType.SERVICE,
         )
         self._last_detection = None
+        self._tracker = ObjectTracker()
+        self._zones = ZoneEngine()
+        self._motion = MotionDetector()
+        self._plates = PlateConsensus()
+        self._texts = TextStateCache()
+        self._detections = DetectionEventEngine()
 
     @property
     def state(self) -> str | None:
         """Return the state of the entity."""
         return self._last_detection
 
+    @callback
+    def async_reset_state(self) -> None:
+        """Forget per-camera state of previous calls, e.g. when the options change."""
+        self._tracker.reset()
+        self._zones.reset()
+        self._motion.reset()
+        self._plates.reset()
+        self._texts.reset()
+        self._detections.reset()
+
     def process_image(self, _image: bytes) -> None:
         raise HomeAssistantError("Use `vkcloud_vision.detect_objects` instead")
 
@@ -80,64 +146,417 @@ class VKCloudVisionEntity(ImageProcessingEntity):
         num_snapshots: int,
         snapshot_interval_sec: float,
         max_retries: int,
+        merge_iou_threshold: float | None = None,
+        track_objects: bool = False,
+        tiling: tuple[int, int, int, bool] | None = None,
+        cascade: bool = False,
+        split_modes: bool = False,
+        motion_filter: tuple[float, bool] | None = None,
+        frame_selection: tuple[int | None, float | None] | None = None,
+        stream_upload: bool = False,
+        queue_offline: bool = False,
+        label_filter: LabelFilter | None = None,
+        response_format: str = DEFAULT_RESPONSE_FORMAT,
+        detection_events: tuple[float, float] | None = None,
+        summary_event: bool = False,
     ) -> JsonObjectType:
-        """Detect objects with optional bounding box drawing."""
+        """Detect objects with optional bounding box drawing.
+
+        With `motion_filter=(threshold, crop)` the API is not called when less
+        than `threshold` percent of the frame changed since previous calls, and
+        with `crop` only the motion region is uploaded. With
+        `frame_selection=(best_frames, min_sharpness)` only the best frames of
+        the burst are uploaded, sharpest first. With `stream_upload` snapshots
+        are uploaded while the burst is still being captured. With
+        `queue_offline` snapshots are queued on disk and replayed later if the
+        API is unavailable. Labels not passing `label_filter` are dropped by
+        the response parser, `response_format` selects the full response or
+        a compact projection of every snapshot. With
+        `detection_events=(on_delay, off_delay)` a `vkcloud_vision_detection`
+        event is fired when a label appears or clears on the camera, and with
+        `summary_event` one `vkcloud_vision_detection_summary` event per call.
+        """
         entry = self.hass.config_entries.async_loaded_entries(DOMAIN)[0]
-        client: VKCloudVision = entry.runtime_data
+        client: VKCloudVision = entry.runtime_data.client
 
-        images_data = await self._async_get_images(camera_id, num_snapshots, snapshot_interval_sec)
-        images_meta = [{"name": f"{split_entity_id(camera_id)[1]}_{i + 1}"} for i in range(num_snapshots)]
+        streaming = stream_upload and num_snapshots > 1
+        if streaming and (tiling or cascade or split_modes or motion_filter or frame_selection or queue_offline):
+            LOGGER.debug("Not streaming snapshots of %s, the requested options need the whole burst", camera_id)
+            streaming = False
 
-        response = None
-        api_error = None
+        captured_at = dt_util.utcnow()
+        images_meta = [{"name": f"{split_entity_id(camera_id)[1]}_{i + 1}"} for i in range(num_snapshots)]
+        # Bursts are spooled, the store releases them once this call is done
+        store = VKCloudVisionFrameStore() if num_snapshots > 1 and not streaming else None
         try:
-            response = await client.objects.detect(
-                files=images_data,
-                modes=modes,
-                images=images_meta,
-                prob_threshold=prob_threshold,
-                max_retries=max_retries,
-            )
-        except Exception as err:
-            LOGGER.exception("Detection error", exc_info=err)
-            api_error = str(err)
+            if streaming:
+                # Snapshots go straight to the request, only the first one is kept for drawing and zones
+                images_data: list[FrameData] = []
+            else:
+                images_data = await self._async_get_images(camera_id, num_snapshots, snapshot_interval_sec, store)
 
-        output_path = None
-        if file_out:
-            if num_snapshots > 1:
-                LOGGER.debug("Multiple snapshots (%d) provided, but only the first one will be saved to %s.",
-                             num_snapshots, file_out)
-            try:
-                if response is not None:
-                    # API succeeded: draw bounding boxes
-                    boxes = BoundingBoxes(images_data[0], response.labels, BoundingBoxesType(bounding_boxes))
+            motion = None
+            if motion_filter is not None:
+                motion = await self.hass.async_add_executor_job(self._motion.check_burst, camera_id, images_data)
+                LOGGER.debug("Motion on %s: %.2f%% changed, box %s", camera_id, motion.changed, motion.box)
+                if motion.changed < motion_filter[0]:
+                    return _skipped_result({"motion": motion.as_dict()})
+
+            quality = None
+            if frame_selection is not None:
+                selected, quality = await self._async_select_frames(images_data, images_meta, *frame_selection)
+                if not selected:
+                    LOGGER.debug("All %d snapshots of %s are below the quality floor", num_snapshots, camera_id)
+                    return _skipped_result({"quality": quality})
+                images_data = [images_data[i] for i in selected]
+                images_meta = [images_meta[i] for i in selected]
+
+            # Upload only the region of interest, boxes are mapped back to full-frame coordinates below
+            upload_data = images_data
+            roi_offsets: dict[str, tuple[int, int]] = {}
+            roi = get_camera_roi(entry.options, camera_id)
+            if roi is not None and not streaming:
+                crops = [await self.hass.async_add_executor_job(roi.crop, image) for image in images_data]
+                upload_data = [crop for crop, _ in crops]
+                roi_offsets = {meta["name"]: offset for meta, (_, offset) in zip(images_meta, crops)}
+
+            # Narrow uploads further down to the motion region
+            if motion_filter is not None and motion_filter[1] and motion is not None and motion.box is not None:
+                x1, y1, x2, y2 = motion.box
+                motion_crops = []
+                for image, meta in zip(upload_data, images_meta):
+                    dx, dy = roi_offsets.get(meta["name"], (0, 0))
+                    crop, (crop_dx, crop_dy) = await self.hass.async_add_executor_job(
+                        crop_to_box, image, (x1 - dx, y1 - dy, x2 - dx, y2 - dy)
+                    )
+                    motion_crops.append(crop)
+                    roi_offsets[meta["name"]] = (dx + crop_dx, dy + crop_dy)
+                upload_data = motion_crops
+
+            # Split high-resolution frames into overlapping tiles sent in one multipart request
+            upload_meta = images_meta
+            tile_map: dict[str, tuple[str, tuple[int, int, int, int]]] = {}
+            if tiling is not None:
+                tile_size, tile_overlap, max_tiles, tile_full_frame = tiling
+                upload_tiles, upload_meta = [], []
+                for image, meta in zip(upload_data, images_meta):
+                    frame_dx, frame_dy = roi_offsets.get(meta["name"], (0, 0))
+                    tiles = await self.hass.async_add_executor_job(
+                        split_into_tiles, image, tile_size, tile_overlap, max_tiles, tile_full_frame
+                    )
+                    for i, (tile, (left, top, right, bottom)) in enumerate(tiles):
+                        tile_name = f"{meta['name']}_t{i}"
+                        upload_tiles.append(tile)
+                        upload_meta.append({"name": tile_name})
+                        tile_map[tile_name] = (
+                            meta["name"], (frame_dx + left, frame_dy + top, frame_dx + right, frame_dy + bottom)
+                        )
+                upload_data = upload_tiles
+
+                if len(upload_data) > MAX_IMAGES_PER_REQUEST:
+                    raise HomeAssistantError(
+                        f"Too many images for one request ({len(upload_data)} > {MAX_IMAGES_PER_REQUEST}). "
+                        "Reduce the number of snapshots or tiles."
+                    )
+
+            def to_frame(mode_response: VKCloudVisionObjectDetectionResponse) -> VKCloudVisionObjectDetectionResponse:
+                """Map coordinates from uploaded crops or tiles back to full frames."""
+                if tile_map:
+                    mode_response.merge_tiles(tile_map, TILE_MERGE_THRESHOLD)
+                elif roi_offsets:
+                    mode_response.translate(roi_offsets)
+                return mode_response
+
+            @callback
+            def async_mode_result(mode: str, mode_response: VKCloudVisionObjectDetectionResponse | Exception) -> None:
+                """Publish a single mode result as soon as it arrives."""
+                if isinstance(mode_response, Exception):
+                    event_data = {"camera_id": camera_id, "mode": mode, "response": None, "error": str(mode_response)}
                 else:
-                    # API failed: save raw snapshot without annotations
-                    LOGGER.warning("API call failed. Saving raw snapshot without bounding boxes.")
-                    boxes = BoundingBoxes(images_data[0], [], BoundingBoxesType.NONE)
+                    to_frame(mode_response)
+                    event_data = {
+                        "camera_id": camera_id,
+                        "mode": mode,
+                        "response": mode_response.data.get(mode),
+                        "error": mode_response.error_message,
+                    }
+                self.hass.bus.async_fire(EVENT_MODE_RESULT, event_data)
 
-                output_path = await self.hass.async_add_executor_job(boxes.save_image, file_out)
+            response = None
+            api_error = None
+            queued = None
+            try:
+                if queue_offline and not client.circuit.allow_request():
+                    # Don't wait for timeouts while the API is known to be down
+                    raise VKCloudVisionUnavailableError("VK Cloud Vision API is unavailable")
+                if split_modes and len(modes) > 1:
+                    # Per-mode results have been mapped to frame coordinates by the callback
+                    response = await client.objects.detect_per_mode(
+                        files=upload_data,
+                        modes=modes,
+                        images=upload_meta,
+                        prob_threshold=prob_threshold,
+                        max_retries=max_retries,
+                        on_result=async_mode_result,
+                        label_filter=label_filter,
+                    )
+                else:
+                    response = to_frame(await client.objects.detect(
+                        files=(
+                            self._async_stream_images(camera_id, images_meta, snapshot_interval_sec, roi, roi_offsets,
+                                                      images_data)
+                            if streaming else upload_data
+                        ),
+                        modes=modes,
+                        images=upload_meta,
+                        prob_threshold=prob_threshold,
+                        max_retries=max_retries,
+                        label_filter=label_filter,
+                    ))
             except Exception as err:
-                LOGGER.error("Image saving failed: %s", err)
-                raise HomeAssistantError(f"Image saving failed: {err}") from err
+                LOGGER.exception("Detection error", exc_info=err)
+                api_error = str(err)
+                if queue_offline and is_unavailable(err):
+                    queue: VKCloudVisionOfflineQueue = entry.runtime_data.queue
+                    try:
+                        # Queue what would have been sent, so the replay crops, tiles and filters alike
+                        queued = await queue.async_enqueue(
+                            camera_id, captured_at, modes, prob_threshold, upload_meta, upload_data, label_filter,
+                            roi_offsets, tile_map,
+                        )
+                    except OSError as queue_err:
+                        LOGGER.error("Unable to queue detection of %s: %s", camera_id, queue_err)
 
-        if response is None:
-            raise HomeAssistantError(f"Detection error: {api_error}")
+            if not images_data:
+                # Streaming failed before the first snapshot was captured
+                raise HomeAssistantError(f"Detection error: {api_error}")
 
-        self._last_detection = dt_util.utcnow().isoformat()
-        self.async_write_ha_state()
+            cascade_result = None
+            if response is not None and cascade:
+                cascade_result = await self._async_run_cascade(
+                    camera_id, response, modes, upload_data, upload_meta, images_data[0], prob_threshold, max_retries,
+                    to_frame, label_filter,
+                )
+
+            if response is not None and merge_iou_threshold is not None:
+                merged = response.merge_overlapping(merge_iou_threshold)
+                LOGGER.debug("Merged overlapping labels for %s: %d -> %d", camera_id, merged["before"], merged["after"])
+
+            output_path = None
+            if file_out:
+                if num_snapshots > 1:
+                    LOGGER.debug("Multiple snapshots (%d) provided, but only the first one will be saved to %s.",
+                                 num_snapshots, file_out)
+                try:
+                    if response is not None:
+                        # API succeeded: draw bounding boxes
+                        boxes = BoundingBoxes(images_data[0], response.labels, BoundingBoxesType(bounding_boxes))
+                    else:
+                        # API failed: save raw snapshot without annotations
+                        LOGGER.warning("API call failed. Saving raw snapshot without bounding boxes.")
+                        boxes = BoundingBoxes(images_data[0], [], BoundingBoxesType.NONE)
+
+                    output_path = await self.hass.async_add_executor_job(boxes.save_image, file_out)
+                except Exception as err:
+                    LOGGER.error("Image saving failed: %s", err)
+                    raise HomeAssistantError(f"Image saving failed: {err}") from err
+
+            if response is None:
+                if queued is not None:
+                    # The result is delivered later with a `vkcloud_vision_queued_result` event
+                    return {**_error_result(f"Detection error: {api_error}", output_path), "queued": queued}
+                raise HomeAssistantError(f"Detection error: {api_error}")
+
+            now = dt_util.utcnow()
+            tracking = None
+            if track_objects:
+                tracking = self._tracker.update(camera_id, response.labels, now)
+                for event_type, tracks in tracking.items():
+                    for track in tracks:
+                        self.hass.bus.async_fire(EVENT_TRACK, {"camera_id": camera_id, "type": event_type, **track})
+
+            zone_occupancy = None
+            if zones := get_camera_zones(entry.options, camera_id):
+                frame_size = await self.hass.async_add_executor_job(get_image_size, images_data[0])
+                zone_occupancy, changed_zones = self._zones.update(camera_id, zones, response.labels, frame_size)
+                for zone_name in changed_zones:
+                    async_dispatcher_send(
+                        self.hass, SIGNAL_ZONE_OCCUPANCY, camera_id, zone_name, zone_occupancy[zone_name]
+                    )
+                    self.hass.bus.async_fire(
+                        EVENT_ZONE_OCCUPANCY, {"camera_id": camera_id, "zone": zone_name, **zone_occupancy[zone_name]}
+                    )
+
+            plates = None
+            if PLATE_MODE in response.data:
+                # Burst frames and recent calls vote on every plate
+                plates = self._plates.update(camera_id, plate_readings(response.data), now)
+                plate_index: PlateIndex = entry.runtime_data.plates
+                for plate in plates:
+                    match = plate_index.match(plate["plate"])
+                    plate["known"] = match[0].as_dict(match[1]) if match else None
+                    if match and self._plates.announce(camera_id, match[0].plate, now):
+                        known, distance = match
+                        self.hass.bus.async_fire(EVENT_KNOWN_PLATE, {
+                            "camera_id": camera_id,
+                            "plate": plate["plate"],
+                            "known_plate": known.plate,
+                            "name": known.name,
+                            "list": known.list,
+                            "distance": distance,
+                            "confidence": plate["confidence"],
+                            "votes": plate["votes"],
+                        })
+
+            if detection_events is not None or summary_event:
+                self._async_fire_detection_events(camera_id, response, now, detection_events, summary_event)
+
+            if entry.runtime_data.history is not None:
+                entry.runtime_data.history.async_record(camera_id, captured_at, response.data)
+            async_publish_result(self.hass, LiveResult(camera_id, ANALYSIS_OBJECTS, now, response.labels,
+                                                       image=images_data[0]))
+
+            self._last_detection = now.isoformat()
+            self.async_write_ha_state()
+
+            errors = [response.error_message] if response.has_errors else []
+            if cascade_result is not None:
+                errors.extend(cast(list[str], cascade_result["errors"]))
+
+            if response_format == ResponseFormat.COMPACT:
+                response_data = response.compact()
+            elif response_format == ResponseFormat.COUNTS:
+                response_data = response.counts()
+            else:
+                response_data = response.data
+
+            result: JsonObjectType = {
+                "response": response_data,
+                "file_out": output_path,
+                "response_type": ResponseType.PARTIAL_ACTION_DONE if errors else ResponseType.ACTION_DONE,
+                "error": "; ".join(cast(list[str], errors)) if errors else None,
+            }
+            if cascade_result is not None:
+                result["cascade"] = cascade_result
+            if response.merged is not None:
+                result["merged"] = response.merged
+            if tracking is not None:
+                result["tracking"] = tracking
+            if zone_occupancy is not None:
+                result["zones"] = zone_occupancy
+            if plates is not None:
+                result["plates"] = plates
+            if motion is not None:
+                result["motion"] = motion.as_dict()
+            if quality is not None:
+                result["quality"] = quality
+            if motion is not None or quality is not None:
+                result["skipped"] = False
+
+            return result
+        finally:
+            if store is not None:
+                store.close()
+
+    @callback
+    def _async_fire_detection_events(
+        self,
+        camera_id: str,
+        response: VKCloudVisionObjectDetectionResponse,
+        now: datetime,
+        detection_events: tuple[float, float] | None,
+        summary_event: bool,
+    ) -> None:
+        """Fire debounced per-label events and the summary event of a call."""
+        transitions: list[dict[str, Any]] = []
+        present = None
+        if detection_events is not None:
+            on_delay, off_delay = detection_events
+            transitions, present = self._detections.update(
+                camera_id, response.labels, now, timedelta(seconds=on_delay), timedelta(seconds=off_delay)
+            )
+            for transition in transitions:
+                self.hass.bus.async_fire(EVENT_DETECTION, {"camera_id": camera_id, **transition})
+
+        if summary_event:
+            summary: dict[str, Any] = {"camera_id": camera_id, "labels": label_counts(response.labels)}
+            if present is not None:
+                summary["present"] = present
+                summary["appeared"] = [event["label"] for event in transitions if event["type"] == EVENT_APPEARED]
+                summary["cleared"] = [event["label"] for event in transitions if event["type"] == EVENT_CLEARED]
+            self.hass.bus.async_fire(EVENT_DETECTION_SUMMARY, summary)
+
+    async def _async_run_cascade(
+        self,
+        camera_id: str,
+        response: VKCloudVisionObjectDetectionResponse,
+        modes: list[str],
+        files: list[bytes],
+        images_meta: list[dict[str, str]],
+        frame: bytes,
+        prob_threshold: float,
+        max_retries: int,
+        to_frame: Callable[[VKCloudVisionObjectDetectionResponse], VKCloudVisionObjectDetectionResponse],
+        label_filter: LabelFilter | None = None,
+    ) -> JsonObjectType:
+        """Run follow-up modes and face recognition triggered by cascade rules on the same captured frames."""
+        entry = self.hass.config_entries.async_loaded_entries(DOMAIN)[0]
+        client: VKCloudVision = entry.runtime_data.client
+
+        rules = get_camera_cascade_rules(entry.options, camera_id)
+        follow_up_modes, face_spaces = plan_follow_ups(rules, response.labels, modes)
+        LOGGER.debug("Cascade for %s: follow-up modes %s, face spaces %s", camera_id, follow_up_modes, face_spaces)
+
+        requests = []
+        if follow_up_modes:
+            requests.append(client.objects.detect(
+                files=files,
+                modes=follow_up_modes,
+                images=images_meta,
+                prob_threshold=prob_threshold,
+                max_retries=max_retries,
+                label_filter=label_filter,
+            ))
+        for space in face_spaces:
+            requests.append(client.persons.recognize(
+                files=[frame],
+                space=space,
+                images=[{"name": split_entity_id(camera_id)[1]}],
+                # Detection must not train the space
+                create_new=False,
+                update_embedding=False,
+                tag_to_alias_map=entry.runtime_data.aliases.tag_to_alias_map(space),
+                max_retries=max_retries,
+            ))
+
+        results = await asyncio.gather(*requests, return_exceptions=True)
+
+        errors: list[str] = []
+        persons: dict[str, JsonObjectType] = {}
+        if follow_up_modes:
+            detection, *results = results
+            if isinstance(detection, BaseException):
+                LOGGER.error("Cascade detection error: %s", detection)
+                errors.append(f"Cascade detection error: {detection}")
+            else:
+                response.extend(to_frame(detection))
+        for space, face_response in zip(face_spaces, results):
+            if isinstance(face_response, BaseException):
+                LOGGER.error("Cascade face recognition error: %s", face_response)
+                errors.append(f"Cascade face recognition error: {face_response}")
+            else:
+                persons[str(space)] = face_response.data
 
         return {
-            "response": response.data,
-            "file_out": output_path,
-            "response_type": ResponseType.PARTIAL_ACTION_DONE if response.has_errors else ResponseType.ACTION_DONE,
-            "error": response.error_message,
+            "follow_up_modes": cast(JsonValueType, follow_up_modes),
+            "persons": cast(JsonValueType, persons),
+            "errors": cast(JsonValueType, errors),
         }
 
     async def recognize_text(self, camera_id: str, lang: str | None, max_retries: int) -> JsonObjectType:
         """Recognize text in an image."""
         entry = self.hass.config_entries.async_loaded_entries(DOMAIN)[0]
-        client: VKCloudVision = entry.runtime_data
+        client: VKCloudVision = entry.runtime_data.client
 
         image_data = await self._async_get_image(camera_id)
         image_meta = {"name": split_entity_id(camera_id)[1]}
@@ -152,18 +571,30 @@ class VKCloudVisionEntity(ImageProcessingEntity):
         except Exception as err:
             raise HomeAssistantError(f"Text recognition error: {err}") from err
 
-        self._last_detection = dt_util.utcnow().isoformat()
+        # Meters and displays mostly read the same, report what changed since the last call
+        changed, delta = self._texts.update(camera_id, [line["text"] for line in response.lines])
+
+        now = dt_util.utcnow()
+        async_publish_result(self.hass, _text_result(camera_id, now, response, image_data, changed, delta))
+
+        self._last_detection = now.isoformat()
         self.async_write_ha_state()
 
         return {
             "response": response.data,
             "response_type": ResponseType.PARTIAL_ACTION_DONE if response.has_errors else ResponseType.ACTION_DONE,
             "error": response.error_message,
+            "changed": changed,
+            "delta": delta,
         }
 
-    async def recognize_faces(
+    async def async_analyze(
         self,
         camera_id: str,
+        analyses: list[str],
+        modes: list[str],
+        prob_threshold: float,
+        lang: str | None,
         space: int,
         create_new: bool,
         update_embedding: bool,
@@ -171,85 +602,436 @@ class VKCloudVisionEntity(ImageProcessingEntity):
         file_out: str | None,
         bounding_boxes: str,
         max_retries: int,
-        tag_to_alias_map: dict | None = None
+        tag_to_alias_map: dict | None = None,
     ) -> JsonObjectType:
-        """Recognize faces in an image."""
+        """Detect objects, recognize text and faces on one snapshot with concurrent requests."""
         entry = self.hass.config_entries.async_loaded_entries(DOMAIN)[0]
-        client: VKCloudVision = entry.runtime_data
+        client: VKCloudVision = entry.runtime_data.client
 
         image_data = await self._async_get_image(camera_id)
-        image_meta = {"name": split_entity_id(camera_id)[1]}
+        images_meta = [{"name": split_entity_id(camera_id)[1]}]
 
-        response = None
-        api_error = None
-        try:
-            response = await client.persons.recognize(
+        requests: dict[str, Coroutine[Any, Any, Any]] = {}
+        if ANALYSIS_OBJECTS in analyses:
+            requests[ANALYSIS_OBJECTS] = client.objects.detect(
+                files=[image_data],
+                modes=modes,
+                images=images_meta,
+                prob_threshold=prob_threshold,
+                max_retries=max_retries,
+            )
+        if ANALYSIS_TEXT in analyses:
+            requests[ANALYSIS_TEXT] = client.text.scene_text_recognize(
+                files=[image_data],
+                images=images_meta,
+                lang=lang,
+                max_retries=max_retries,
+            )
+        if ANALYSIS_FACES in analyses:
+            requests[ANALYSIS_FACES] = client.persons.recognize(
                 files=[image_data],
                 space=space,
-                images=[image_meta],
+                images=images_meta,
                 create_new=create_new,
                 update_embedding=update_embedding,
                 confidence_threshold=confidence_threshold,
                 tag_to_alias_map=tag_to_alias_map,
                 max_retries=max_retries,
             )
-        except Exception as err:
-            LOGGER.exception("Face recognition error", exc_info=err)
-            api_error = str(err)
+
+        responses: dict[str, Any] = {}
+        errors: list[str] = []
+        for analysis, result in zip(requests, await asyncio.gather(*requests.values(), return_exceptions=True)):
+            if isinstance(result, Exception):
+                LOGGER.error("Analysis %s of %s failed: %s", analysis, camera_id, result)
+                errors.append(f"{analysis}: {result}")
+                continue
+            responses[analysis] = result
+            if result.has_errors:
+                errors.append(f"{analysis}: {result.error_message}")
 
         output_path = None
         if file_out:
-            if response is not None:
-                boxes = BoundingBoxes(image_data, response.persons, BoundingBoxesType(bounding_boxes))
-            else:
-                LOGGER.warning("API call failed. Saving raw snapshot without bounding boxes.")
-                boxes = BoundingBoxes(image_data, [], BoundingBoxesType.NONE)
+            # Objects, faces and text in one image, each in its own color
+            mode = BoundingBoxesType(bounding_boxes)
+            layer_mode = mode if mode in (BoundingBoxesType.NONE, BoundingBoxesType.NO_LABELS) else None
+            boxes = BoundingBoxes(
+                image_data,
+                responses[ANALYSIS_OBJECTS].labels if ANALYSIS_OBJECTS in responses else [],
+                mode,
+            )
+            if ANALYSIS_FACES in responses:
+                boxes.add_layer(responses[ANALYSIS_FACES].persons, layer_mode or BoundingBoxesType.ALIAS, FACES_COLOR)
+            if ANALYSIS_TEXT in responses:
+                boxes.add_layer(_word_labels(responses[ANALYSIS_TEXT].words), layer_mode or BoundingBoxesType.ENG,
+                                TEXT_COLOR)
             try:
                 output_path = await self.hass.async_add_executor_job(boxes.save_image, file_out)
             except Exception as err:
                 LOGGER.error("Image saving failed: %s", err)
                 raise HomeAssistantError(f"Image saving failed: {err}") from err
 
-        if response is None:
-            raise HomeAssistantError(f"Face recognition error: {api_error}")
+        if not responses:
+            raise HomeAssistantError(f"Analysis error: {'; '.join(errors)}")
+
+        now = dt_util.utcnow()
+        if ANALYSIS_OBJECTS in responses and entry.runtime_data.history is not None:
+            entry.runtime_data.history.async_record(camera_id, now, responses[ANALYSIS_OBJECTS].data)
+        if ANALYSIS_OBJECTS in responses:
+            async_publish_result(self.hass, LiveResult(camera_id, ANALYSIS_OBJECTS, now,
+                                                       responses[ANALYSIS_OBJECTS].labels, image=image_data))
+        if ANALYSIS_FACES in responses:
+            async_publish_result(self.hass, LiveResult(camera_id, ANALYSIS_FACES, now,
+                                                       responses[ANALYSIS_FACES].persons, image=image_data,
+                                                       bounding_boxes=BoundingBoxesType.ALIAS, color=FACES_COLOR))
+        if ANALYSIS_TEXT in responses:
+            async_publish_result(self.hass, _text_result(camera_id, now, responses[ANALYSIS_TEXT], image_data))
 
-        self._last_detection = dt_util.utcnow().isoformat()
+        self._last_detection = now.isoformat()
         self.async_write_ha_state()
 
         return {
-            "response": response.data,
+            "response": {
+                analysis: responses[analysis].data if analysis in responses else None for analysis in requests
+            },
             "file_out": output_path,
-            "response_type": ResponseType.PARTIAL_ACTION_DONE if response.has_errors else ResponseType.ACTION_DONE,
-            "error": response.error_message,
+            "response_type": ResponseType.PARTIAL_ACTION_DONE if errors else ResponseType.ACTION_DONE,
+            "error": "; ".join(errors) if errors else None,
+        }
+
+    async def recognize_faces(
+        self,
+        camera_ids: list[str],
+        space: int,
+        create_new: bool,
+        update_embedding: bool,
+        confidence_threshold: float,
+        file_out: str | None,
+        bounding_boxes: str,
+        max_retries: int,
+        tag_to_alias_map: dict | None = None,
+        crop_persons: bool = False,
+        person_boxes: list[list[float]] | None = None,
+        num_snapshots: int = DEFAULT_NUM_SNAPSHOTS,
+        snapshot_interval_sec: float = DEFAULT_SNAPSHOT_INTERVAL_SEC,
+        frame_selection: tuple[int | None, float | None] | None = None,
+    ) -> dict[str, JsonObjectType]:
+        """Recognize faces in snapshots of several cameras with a single API request.
+
+        Persons seen in several snapshots of a camera are reported once with
+        their best-similarity observation. With `frame_selection` only the best
+        snapshots of each camera are uploaded. `person_boxes` of a single
+        camera are used for all its snapshots.
+        """
+        entry = self.hass.config_entries.async_loaded_entries(DOMAIN)[0]
+        client: VKCloudVision = entry.runtime_data.client
+
+        results: dict[str, JsonObjectType] = {}
+        captures = await asyncio.gather(
+            *(self._async_get_images(camera_id, num_snapshots, snapshot_interval_sec) for camera_id in camera_ids),
+            return_exceptions=True,
+        )
+
+        # Snapshot name -> (camera, image)
+        snapshots: dict[str, tuple[str, bytes]] = {}
+        camera_quality: dict[str, JsonObjectType] = {}
+        for camera_id, capture in zip(camera_ids, captures):
+            if isinstance(capture, BaseException):
+                if not isinstance(capture, HomeAssistantError):
+                    raise capture
+                results[camera_id] = _error_result(str(capture))
+                continue
+            camera_name = split_entity_id(camera_id)[1]
+            names = [camera_name if num_snapshots == 1 else f"{camera_name}_{i + 1}" for i in range(len(capture))]
+            selected = list(range(len(capture)))
+            if frame_selection is not None:
+                selected, camera_quality[camera_id] = await self._async_select_frames(
+                    capture, [{"name": name} for name in names], *frame_selection
+                )
+                if not selected:
+                    results[camera_id] = _skipped_result({"quality": camera_quality[camera_id]})
+                    continue
+            for i in selected:
+                snapshots[names[i]] = (camera_id, capture[i])
+
+        if not snapshots:
+            return results
+
+        # Uploaded image name -> (camera, snapshot), and offsets of person crops within their snapshots
+        image_groups: dict[str, tuple[str, str]] = {}
+        upload_data: list[bytes] = []
+        crop_offsets: dict[str, tuple[int, int]] = {}
+        crop_counts: dict[str, int] = {}
+        if crop_persons:
+            # Given boxes come from a previous detection on the only camera, they apply to all its snapshots
+            boxes_by_snapshot = (
+                dict.fromkeys(snapshots, person_boxes) if person_boxes is not None
+                else await self._async_detect_person_boxes(
+                    {name: image_data for name, (_, image_data) in snapshots.items()}, max_retries
+                )
+            )
+            for snapshot_name, (camera_id, image_data) in snapshots.items():
+                crops = await self.hass.async_add_executor_job(
+                    crop_upper_bodies, image_data, boxes_by_snapshot.get(snapshot_name, [])
+                )
+                for i, (crop, offset) in enumerate(crops):
+                    crop_name = f"{snapshot_name}_person{i + 1}"
+                    image_groups[crop_name] = (camera_id, snapshot_name)
+                    crop_offsets[crop_name] = offset
+                    upload_data.append(crop)
+                crop_counts[camera_id] = crop_counts.get(camera_id, 0) + len(crops)
+            LOGGER.debug("Sending %d person crops to face recognition", len(upload_data))
+        else:
+            for snapshot_name, (camera_id, image_data) in snapshots.items():
+                image_groups[snapshot_name] = (camera_id, snapshot_name)
+                upload_data.append(image_data)
+
+        if len(upload_data) > MAX_IMAGES_PER_REQUEST:
+            raise HomeAssistantError(
+                f"Too many images for one request ({len(upload_data)} > {MAX_IMAGES_PER_REQUEST}), "
+                "reduce the number of cameras or snapshots"
+            )
+
+        response = None
+        api_error = None
+        try:
+            if not upload_data:
+                # Nobody in the frames: nothing to recognize
+                response = VKCloudVisionFaceRecognitionResponse({})
+            else:
+                response = await client.persons.recognize(
+                    files=upload_data,
+                    space=space,
+                    images=[{"name": name} for name in image_groups],
+                    create_new=create_new,
+                    update_embedding=update_embedding,
+                    confidence_threshold=confidence_threshold,
+                    tag_to_alias_map=tag_to_alias_map,
+                    max_retries=max_retries,
+                )
+                response.translate(crop_offsets)
+        except Exception as err:
+            LOGGER.exception("Face recognition error", exc_info=err)
+            api_error = str(err)
+
+        persons_by_camera = response.aggregate(image_groups) if response is not None else {}
+        camera_snapshots: dict[str, list[str]] = {}
+        for snapshot_name, (camera_id, _) in snapshots.items():
+            camera_snapshots.setdefault(camera_id, []).append(snapshot_name)
+
+        now = dt_util.utcnow()
+        for camera_id, snapshot_names in camera_snapshots.items():
+            persons = persons_by_camera.get(camera_id, [])
+            # The snapshot holding most of the best observations is saved and streamed, with its persons only
+            best_snapshot = max(snapshot_names, key=lambda name: sum(p["image"] == name for p in persons))
+
+            output_path = None
+            if file_out:
+                if response is not None:
+                    boxes = BoundingBoxes(
+                        snapshots[best_snapshot][1],
+                        [person for person in persons if person["image"] == best_snapshot],
+                        BoundingBoxesType(bounding_boxes),
+                    )
+                else:
+                    LOGGER.warning("API call failed. Saving raw snapshot without bounding boxes.")
+                    boxes = BoundingBoxes(snapshots[best_snapshot][1], [], BoundingBoxesType.NONE)
+                try:
+                    output_path = await self.hass.async_add_executor_job(boxes.save_image, file_out)
+                except Exception as err:
+                    LOGGER.error("Image saving failed: %s", err)
+                    raise HomeAssistantError(f"Image saving failed: {err}") from err
+
+            if response is None:
+                results[camera_id] = _error_result(f"Face recognition error: {api_error}", output_path)
+                continue
+
+            async_publish_result(self.hass, LiveResult(
+                camera_id, ANALYSIS_FACES, now, persons,
+                image=snapshots[best_snapshot][1],
+                frame_labels=[person for person in persons if person["image"] == best_snapshot],
+                bounding_boxes=BoundingBoxesType.ALIAS,
+                color=FACES_COLOR,
+            ))
+
+            results[camera_id] = {
+                "response": {"persons": cast(JsonValueType, persons), "aliases_changed": response.aliases_changed},
+                "file_out": output_path,
+                "response_type": ResponseType.PARTIAL_ACTION_DONE if response.has_errors else ResponseType.ACTION_DONE,
+                "error": response.error_message,
+                "snapshots": len(snapshot_names),
+            }
+            if crop_persons:
+                results[camera_id]["crops"] = crop_counts.get(camera_id, 0)
+            if camera_id in camera_quality:
+                results[camera_id]["quality"] = camera_quality[camera_id]
+
+        if response is not None:
+            self._last_detection = now.isoformat()
+            self.async_write_ha_state()
+
+        return results
+
+    async def _async_detect_person_boxes(
+        self, images: dict[str, bytes], max_retries: int
+    ) -> dict[str, list[list[float]]]:
+        """Find person boxes in each image with the pedestrian detector, all images in one request."""
+        entry = self.hass.config_entries.async_loaded_entries(DOMAIN)[0]
+        client: VKCloudVision = entry.runtime_data.client
+
+        try:
+            response = await client.objects.detect(
+                files=list(images.values()),
+                modes=["pedestrian"],
+                images=[{"name": name} for name in images],
+                prob_threshold=PERSON_PROB_THRESHOLD,
+                max_retries=max_retries,
+            )
+        except Exception as err:
+            raise HomeAssistantError(f"Person detection error: {err}") from err
+
+        return {
+            str(image.get("name")): [label["coord"] for label in image.get("labels", []) if label.get("coord")]
+            for image in cast(list[dict], response.data.get("pedestrian", []))
         }
 
-    async def _async_get_image(self, camera_id: str) -> bytes:
+    async def _async_get_image(self, camera_id: str, max_retries: int = MAX_IMAGE_RETRIES) -> bytes:
         """Get a single image from camera with retry logic."""
         last_error = None
 
-        for attempt in range(MAX_IMAGE_RETRIES):
+        for attempt in range(max_retries):
             try:
-                camera_image = await async_get_image(self.hass, camera_id)
+                camera_image = await async_get_image(self.hass, camera_id, timeout=DEFAULT_IMAGE_TIMEOUT)
                 return camera_image.content
             except HomeAssistantError as err:
                 last_error = str(err)
                 LOGGER.warning("Failed to get image from %s (attempt %d/%d): %s",
-                               camera_id, attempt + 1, MAX_IMAGE_RETRIES, last_error)
+                               camera_id, attempt + 1, max_retries, last_error)
 
-                if attempt < MAX_IMAGE_RETRIES - 1:
+                if attempt < max_retries - 1:
                     await asyncio.sleep(RETRY_IMAGE_DELAY * (2 ** attempt))
 
         raise HomeAssistantError(
-            f"Failed to get image from {camera_id} after {MAX_IMAGE_RETRIES} attempts. Last error: {last_error}")
+            f"Failed to get image from {camera_id} after {max_retries} attempts. Last error: {last_error}")
+
+    async def _async_get_images(
+        self,
+        camera_id: str,
+        num_snapshots: int,
+        snapshot_interval_sec: float,
+        store: VKCloudVisionFrameStore | None = None,
+    ) -> list[FrameData]:
+        """Get multiple snapshots from camera with a small interval.
 
-    async def _async_get_images(self, camera_id: str, num_snapshots: int, snapshot_interval_sec: float) -> list[bytes]:
-        """Get multiple snapshots from camera with a small interval."""
-        images_data = []
+        With a `store` large snapshots are spooled to memory-mapped files and
+        returned as memoryviews.
+        """
+        images_data: list[FrameData] = []
 
         for i in range(num_snapshots):
-            image_data = await self._async_get_image(camera_id)
+            image_data: FrameData = await self._async_get_image(camera_id)
+            if store is not None:
+                image_data = (await self.hass.async_add_executor_job(store.add, image_data)).data
             images_data.append(image_data)
             if i < num_snapshots - 1:
                 await asyncio.sleep(snapshot_interval_sec)
 
         return images_data
+
+    async def _async_stream_images(
+        self,
+        camera_id: str,
+        images_meta: list[dict[str, str]],
+        snapshot_interval_sec: float,
+        roi: RegionOfInterest | None,
+        roi_offsets: dict[str, tuple[int, int]],
+        first_image: list[bytes],
+    ) -> AsyncIterator[bytes]:
+        """Yield snapshots as they are captured, cropped to the region of interest.
+
+        The first snapshot is also appended to `first_image` and crop offsets
+        are stored in `roi_offsets` by image name.
+        """
+        for i, meta in enumerate(images_meta):
+            if i > 0:
+                await asyncio.sleep(snapshot_interval_sec)
+            image_data = await self._async_get_image(camera_id, STREAM_IMAGE_RETRIES)
+            if not first_image:
+                first_image.append(image_data)
+            if roi is not None:
+                image_data, roi_offsets[meta["name"]] = await self.hass.async_add_executor_job(roi.crop, image_data)
+            yield image_data
+
+    async def _async_select_frames(
+        self,
+        images: list[bytes],
+        images_meta: list[dict[str, str]],
+        best_frames: int | None,
+        min_sharpness: float | None,
+    ) -> tuple[list[int], JsonObjectType]:
+        """Score snapshots of a burst and return indices of the frames to upload with a quality report."""
+        qualities = await self.hass.async_add_executor_job(score_frames, images)
+        selected = select_frames(qualities, best_frames, min_sharpness)
+        report: JsonObjectType = {
+            "frames": [
+                {"name": meta["name"], **frame_quality.as_dict(), "selected": i in selected}
+                for i, (meta, frame_quality) in enumerate(zip(images_meta, qualities))
+            ],
+            "rejected": len(images) - len(selected),
+        }
+        return selected, report
+
+
+def _skipped_result(extra: JsonObjectType) -> JsonObjectType:
+    """Build a result of a call skipped before reaching the API."""
+    return {
+        "response": {},
+        "file_out": None,
+        "response_type": ResponseType.ACTION_DONE,
+        "error": None,
+        **extra,
+        "skipped": True,
+    }
+
+
+def _error_result(error: str, file_out: str | None = None) -> JsonObjectType:
+    """Build a per-camera error result."""
+    return {
+        "response": None,
+        "file_out": file_out,
+        "response_type": ResponseType.ERROR,
+        "error": error,
+    }
+
+
+def _text_result(
+    camera_id: str,
+    timestamp: datetime,
+    response: VKCloudVisionTextRecognitionResponse,
+    image: FrameData,
+    changed: bool | None = None,
+    delta: dict[str, Any] | None = None,
+) -> LiveResult:
+    """Return a live result of recognized text: lines are sent as labels, words are drawn."""
+    data: dict[str, Any] = {"text": response.text}
+    if changed is not None:
+        data["changed"] = changed
+        data["delta"] = delta
+    return LiveResult(
+        camera_id, ANALYSIS_TEXT, timestamp, response.lines, data,
+        image=image,
+        frame_labels=_word_labels(response.words),
+        bounding_boxes=BoundingBoxesType.ENG,
+        color=TEXT_COLOR,
+    )
+
+
+def _word_labels(words: list[dict]) -> list[dict]:
+    """Turn recognized words into labels with boxes."""
+    labels = []
+    for word in words:
+        box = word_box(word.get("coord"))
+        if box is None:
+            continue
+        labels.append({"coord": list(box), "eng": word.get("text"), "rus": word.get("text")})
+    return labels
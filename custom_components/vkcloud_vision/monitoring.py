@@ -0,0 +1,176 @@
+"""Background camera monitoring with adaptive polling for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import STATE_ON
+from homeassistant.core import (Event, EventStateChangedData, HomeAssistant,
+                                callback)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.update_coordinator import (DataUpdateCoordinator,
+                                                      UpdateFailed)
+from homeassistant.util import dt as dt_util
+
+from .const import (CONF_CAMERA, CONF_INTERVAL, CONF_MIN_PROB, CONF_MODES,
+                    CONF_MONITORING, CONF_MOTION_SENSORS,
+                    CONF_MOTION_THRESHOLD, DEFAULT_MODES,
+                    DEFAULT_MONITOR_INTERVAL, DEFAULT_PROB_THRESHOLD,
+                    DEFAULT_SNAPSHOT_INTERVAL_SEC, EVENT_MONITOR, LOGGER,
+                    BoundingBoxesType)
+
+if TYPE_CHECKING:
+    from .image_processing import VKCloudVisionEntity
+
+MIN_INTERVAL = 5
+# Polling runs at `interval / SPEED_UP` while active and backs off up to `interval * MAX_BACK_OFF` when idle
+SPEED_UP = 4
+BACK_OFF_FACTOR = 1.5
+MAX_BACK_OFF = 8
+ACTIVE_WINDOW = timedelta(minutes=5)
+
+
+@dataclass(frozen=True)
+class MonitorConfig:
+    """Monitoring settings of a camera."""
+
+    camera_id: str
+    interval: float = DEFAULT_MONITOR_INTERVAL
+    modes: tuple[str, ...] = tuple(DEFAULT_MODES)
+    min_prob: float = DEFAULT_PROB_THRESHOLD
+    motion_sensors: tuple[str, ...] = ()
+    # Percent of the frame that must change for the API to be called, 0 disables the local motion filter
+    motion_threshold: float = 0
+
+    @property
+    def min_interval(self) -> timedelta:
+        return timedelta(seconds=max(MIN_INTERVAL, self.interval / SPEED_UP))
+
+    @property
+    def max_interval(self) -> timedelta:
+        return timedelta(seconds=self.interval * MAX_BACK_OFF)
+
+
+def get_monitor_configs(options: Mapping[str, Any]) -> list[MonitorConfig]:
+    """Return monitoring settings of all monitored cameras."""
+    return [
+        MonitorConfig(
+            camera_id=monitor[CONF_CAMERA],
+            interval=float(monitor.get(CONF_INTERVAL, DEFAULT_MONITOR_INTERVAL)),
+            modes=tuple(monitor.get(CONF_MODES) or DEFAULT_MODES),
+            min_prob=float(monitor.get(CONF_MIN_PROB, DEFAULT_PROB_THRESHOLD)),
+            motion_sensors=tuple(monitor.get(CONF_MOTION_SENSORS, [])),
+            motion_threshold=float(monitor.get(CONF_MOTION_THRESHOLD) or 0),
+        )
+        for monitor in options.get(CONF_MONITORING, [])
+    ]
+
+
+def _label_counts(response: Mapping[str, Any]) -> dict[str, int]:
+    """Count labels of the first image of every mode."""
+    counts: dict[str, int] = {}
+    for images in response.values():
+        if not images:
+            continue
+        for label in images[0].get("labels", []):
+            name = label.get("eng") or "unknown"
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+class VKCloudVisionMonitorCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Periodically detect objects on a camera, polling faster while something changes.
+
+    The first refresh is delayed by `stagger` so that cameras with the same
+    interval don't all hit the API at once.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: MonitorConfig,
+        get_entity: Callable[[HomeAssistant], VKCloudVisionEntity],
+        stagger: timedelta,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            LOGGER,
+            name=f"VK Cloud Vision monitor {config.camera_id}",
+            update_interval=max(stagger, timedelta(seconds=1)),
+        )
+        self.config = config
+        self._get_entity = get_entity
+        self._active_until = dt_util.utcnow()
+        self._interval = timedelta(seconds=config.interval)
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Listen to motion sensors, return a callback to stop listening."""
+        if not self.config.motion_sensors:
+            return lambda: None
+        return async_track_state_change_event(self.hass, self.config.motion_sensors, self._async_motion_changed)
+
+    @callback
+    def _async_motion_changed(self, event: Event[EventStateChangedData]) -> None:
+        new_state = event.data["new_state"]
+        if new_state is None or new_state.state != STATE_ON:
+            return
+        LOGGER.debug("Motion on %s, checking %s now", new_state.entity_id, self.config.camera_id)
+        self._mark_active()
+        self.hass.async_create_task(self.async_request_refresh())
+
+    def _mark_active(self) -> None:
+        self._active_until = dt_util.utcnow() + ACTIVE_WINDOW
+        self._interval = self.config.min_interval
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Detect objects and fire an event if the set of labels changed."""
+        try:
+            result = await self._get_entity(self.hass).async_detect_objects(
+                self.config.camera_id,
+                list(self.config.modes),
+                self.config.min_prob,
+                None,
+                BoundingBoxesType.NONE.value,
+                1,
+                DEFAULT_SNAPSHOT_INTERVAL_SEC,
+                1,
+                motion_filter=(self.config.motion_threshold, False) if self.config.motion_threshold else None,
+            )
+        except HomeAssistantError as err:
+            self.update_interval = self._interval
+            raise UpdateFailed(str(err)) from err
+
+        previous = self.data["labels"] if self.data else {}
+        # A static scene keeps the labels of the last call
+        labels = previous if result.get("skipped") else _label_counts(result["response"] or {})
+
+        # Speed up when the labels change or the local filter saw motion, a steady scene (e.g. a parked car) backs off
+        if labels != previous or (self.config.motion_threshold and result.get("skipped") is False):
+            self._mark_active()
+        elif dt_util.utcnow() >= self._active_until:
+            self._interval = min(self._interval * BACK_OFF_FACTOR, self.config.max_interval)
+        self.update_interval = self._interval
+
+        if labels != previous:
+            self.hass.bus.async_fire(EVENT_MONITOR, {
+                "camera_id": self.config.camera_id,
+                "labels": labels,
+                "added": sorted(labels.keys() - previous.keys()),
+                "removed": sorted(previous.keys() - labels.keys()),
+            })
+
+        return {
+            "labels": labels,
+            "interval": self._interval.total_seconds(),
+            "last_check": dt_util.utcnow().isoformat(),
+        }
@@ -0,0 +1,133 @@
+"""Local motion pre-filter for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from homeassistant.exceptions import HomeAssistantError
+from PIL import Image, UnidentifiedImageError
+
+JPEG_QUALITY = 90
+# Frames are compared at this width, a 160×90 float32 background is ~56 KiB per camera
+MOTION_WIDTH = 160
+BACKGROUND_ALPHA = 0.1
+PIXEL_THRESHOLD = 25
+# Motion cells of CELL_SIZE×CELL_SIZE pixels filter out single-pixel noise when building the motion box
+CELL_SIZE = 4
+CELL_THRESHOLD = 0.25
+MOTION_BOX_PADDING = 0.05
+MAX_MOTION_CAMERAS = 32
+
+
+@dataclass(frozen=True)
+class MotionResult:
+    """Changed area of a frame compared to the camera background."""
+
+    changed: float
+    box: tuple[int, int, int, int] | None
+
+    def as_dict(self) -> dict:
+        return {"changed": round(self.changed, 2), "box": list(self.box) if self.box else None}
+
+
+class MotionDetector:
+    """Running-average background per camera, compared on downsampled grayscale frames."""
+
+    def __init__(self) -> None:
+        self._backgrounds: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, camera_id: str, image_data: bytes) -> MotionResult:
+        """Compare a frame to the camera background and update the background.
+
+        The first frame of a camera (or after a resolution change) counts as
+        fully changed. Runs in the executor.
+        """
+        try:
+            image = Image.open(io.BytesIO(image_data))
+            frame_width, frame_height = image.size
+            small_height = max(CELL_SIZE, round(MOTION_WIDTH * frame_height / frame_width))
+            # Let the JPEG decoder downscale, so full-size frames are never decoded
+            image.draft("L", (MOTION_WIDTH, small_height))
+            frame = np.asarray(image.convert("L").resize((MOTION_WIDTH, small_height)), dtype=np.float32)
+        except UnidentifiedImageError as err:
+            raise HomeAssistantError("Unable to process image: bad data") from err
+
+        with self._lock:
+            background = self._backgrounds.get(camera_id)
+            if background is None or background.shape != frame.shape:
+                self._remember(camera_id, frame)
+                return MotionResult(100.0, (0, 0, frame_width, frame_height))
+
+            mask = np.abs(frame - background) > PIXEL_THRESHOLD
+            background += BACKGROUND_ALPHA * (frame - background)
+            self._backgrounds.move_to_end(camera_id)
+
+        changed = float(mask.mean()) * 100
+        return MotionResult(changed, _motion_box(mask, frame_width, frame_height))
+
+    def check_burst(self, camera_id: str, images: list[bytes]) -> MotionResult:
+        """Check snapshots of a burst in order, return the largest change and the union of motion boxes."""
+        results = [self.check(camera_id, image) for image in images]
+        boxes = [result.box for result in results if result.box is not None]
+        box = (
+            min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)
+        ) if boxes else None
+        return MotionResult(max(result.changed for result in results), box)
+
+    def reset(self) -> None:
+        """Forget backgrounds of all cameras."""
+        with self._lock:
+            self._backgrounds.clear()
+
+    def _remember(self, camera_id: str, frame: np.ndarray) -> None:
+        self._backgrounds[camera_id] = frame
+        self._backgrounds.move_to_end(camera_id)
+        while len(self._backgrounds) > MAX_MOTION_CAMERAS:
+            self._backgrounds.popitem(last=False)
+
+
+def _motion_box(mask: np.ndarray, frame_width: int, frame_height: int) -> tuple[int, int, int, int] | None:
+    """Return the padded frame box around motion cells, None if no cell moved."""
+    rows = mask.shape[0] // CELL_SIZE * CELL_SIZE
+    cols = mask.shape[1] // CELL_SIZE * CELL_SIZE
+    cells = mask[:rows, :cols].reshape(rows // CELL_SIZE, CELL_SIZE, cols // CELL_SIZE, CELL_SIZE).mean(axis=(1, 3))
+    moving = cells >= CELL_THRESHOLD
+    if not moving.any():
+        return None
+
+    cell_rows = np.flatnonzero(moving.any(axis=1))
+    cell_cols = np.flatnonzero(moving.any(axis=0))
+    scale_x = frame_width / mask.shape[1] * CELL_SIZE
+    scale_y = frame_height / mask.shape[0] * CELL_SIZE
+    pad_x = frame_width * MOTION_BOX_PADDING
+    pad_y = frame_height * MOTION_BOX_PADDING
+    return (
+        max(0, int(cell_cols[0] * scale_x - pad_x)),
+        max(0, int(cell_rows[0] * scale_y - pad_y)),
+        min(frame_width, int((cell_cols[-1] + 1) * scale_x + pad_x)),
+        min(frame_height, int((cell_rows[-1] + 1) * scale_y + pad_y)),
+    )
+
+
+def crop_to_box(image_data: bytes, box: tuple[int, int, int, int]) -> tuple[bytes, tuple[int, int]]:
+    """Crop a frame to a box clipped to the frame, return the JPEG and its (dx, dy) offset."""
+    try:
+        image = Image.open(io.BytesIO(image_data)).convert("RGB")
+    except UnidentifiedImageError as err:
+        raise HomeAssistantError("Unable to process image: bad data") from err
+
+    left, top = max(0, box[0]), max(0, box[1])
+    right, bottom = min(image.width, box[2]), min(image.height, box[3])
+    if right <= left or bottom <= top:
+        return image_data, (0, 0)
+
+    output = io.BytesIO()
+    image.crop((left, top, right, bottom)).save(output, format="JPEG", quality=JPEG_QUALITY)
+    return output.getvalue(), (left, top)
@@ -0,0 +1,299 @@
+"""Durable offline queue for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .api.vkcloud.vision import VKCloudVision
+from .api.vkcloud.vision.circuit import is_unavailable
+from .api.vkcloud.vision.frames import FrameData
+from .api.vkcloud.vision.response import LabelFilter
+from .const import DOMAIN, EVENT_QUEUED_RESULT, LOGGER
+from .history import VKCloudVisionHistory
+from .tiling import TILE_MERGE_THRESHOLD
+
+QUEUE_DIR = f"{DOMAIN}.queue"
+MAX_QUEUE_BYTES = 512 * 1024 * 1024
+MAX_QUEUE_AGE = timedelta(days=1)
+DRAIN_INTERVAL = timedelta(seconds=30)
+# Replayed requests are spaced out, so a recovering API isn't hit with the whole backlog at once
+DRAIN_REQUEST_DELAY = 2
+
+
+@dataclass
+class QueuedDetection:
+    """An object detection request waiting for the API to become available."""
+
+    id: str
+    camera_id: str
+    captured_at: str
+    queued_at: str
+    modes: list[str]
+    prob_threshold: float
+    # [{"name": image name, "frame": content hash}] of the uploaded crops or tiles
+    images: list[dict[str, str]]
+    # Label filter of the call, as `LabelFilter` names
+    include: list[str]
+    exclude: list[str]
+    # Map uploaded images back to full frames: (dx, dy) of crops by image name,
+    # or [frame name, [left, top, right, bottom]] of tiles
+    offsets: dict[str, list[int]]
+    tiles: dict[str, list[Any]]
+
+    @property
+    def frames(self) -> list[str]:
+        return [image["frame"] for image in self.images]
+
+
+class VKCloudVisionOfflineQueue:
+    """Bounded on-disk queue of detection requests, replayed once the API is available.
+
+    Frames are stored once per content hash under `.storage`, requests as
+    JSON files next to them. The oldest requests are dropped when the queue
+    exceeds `MAX_QUEUE_BYTES` or `MAX_QUEUE_AGE`.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, client: VKCloudVision, history: VKCloudVisionHistory | None = None
+    ) -> None:
+        """Initialize the queue."""
+        self.hass = hass
+        self._client = client
+        self._history = history
+        self._path = Path(hass.config.path(STORAGE_DIR, QUEUE_DIR))
+        self._requests: list[QueuedDetection] = []
+        self._frame_sizes: dict[str, int] = {}
+        # Held while requests and frames are added or removed, so a removal can't delete a frame being queued
+        self._lock = asyncio.Lock()
+        self._draining = False
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    @property
+    def size(self) -> int:
+        return sum(self._frame_sizes.values())
+
+    async def async_load(self) -> None:
+        """Load queued requests left by a previous run."""
+        self._requests, self._frame_sizes = await self.hass.async_add_executor_job(self._load)
+        if self._requests:
+            LOGGER.info("%d queued detection requests to replay", len(self._requests))
+
+    def _load(self) -> tuple[list[QueuedDetection], dict[str, int]]:
+        (self._path / "frames").mkdir(parents=True, exist_ok=True)
+        (self._path / "requests").mkdir(exist_ok=True)
+
+        requests = []
+        for file in sorted((self._path / "requests").glob("*.json")):
+            try:
+                requests.append(QueuedDetection(**json.loads(file.read_text())))
+            except (OSError, ValueError, TypeError) as err:
+                LOGGER.warning("Dropping unreadable queued request %s: %s", file.name, err)
+                file.unlink(missing_ok=True)
+
+        frame_sizes = {
+            file.name: file.stat().st_size for file in (self._path / "frames").iterdir() if file.suffix != ".tmp"
+        }
+        for request in [request for request in requests if not set(request.frames) <= frame_sizes.keys()]:
+            LOGGER.warning("Dropping queued request %s with missing frames", request.id)
+            requests.remove(request)
+            self._request_file(request).unlink(missing_ok=True)
+        # Frames left by interrupted writes and removals
+        referenced = {frame for request in requests for frame in request.frames}
+        for file in (self._path / "frames").iterdir():
+            if file.name not in referenced:
+                file.unlink(missing_ok=True)
+                frame_sizes.pop(file.name, None)
+        return requests, frame_sizes
+
+    async def async_enqueue(
+        self,
+        camera_id: str,
+        captured_at: datetime,
+        modes: list[str],
+        prob_threshold: float,
+        images_meta: list[dict[str, str]],
+        files: Sequence[FrameData],
+        label_filter: LabelFilter | None = None,
+        offsets: Mapping[str, tuple[int, int]] | None = None,
+        tiles: Mapping[str, tuple[str, tuple[int, int, int, int]]] | None = None,
+    ) -> str:
+        """Queue a detection request as it would have been sent, return its id.
+
+        `offsets` and `tiles` map the uploaded crops or tiles back to full
+        frames, like `translate` and `merge_tiles` of the response do.
+        """
+        request = QueuedDetection(
+            id=uuid.uuid4().hex,
+            camera_id=camera_id,
+            captured_at=captured_at.isoformat(),
+            queued_at=dt_util.utcnow().isoformat(),
+            modes=modes,
+            prob_threshold=prob_threshold,
+            images=[
+                {"name": meta["name"], "frame": hashlib.sha256(data).hexdigest()}
+                for meta, data in zip(images_meta, files)
+            ],
+            include=sorted(label_filter.include) if label_filter is not None else [],
+            exclude=sorted(label_filter.exclude) if label_filter is not None else [],
+            offsets={name: list(offset) for name, offset in (offsets or {}).items()},
+            tiles={name: [frame, list(box)] for name, (frame, box) in (tiles or {}).items()},
+        )
+        async with self._lock:
+            new_frames = {
+                frame: data for frame, data in zip(request.frames, files) if frame not in self._frame_sizes
+            }
+            await self.hass.async_add_executor_job(self._write, request, new_frames)
+            self._frame_sizes.update({frame: len(data) for frame, data in new_frames.items()})
+            self._requests.append(request)
+
+            # The drain doesn't run while the API is down, expired requests are dropped here as well
+            for expired in [other for other in self._requests if self._is_expired(other)]:
+                LOGGER.warning("Dropping expired detection %s of %s", expired.id, expired.camera_id)
+                await self._async_discard(expired)
+
+            # Evict the oldest requests, never the one just queued
+            while len(self._requests) > 1 and self.size > MAX_QUEUE_BYTES:
+                dropped = self._requests[0]
+                LOGGER.warning("Offline queue is full, dropping detection %s of %s", dropped.id, dropped.camera_id)
+                await self._async_discard(dropped)
+
+        LOGGER.debug("Queued detection %s for %s, %d requests in queue", request.id, camera_id, len(self._requests))
+        return request.id
+
+    def _write(self, request: QueuedDetection, frames: dict[str, FrameData]) -> None:
+        for frame, data in frames.items():
+            self._write_atomic(self._path / "frames" / frame, data)
+        self._write_atomic(self._request_file(request), json.dumps(asdict(request)).encode())
+
+    @staticmethod
+    def _write_atomic(path: Path, data: FrameData) -> None:
+        temp = path.with_suffix(".tmp")
+        with temp.open("wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        temp.replace(path)
+
+    def _request_file(self, request: QueuedDetection) -> Path:
+        # Sortable by queue time, so requests are replayed in order after a restart
+        queued_at = dt_util.parse_datetime(request.queued_at) or dt_util.utcnow()
+        return self._path / "requests" / f"{queued_at.strftime('%Y%m%dT%H%M%S%f')}_{request.id}.json"
+
+    @staticmethod
+    def _is_expired(request: QueuedDetection) -> bool:
+        captured_at = dt_util.parse_datetime(request.captured_at) or dt_util.utcnow()
+        return dt_util.utcnow() - captured_at > MAX_QUEUE_AGE
+
+    async def _async_remove(self, request: QueuedDetection) -> None:
+        """Remove a request and the frames no other request uses."""
+        async with self._lock:
+            await self._async_discard(request)
+
+    async def _async_discard(self, request: QueuedDetection) -> None:
+        """Remove a request with the lock held."""
+        if request not in self._requests:
+            # Evicted while being replayed
+            return
+        self._requests.remove(request)
+        still_used = {frame for other in self._requests for frame in other.frames}
+        unused = set(request.frames) - still_used
+        for frame in unused:
+            self._frame_sizes.pop(frame, None)
+        await self.hass.async_add_executor_job(self._remove_files, request, unused)
+
+    def _remove_files(self, request: QueuedDetection, frames: set[str]) -> None:
+        self._request_file(request).unlink(missing_ok=True)
+        for frame in frames:
+            (self._path / "frames" / frame).unlink(missing_ok=True)
+
+    def _read_frames(self, request: QueuedDetection) -> list[bytes]:
+        return [(self._path / "frames" / frame).read_bytes() for frame in request.frames]
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Start the drain worker, return a callback to stop it."""
+        return async_track_time_interval(self.hass, self._async_drain, DRAIN_INTERVAL)
+
+    async def _async_drain(self, _now: datetime | None = None) -> None:
+        """Replay queued requests oldest first while the API is available."""
+        if self._draining or not self._requests or not self._client.circuit.allow_request():
+            return
+        self._draining = True
+        try:
+            while self._requests:
+                request = self._requests[0]
+                if self._is_expired(request):
+                    LOGGER.warning("Dropping expired detection %s of %s", request.id, request.camera_id)
+                    await self._async_remove(request)
+                    continue
+
+                if not await self._async_replay(request):
+                    break
+                await asyncio.sleep(DRAIN_REQUEST_DELAY)
+        finally:
+            self._draining = False
+
+    async def _async_replay(self, request: QueuedDetection) -> bool:
+        """Send a queued request and fire its result, return False if the API is still unavailable."""
+        response = None
+        error = None
+        try:
+            files = await self.hass.async_add_executor_job(self._read_frames, request)
+            response = await self._client.objects.detect(
+                files=files,
+                modes=request.modes,
+                images=[{"name": image["name"]} for image in request.images],
+                prob_threshold=request.prob_threshold,
+                max_retries=1,
+                label_filter=LabelFilter.from_names(request.include, request.exclude),
+            )
+            if request.tiles:
+                response.merge_tiles(
+                    {name: (frame, tuple(box)) for name, (frame, box) in request.tiles.items()}, TILE_MERGE_THRESHOLD
+                )
+            elif request.offsets:
+                response.translate({name: (dx, dy) for name, (dx, dy) in request.offsets.items()})
+        except OSError as err:
+            # Frames lost or unreadable: retrying can't help, don't block the requests behind it
+            LOGGER.error("Dropping queued detection %s, unable to read its frames: %s", request.id, err)
+            error = str(err)
+        except Exception as err:
+            if is_unavailable(err):
+                LOGGER.debug("API still unavailable, keeping %d queued detections", len(self._requests))
+                return False
+            LOGGER.error("Queued detection %s failed: %s", request.id, err)
+            error = str(err)
+
+        if response is not None and self._history is not None:
+            captured_at = dt_util.parse_datetime(request.captured_at) or dt_util.utcnow()
+            self._history.async_record(request.camera_id, captured_at, response.data)
+
+        event_data: dict[str, Any] = {
+            "camera_id": request.camera_id,
+            "captured_at": request.captured_at,
+            "queued_at": request.queued_at,
+            "modes": request.modes,
+            "response": response.data if response is not None else None,
+            "error": error if response is None else response.error_message,
+        }
+        self.hass.bus.async_fire(EVENT_QUEUED_RESULT, event_data)
+        await self._async_remove(request)
+        return True
@@ -0,0 +1,45 @@
+"""Person crops for face recognition in VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import io
+from collections.abc import Sequence
+
+from homeassistant.exceptions import HomeAssistantError
+from PIL import Image, UnidentifiedImageError
+
+JPEG_QUALITY = 90
+MAX_PERSON_CROPS = 20
+PERSON_PROB_THRESHOLD = 0.3
+# Faces are in the upper part of a person box, keep some margin for heads cut by the detector
+UPPER_BODY_FRACTION = 0.5
+CROP_PADDING = 0.15
+MIN_CROP_SIZE = 32
+
+
+def crop_upper_bodies(
+    image_data: bytes, boxes: Sequence[Sequence[float]]
+) -> list[tuple[bytes, tuple[int, int]]]:
+    """Crop padded upper-body regions of person boxes and return them with their (dx, dy) offsets."""
+    try:
+        image = Image.open(io.BytesIO(image_data)).convert("RGB")
+    except UnidentifiedImageError as err:
+        raise HomeAssistantError("Unable to process image: bad data") from err
+
+    crops: list[tuple[bytes, tuple[int, int]]] = []
+    for x1, y1, x2, y2 in boxes[:MAX_PERSON_CROPS]:
+        width, height = x2 - x1, (y2 - y1) * UPPER_BODY_FRACTION
+        left = max(0, int(x1 - width * CROP_PADDING))
+        top = max(0, int(y1 - height * CROP_PADDING))
+        right = min(image.width, int(x2 + width * CROP_PADDING))
+        bottom = min(image.height, int(y1 + height * (1 + CROP_PADDING)))
+        if right - left < MIN_CROP_SIZE or bottom - top < MIN_CROP_SIZE:
+            continue
+
+        output = io.BytesIO()
+        image.crop((left, top, right, bottom)).save(output, format="JPEG", quality=JPEG_QUALITY)
+        crops.append((output.getvalue(), (left, top)))
+
+    return crops
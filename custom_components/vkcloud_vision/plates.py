@@ -0,0 +1,260 @@
+"""Licence plate consensus and known plate lookup for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from .const import (CONF_NAME, CONF_PLATE, CONF_PLATE_LIST,
+                    CONF_PLATE_MAX_DISTANCE, CONF_PLATES,
+                    DEFAULT_PLATE_MAX_DISTANCE, PLATE_LIST_ALLOW,
+                    PLATE_LIST_DENY)
+
+PLATE_MODE = "car_number"
+# Letters allowed on Russian plates have Latin lookalikes, the API may return either
+_CYRILLIC_TO_LATIN = str.maketrans("АВЕКМНОРСТУХ", "ABEKMHOPCTYX")
+
+CONSENSUS_WINDOW = timedelta(seconds=30)
+# Readings this close are votes for the same plate
+CONSENSUS_DISTANCE = 2
+ARRIVAL_COOLDOWN = timedelta(minutes=5)
+MAX_PLATE_CAMERAS = 32
+MAX_READINGS_PER_CAMERA = 64
+MAX_ANNOUNCED_PLATES = 256
+
+
+def normalize_plate(text: str) -> str:
+    """Return a plate in upper case Latin letters and digits only."""
+    return "".join(char for char in text.upper().translate(_CYRILLIC_TO_LATIN) if char.isalnum())
+
+
+def levenshtein(a: str, b: str, max_distance: int | None = None) -> int:
+    """Return the edit distance of two strings.
+
+    With `max_distance` the computation stops early and returns
+    `max_distance + 1` once the distance is known to exceed it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree of strings for lookups within an edit distance.
+
+    Children are keyed by their distance to the parent, so the triangle
+    inequality prunes every subtree outside `distance ± max_distance`.
+    """
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        """Initialize the tree."""
+        self._root: tuple[str, dict[int, Any]] | None = None
+        self._size = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, word: str) -> None:
+        if self._root is None:
+            self._root = (word, {})
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            distance = levenshtein(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self._size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """Return `(distance, word)` pairs within `max_distance`, closest first."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = levenshtein(word, node_word)
+            if distance <= max_distance:
+                found.append((distance, node_word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+
+@dataclass(frozen=True)
+class KnownPlate:
+    """A plate of the allow or deny list."""
+
+    plate: str
+    name: str
+    list: str
+
+    def as_dict(self, distance: int) -> dict[str, Any]:
+        return {"plate": self.plate, "name": self.name, "list": self.list, "distance": distance}
+
+
+class PlateIndex:
+    """Known plates, looked up exactly and then within `max_distance` edits with a BK-tree."""
+
+    def __init__(self, plates: Iterable[KnownPlate] = (), max_distance: int = DEFAULT_PLATE_MAX_DISTANCE) -> None:
+        """Initialize the index."""
+        self._plates: dict[str, KnownPlate] = {}
+        for plate in plates:
+            # A plate on both lists is denied
+            if plate.plate not in self._plates or plate.list == PLATE_LIST_DENY:
+                self._plates[plate.plate] = plate
+        self._tree = BKTree(self._plates)
+        self._max_distance = max_distance
+
+    def __len__(self) -> int:
+        return len(self._plates)
+
+    def match(self, plate: str) -> tuple[KnownPlate, int] | None:
+        """Return the closest known plate and its distance, the deny list wins ties."""
+        if known := self._plates.get(plate):
+            return known, 0
+        if not self._max_distance:
+            return None
+        candidates = self._tree.search(plate, self._max_distance)
+        if not candidates:
+            return None
+        closest = candidates[0][0]
+        best = min(
+            (self._plates[word] for distance, word in candidates if distance == closest),
+            key=lambda known: known.list != PLATE_LIST_DENY,
+        )
+        return best, closest
+
+
+def get_plate_index(options: Mapping[str, Any]) -> PlateIndex:
+    """Build the index of plates configured in the options. Runs in the executor."""
+    return PlateIndex(
+        (
+            KnownPlate(
+                plate=normalize_plate(plate[CONF_PLATE]),
+                name=plate.get(CONF_NAME) or plate[CONF_PLATE],
+                list=plate.get(CONF_PLATE_LIST) or PLATE_LIST_ALLOW,
+            )
+            for plate in options.get(CONF_PLATES, [])
+            if normalize_plate(plate.get(CONF_PLATE, ""))
+        ),
+        int(options.get(CONF_PLATE_MAX_DISTANCE, DEFAULT_PLATE_MAX_DISTANCE)),
+    )
+
+
+def plate_readings(response: Mapping[str, Any]) -> list[tuple[str, float]]:
+    """Return `(plate, prob)` of every plate read in every image of the `car_number` mode."""
+    readings = []
+    for image in response.get(PLATE_MODE) or []:
+        for label in image.get("labels", []):
+            if plate := normalize_plate(str(label.get("eng") or label.get("rus") or "")):
+                readings.append((plate, float(label.get("prob", 1))))
+    return readings
+
+
+@dataclass
+class _CameraPlates:
+    # (plate, prob, time) of recent readings
+    readings: deque[tuple[str, float, datetime]] = field(
+        default_factory=lambda: deque(maxlen=MAX_READINGS_PER_CAMERA)
+    )
+
+
+class PlateConsensus:
+    """Vote on plates across frames of a burst and successive calls, keyed by camera.
+
+    Readings within `CONSENSUS_DISTANCE` edits of each other are votes for
+    the same plate; the plate is built character by character from the
+    probability-weighted majority of readings of the most voted length.
+    """
+
+    def __init__(self, window: timedelta = CONSENSUS_WINDOW) -> None:
+        self._window = window
+        self._cameras: OrderedDict[str, _CameraPlates] = OrderedDict()
+        self._announced: OrderedDict[tuple[str, str], datetime] = OrderedDict()
+
+    def update(self, camera_id: str, readings: list[tuple[str, float]], now: datetime) -> list[dict[str, Any]]:
+        """Add readings of a call and return the consensus plates they vote for."""
+        state = self._cameras.pop(camera_id, None) or _CameraPlates()
+        self._cameras[camera_id] = state
+        while len(self._cameras) > MAX_PLATE_CAMERAS:
+            self._cameras.popitem(last=False)
+
+        while state.readings and now - state.readings[0][2] > self._window:
+            state.readings.popleft()
+        state.readings.extend((plate, prob, now) for plate, prob in readings)
+
+        results: dict[str, dict[str, Any]] = {}
+        for plate, _prob in readings:
+            votes = [
+                (other, prob) for other, prob, _time in state.readings
+                if levenshtein(plate, other, CONSENSUS_DISTANCE) <= CONSENSUS_DISTANCE
+            ]
+            consensus, confidence = _vote(votes)
+            if consensus not in results or results[consensus]["votes"] < len(votes):
+                results[consensus] = {"plate": consensus, "confidence": round(confidence, 3), "votes": len(votes)}
+        return list(results.values())
+
+    def announce(self, camera_id: str, plate: str, now: datetime) -> bool:
+        """Return True if a plate hasn't been announced on a camera within `ARRIVAL_COOLDOWN`."""
+        key = (camera_id, plate)
+        last = self._announced.pop(key, None)
+        if last is not None and now - last < ARRIVAL_COOLDOWN:
+            self._announced[key] = last
+            return False
+        self._announced[key] = now
+        while len(self._announced) > MAX_ANNOUNCED_PLATES:
+            self._announced.popitem(last=False)
+        return True
+
+    def reset(self) -> None:
+        """Forget readings and announced plates of all cameras."""
+        self._cameras.clear()
+        self._announced.clear()
+
+
+def _vote(votes: list[tuple[str, float]]) -> tuple[str, float]:
+    """Return the per-character weighted majority of readings and the share of weight it got."""
+    length_weights: dict[int, float] = {}
+    for plate, prob in votes:
+        length_weights[len(plate)] = length_weights.get(len(plate), 0) + prob
+    length = max(length_weights, key=lambda key: length_weights[key])
+    same_length = [(plate, prob) for plate, prob in votes if len(plate) == length]
+
+    chars = []
+    agreement = 0.0
+    for position in range(length):
+        weights: dict[str, float] = {}
+        for plate, prob in same_length:
+            weights[plate[position]] = weights.get(plate[position], 0) + prob
+        char = max(weights, key=lambda key: weights[key])
+        chars.append(char)
+        agreement += weights[char] / (sum(weights.values()) or 1)
+
+    total = sum(prob for _plate, prob in votes) or 1
+    return "".join(chars), agreement / max(length, 1) * length_weights[length] / total
@@ -0,0 +1,76 @@
+"""Frame quality scoring for snapshot bursts in VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import io
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from homeassistant.exceptions import HomeAssistantError
+from PIL import Image, UnidentifiedImageError
+
+# Frames are scored at this width, so sharpness values don't depend on the camera resolution
+QUALITY_WIDTH = 320
+MIN_BRIGHTNESS = 20
+MAX_BRIGHTNESS = 235
+MIN_CONTRAST = 8
+
+
+@dataclass(frozen=True)
+class FrameQuality:
+    """Sharpness (Laplacian variance), brightness and contrast of a frame."""
+
+    sharpness: float
+    brightness: float
+    contrast: float
+
+    @property
+    def exposed(self) -> bool:
+        """Return True unless the frame is too dark, too bright or flat."""
+        return MIN_BRIGHTNESS <= self.brightness <= MAX_BRIGHTNESS and self.contrast >= MIN_CONTRAST
+
+    def as_dict(self) -> dict:
+        return {
+            "sharpness": round(self.sharpness, 1),
+            "brightness": round(self.brightness, 1),
+            "contrast": round(self.contrast, 1),
+        }
+
+
+def score_frame(image_data: bytes) -> FrameQuality:
+    """Score a frame on a reduced grayscale decode."""
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        height = max(3, round(QUALITY_WIDTH * image.height / image.width))
+        image.draft("L", (QUALITY_WIDTH, height))
+        gray = np.asarray(image.convert("L").resize((QUALITY_WIDTH, height)), dtype=np.float32)
+    except UnidentifiedImageError as err:
+        raise HomeAssistantError("Unable to process image: bad data") from err
+
+    laplacian = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:] - 4 * gray[1:-1, 1:-1]
+    )
+    return FrameQuality(float(laplacian.var()), float(gray.mean()), float(gray.std()))
+
+
+def score_frames(images: Sequence[bytes]) -> list[FrameQuality]:
+    """Score frames of a burst. Runs in the executor."""
+    return [score_frame(image) for image in images]
+
+
+def select_frames(
+    qualities: Sequence[FrameQuality], best_frames: int | None, min_sharpness: float | None
+) -> list[int]:
+    """Return indices of frames to upload, best first.
+
+    With `min_sharpness` blurry and badly exposed frames are rejected, with
+    `best_frames` only the sharpest well exposed frames are kept.
+    """
+    candidates = range(len(qualities))
+    if min_sharpness is not None:
+        candidates = [i for i in candidates if qualities[i].exposed and qualities[i].sharpness >= min_sharpness]
+    ranked = sorted(candidates, key=lambda i: (qualities[i].exposed, qualities[i].sharpness), reverse=True)
+    return ranked[:best_frames] if best_frames else ranked
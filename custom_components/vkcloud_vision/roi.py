@@ -0,0 +1,85 @@
+"""Region of interest masks for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import io
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.exceptions import HomeAssistantError
+from PIL import Image, ImageDraw, UnidentifiedImageError
+
+from .const import CONF_CAMERA, CONF_POINTS, CONF_REGIONS_OF_INTEREST
+
+JPEG_QUALITY = 90
+
+
+def parse_polygon(points: str) -> list[tuple[float, float]]:
+    """Parse "x,y x,y ..." normalized (0–1) points.
+
+    Two points describe a rectangle (top-left and bottom-right corners),
+    three or more points describe a polygon.
+    """
+    polygon = []
+    for pair in points.replace(";", " ").split():
+        x, y = (float(v) for v in pair.split(","))
+        if not (0 <= x <= 1 and 0 <= y <= 1):
+            raise ValueError(f"Point {pair} is out of the 0–1 range")
+        polygon.append((x, y))
+
+    if len(polygon) == 2:
+        (x1, y1), (x2, y2) = polygon
+        polygon = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+
+    if len(polygon) < 3:
+        raise ValueError("At least two points (rectangle) or three points (polygon) are required")
+
+    return polygon
+
+
+class RegionOfInterest:
+    """Crop frames to a region of interest and map coordinates back."""
+
+    def __init__(self, polygon: list[tuple[float, float]]) -> None:
+        self.polygon = polygon
+
+    @property
+    def is_rectangle(self) -> bool:
+        xs = {x for x, _ in self.polygon}
+        ys = {y for _, y in self.polygon}
+        return len(self.polygon) == 4 and len(xs) == 2 and len(ys) == 2
+
+    def crop(self, image_data: bytes) -> tuple[bytes, tuple[int, int]]:
+        """Crop to the ROI bounding rectangle, blank pixels outside the polygon and return the (dx, dy) offset."""
+        try:
+            image = Image.open(io.BytesIO(image_data)).convert("RGB")
+        except UnidentifiedImageError as err:
+            raise HomeAssistantError("Unable to process image: bad data") from err
+
+        width, height = image.size
+        pixels = [(x * width, y * height) for x, y in self.polygon]
+        left = max(0, int(min(x for x, _ in pixels)))
+        top = max(0, int(min(y for _, y in pixels)))
+        right = min(width, int(round(max(x for x, _ in pixels))))
+        bottom = min(height, int(round(max(y for _, y in pixels))))
+
+        cropped = image.crop((left, top, right, bottom))
+        if not self.is_rectangle:
+            mask = Image.new("L", cropped.size, 0)
+            ImageDraw.Draw(mask).polygon([(x - left, y - top) for x, y in pixels], fill=255)
+            blank = Image.new("RGB", cropped.size, (0, 0, 0))
+            cropped = Image.composite(cropped, blank, mask)
+
+        output = io.BytesIO()
+        cropped.save(output, format="JPEG", quality=JPEG_QUALITY)
+        return output.getvalue(), (left, top)
+
+
+def get_camera_roi(options: Mapping[str, Any], camera_id: str) -> RegionOfInterest | None:
+    """Return the configured region of interest for a camera, if any."""
+    for entry in options.get(CONF_REGIONS_OF_INTEREST, []):
+        if entry.get(CONF_CAMERA) == camera_id:
+            return RegionOfInterest(parse_polygon(entry[CONF_POINTS]))
+    return None
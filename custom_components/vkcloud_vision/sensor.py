@@ -0,0 +1,143 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""VK Cloud Vision zone occupancy and monitoring sensors."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.core import HomeAssistant, callback, split_entity_id
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import slugify
+
+from .const import (CONF_CAMERA, CONF_NAME, CONF_ZONES, DOMAIN,
+                    SIGNAL_ENTRIES_UPDATED, SIGNAL_ZONE_OCCUPANCY)
+from .monitoring import VKCloudVisionMonitorCoordinator
+
+
+async def async_setup_platform(
+    hass: HomeAssistant,
+    _config: ConfigType,
+    async_add_entities: AddEntitiesCallback,
+    _discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    """Set up zone occupancy sensors for configured zones and for zones reported later."""
+    sensors: dict[tuple[str, str], VKCloudVisionZoneSensor] = {}
+
+    @callback
+    def async_zone_occupancy(camera_id: str, zone_name: str, occupancy: dict[str, Any]) -> None:
+        sensor = sensors.get((camera_id, zone_name))
+        if sensor is None:
+            sensor = sensors[(camera_id, zone_name)] = VKCloudVisionZoneSensor(camera_id, zone_name)
+            sensor.set_occupancy(occupancy)
+            async_add_entities([sensor])
+            return
+        sensor.set_occupancy(occupancy)
+        sensor.async_write_ha_state()
+
+    # The platform lives as long as Home Assistant does, like the image processing entity
+    async_dispatcher_connect(hass, SIGNAL_ZONE_OCCUPANCY, async_zone_occupancy)
+
+    monitor_sensors: dict[str, VKCloudVisionMonitorSensor] = {}
+
+    @callback
+    def async_entries_updated() -> None:
+        """Follow monitoring coordinators and zones of (re)loaded config entries."""
+        coordinators: dict[str, VKCloudVisionMonitorCoordinator] = {}
+        zones: set[tuple[str, str]] = set()
+        # The signal is sent while the entry is still being set up, so don't filter on the loaded state;
+        # unloaded entries have no monitors or zones left
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if (data := getattr(entry, "runtime_data", None)) is not None:
+                coordinators.update(data.monitors)
+                zones.update(data.zones)
+            else:
+                # Not set up yet, keep the sensors created from its options
+                zones.update((zone[CONF_CAMERA], zone[CONF_NAME]) for zone in entry.options.get(CONF_ZONES, []))
+
+        # Zones removed from the options, configured zones are added below
+        for key, zone_sensor in list(sensors.items()):
+            if key not in zones:
+                del sensors[key]
+                hass.async_create_task(zone_sensor.async_remove())
+        new_zone_sensors = [VKCloudVisionZoneSensor(*key) for key in sorted(zones - sensors.keys())]
+        for zone_sensor in new_zone_sensors:
+            sensors[(zone_sensor.camera_id, zone_sensor.zone_name)] = zone_sensor
+        async_add_entities(new_zone_sensors)
+
+        for camera_id, sensor in list(monitor_sensors.items()):
+            if coordinators.get(camera_id) is not sensor.coordinator:
+                del monitor_sensors[camera_id]
+                hass.async_create_task(sensor.async_remove())
+
+        new_sensors = [
+            VKCloudVisionMonitorSensor(coordinator)
+            for camera_id, coordinator in coordinators.items()
+            if camera_id not in monitor_sensors
+        ]
+        for sensor in new_sensors:
+            monitor_sensors[sensor.coordinator.config.camera_id] = sensor
+        async_add_entities(new_sensors)
+
+    async_entries_updated()
+    async_dispatcher_connect(hass, SIGNAL_ENTRIES_UPDATED, async_entries_updated)
+
+
+class VKCloudVisionZoneSensor(SensorEntity):
+    """Number of detected objects in a camera zone."""
+
+    _attr_should_poll = False
+    _attr_has_entity_name = True
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:vector-polygon"
+
+    def __init__(self, camera_id: str, zone_name: str) -> None:
+        """Initialize the sensor."""
+        self.camera_id = camera_id
+        self.zone_name = zone_name
+        self._attr_name = f"{split_entity_id(camera_id)[1]} {zone_name} occupancy"
+        self._attr_unique_id = f"vkcloud_vision_zone_{slugify(camera_id)}_{slugify(zone_name)}"
+        self._attr_device_info = dr.DeviceInfo(identifiers={(DOMAIN, "vkcloud_vision")})
+        self._attr_extra_state_attributes = {"camera_id": camera_id, "zone": zone_name, "labels": {}}
+
+    def set_occupancy(self, occupancy: dict[str, Any]) -> None:
+        """Update occupancy without writing state."""
+        self._attr_native_value = occupancy["count"]
+        self._attr_extra_state_attributes = {
+            "camera_id": self.camera_id,
+            "zone": self.zone_name,
+            "labels": occupancy["labels"],
+        }
+
+
+class VKCloudVisionMonitorSensor(CoordinatorEntity[VKCloudVisionMonitorCoordinator], SensorEntity):
+    """Number of objects seen by background monitoring of a camera."""
+
+    _attr_has_entity_name = True
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:cctv"
+
+    def __init__(self, coordinator: VKCloudVisionMonitorCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        camera_id = coordinator.config.camera_id
+        self._attr_name = f"{split_entity_id(camera_id)[1]} monitored objects"
+        self._attr_unique_id = f"vkcloud_vision_monitor_{slugify(camera_id)}"
+        self._attr_device_info = dr.DeviceInfo(identifiers={(DOMAIN, "vkcloud_vision")})
+
+    @property
+    def native_value(self) -> int | None:
+        if not self.coordinator.data:
+            return None
+        return sum(self.coordinator.data["labels"].values())
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return {"camera_id": self.coordinator.config.camera_id, **(self.coordinator.data or {})}
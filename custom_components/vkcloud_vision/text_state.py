@@ -0,0 +1,40 @@
+"""Per-camera text change detection for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections import Counter, OrderedDict
+from typing import Any
+
+MAX_TEXT_CAMERAS = 32
+
+
+class TextStateCache:
+    """Remember the last text lines read on each camera and report what changed.
+
+    Lines are compared as a multiset with whitespace collapsed, so lines
+    that only moved or were read in another order don't count as a change.
+    """
+
+    def __init__(self) -> None:
+        self._cameras: OrderedDict[str, Counter[str]] = OrderedDict()
+
+    def update(self, camera_id: str, lines: list[str]) -> tuple[bool, dict[str, Any]]:
+        """Store the lines read on a camera, return whether they changed and the `added`/`removed` lines."""
+        current = Counter(" ".join(line.split()) for line in lines)
+        current.pop("", None)
+        previous = self._cameras.pop(camera_id, None)
+        self._cameras[camera_id] = current
+        while len(self._cameras) > MAX_TEXT_CAMERAS:
+            self._cameras.popitem(last=False)
+
+        if previous is None:
+            previous = Counter()
+        added = list((current - previous).elements())
+        removed = list((previous - current).elements())
+        return bool(added or removed), {"added": added, "removed": removed}
+
+    def reset(self) -> None:
+        """Forget the text of all cameras."""
+        self._cameras.clear()
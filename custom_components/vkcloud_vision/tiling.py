@@ -0,0 +1,72 @@
+"""Tiled detection helpers for high-resolution cameras."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import io
+
+from homeassistant.exceptions import HomeAssistantError
+from PIL import Image, UnidentifiedImageError
+
+JPEG_QUALITY = 90
+TILE_GROWTH_FACTOR = 1.25
+TILE_MERGE_THRESHOLD = 0.6
+
+
+def _tile_starts(length: int, tile: int, overlap: int) -> list[int]:
+    """Return tile start positions covering `length`, the last tile aligned to the edge."""
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def plan_tiles(
+    width: int, height: int, tile_size: int, overlap: int, max_tiles: int
+) -> list[tuple[int, int, int, int]]:
+    """Return (left, top, right, bottom) tiles covering the frame.
+
+    The tile size grows until the grid fits into `max_tiles`, so very large
+    frames are still covered completely.
+    """
+    tile = tile_size
+    while True:
+        xs = _tile_starts(width, tile, overlap)
+        ys = _tile_starts(height, tile, overlap)
+        if len(xs) * len(ys) <= max_tiles:
+            break
+        tile = int(tile * TILE_GROWTH_FACTOR)
+
+    return [(x, y, min(width, x + tile), min(height, y + tile)) for y in ys for x in xs]
+
+
+def split_into_tiles(
+    image_data: bytes, tile_size: int, overlap: int, max_tiles: int, full_frame: bool = False
+) -> list[tuple[bytes, tuple[int, int, int, int]]]:
+    """Split a frame into overlapping JPEG tiles and return them with their (left, top, right, bottom) boxes.
+
+    With `full_frame` the whole frame is sent first as one of the `max_tiles`
+    images, so large objects crossing tile borders are also detected in one
+    piece. A frame that fits into a single tile is returned as is.
+    """
+    try:
+        image = Image.open(io.BytesIO(image_data)).convert("RGB")
+    except UnidentifiedImageError as err:
+        raise HomeAssistantError("Unable to process image: bad data") from err
+
+    frame_box = (0, 0, image.width, image.height)
+    grid_tiles = max_tiles - 1 if full_frame else max_tiles
+    boxes = plan_tiles(image.width, image.height, tile_size, overlap, grid_tiles) if grid_tiles > 0 else []
+    if len(boxes) <= 1:
+        return [(image_data, frame_box)]
+
+    tiles: list[tuple[bytes, tuple[int, int, int, int]]] = [(image_data, frame_box)] if full_frame else []
+    for box in boxes:
+        output = io.BytesIO()
+        image.crop(box).save(output, format="JPEG", quality=JPEG_QUALITY)
+        tiles.append((output.getvalue(), box))
+
+    return tiles
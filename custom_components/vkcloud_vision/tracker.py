@@ -0,0 +1,132 @@
+"""Per-camera object tracking for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+
+from .api.vkcloud.vision.nms import box_iou
+
+DEFAULT_TRACK_IOU_THRESHOLD = 0.3
+DEFAULT_TRACK_MAX_AGE = timedelta(seconds=30)
+DEFAULT_TRACK_DWELL_TIME = timedelta(seconds=60)
+MAX_TRACKS_PER_CAMERA = 64
+MAX_TRACKED_CAMERAS = 32
+
+
+@dataclass
+class Track:
+    """A single tracked object."""
+
+    track_id: int
+    label: str
+    coord: list[float]
+    first_seen: datetime
+    last_seen: datetime
+    hits: int = 1
+    dwell_reported: bool = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "track_id": self.track_id,
+            "label": self.label,
+            "coord": self.coord,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+            "dwell_sec": round((self.last_seen - self.first_seen).total_seconds(), 1),
+        }
+
+
+@dataclass
+class _CameraTracks:
+    next_id: int = 1
+    tracks: dict[int, Track] = field(default_factory=dict)
+
+
+class ObjectTracker:
+    """SORT-style tracker that associates labels across calls by IoU, keyed by camera."""
+
+    def __init__(
+        self,
+        iou_threshold: float = DEFAULT_TRACK_IOU_THRESHOLD,
+        max_age: timedelta = DEFAULT_TRACK_MAX_AGE,
+        dwell_time: timedelta = DEFAULT_TRACK_DWELL_TIME,
+    ) -> None:
+        self._iou_threshold = iou_threshold
+        self._max_age = max_age
+        self._dwell_time = dwell_time
+        self._cameras: OrderedDict[str, _CameraTracks] = OrderedDict()
+
+    def update(self, camera_id: str, labels: list[dict[str, Any]], now: datetime) -> dict[str, list[dict[str, Any]]]:
+        """Associate labels with existing tracks, set `track_id` on each label and return track events."""
+        state = self._cameras.pop(camera_id, None) or _CameraTracks()
+        self._cameras[camera_id] = state
+        while len(self._cameras) > MAX_TRACKED_CAMERAS:
+            self._cameras.popitem(last=False)
+
+        events: dict[str, list[dict[str, Any]]] = {"entered": [], "exited": [], "dwelling": []}
+
+        detections: dict[str, list[dict[str, Any]]] = {}
+        for label in labels:
+            name = label.get("eng") or label.get("tag")
+            if name and label.get("coord"):
+                detections.setdefault(name, []).append(label)
+
+        matched: set[int] = set()
+        for name, group in detections.items():
+            candidates = [t for t in state.tracks.values() if t.label == name]
+            assigned = self._associate(candidates, group)
+
+            for label_idx, label in enumerate(group):
+                track = assigned.get(label_idx)
+                if track is None:
+                    track = Track(state.next_id, name, list(label["coord"]), now, now)
+                    state.tracks[track.track_id] = track
+                    state.next_id += 1
+                    events["entered"].append(track.as_dict())
+                else:
+                    track.coord = list(label["coord"])
+                    track.last_seen = now
+                    track.hits += 1
+                matched.add(track.track_id)
+                label["track_id"] = track.track_id
+
+        for track_id, track in list(state.tracks.items()):
+            if track_id not in matched and now - track.last_seen > self._max_age:
+                del state.tracks[track_id]
+                events["exited"].append(track.as_dict())
+            elif not track.dwell_reported and track.last_seen - track.first_seen >= self._dwell_time:
+                track.dwell_reported = True
+                events["dwelling"].append(track.as_dict())
+
+        # Keep per-camera state bounded: forget the tracks that were seen least recently
+        if len(state.tracks) > MAX_TRACKS_PER_CAMERA:
+            stale = sorted(state.tracks.values(), key=lambda t: t.last_seen)[:len(state.tracks) - MAX_TRACKS_PER_CAMERA]
+            for track in stale:
+                del state.tracks[track.track_id]
+
+        return events
+
+    def reset(self) -> None:
+        """Forget tracks of all cameras."""
+        self._cameras.clear()
+
+    def _associate(self, tracks: list[Track], labels: list[dict[str, Any]]) -> dict[int, Track]:
+        """Greedily match labels to tracks by descending IoU."""
+        if not tracks:
+            return {}
+
+        iou = box_iou(np.array([label["coord"] for label in labels]), np.array([t.coord for t in tracks]))
+        assigned: dict[int, Track] = {}
+        while iou.size and iou.max() >= self._iou_threshold:
+            label_idx, track_idx = np.unravel_index(int(np.argmax(iou)), iou.shape)
+            assigned[int(label_idx)] = tracks[int(track_idx)]
+            iou[label_idx, :] = -1
+            iou[:, track_idx] = -1
+        return assigned
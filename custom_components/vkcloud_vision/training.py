@@ -0,0 +1,285 @@
+"""Bulk face training from labelled photos for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+import hashlib
+import io
+import re
+import zipfile
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .const import DOMAIN, EVENT_TRAINING_PROGRESS, LOGGER
+from .data import VKCloudVisionData
+
+STORAGE_KEY = f"{DOMAIN}.training"
+STORAGE_VERSION = 1
+
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+MAX_PHOTO_SIDE = 1280
+JPEG_QUALITY = 90
+BATCH_SIZE = 20
+MAX_CONCURRENT_REQUESTS = 3
+
+
+@dataclass(frozen=True)
+class TrainingPhoto:
+    """A labelled photo in a directory or zip archive."""
+
+    label: str
+    name: str
+
+
+def _photo_label(name: str) -> str:
+    """Return the label of a photo: its directory, or the file name without a trailing number."""
+    path = PurePosixPath(name)
+    if len(path.parts) > 1:
+        return path.parts[-2]
+    return re.sub(r"[\s_-]*\d+$", "", path.stem) or path.stem
+
+
+def _is_photo(name: str) -> bool:
+    path = PurePosixPath(name)
+    return (
+        path.suffix.lower() in PHOTO_EXTENSIONS
+        and not any(part.startswith(".") or part == "__MACOSX" for part in path.parts)
+    )
+
+
+def list_photos(path: str) -> list[TrainingPhoto]:
+    """List labelled photos in a directory or zip archive.
+
+    Photos in a subdirectory are labelled with the subdirectory name, photos in
+    the root with their file name (`anna.jpg`, `anna_2.jpg` → `anna`).
+    """
+    source = Path(path)
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    elif source.is_dir():
+        names = [file.relative_to(source).as_posix() for file in source.rglob("*") if file.is_file()]
+    else:
+        raise HomeAssistantError(f"{path} is neither a directory nor a zip archive")
+
+    return [TrainingPhoto(_photo_label(name), name) for name in sorted(names) if _is_photo(name)]
+
+
+def _read_photos(path: str, photos: list[TrainingPhoto]) -> Iterator[bytes]:
+    source = Path(path)
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for photo in photos:
+                yield archive.read(photo.name)
+    else:
+        for photo in photos:
+            yield (source / photo.name).read_bytes()
+
+
+def hash_photos(path: str, photos: list[TrainingPhoto]) -> list[str]:
+    """Return content hashes of photos."""
+    return [hashlib.sha256(data).hexdigest() for data in _read_photos(path, photos)]
+
+
+def load_photos(path: str, photos: list[TrainingPhoto]) -> list[bytes | None]:
+    """Load photos downscaled to `MAX_PHOTO_SIDE` as JPEG, None for unreadable ones."""
+    loaded: list[bytes | None] = []
+    for photo, data in zip(photos, _read_photos(path, photos)):
+        try:
+            image = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).convert("RGB")
+        except (UnidentifiedImageError, OSError) as err:
+            LOGGER.warning("Skipping unreadable photo %s: %s", photo.name, err)
+            loaded.append(None)
+            continue
+        image.thumbnail((MAX_PHOTO_SIDE, MAX_PHOTO_SIDE))
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=JPEG_QUALITY)
+        loaded.append(output.getvalue())
+    return loaded
+
+
+async def async_forget_space(hass: HomeAssistant, space: int) -> None:
+    """Forget ingested photo hashes of a truncated space, so they can be trained again."""
+    store: Store[dict[str, list[str]]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+    hashes = await store.async_load() or {}
+    if hashes.pop(str(space), None) is not None:
+        await store.async_save(hashes)
+
+
+class _TrainingRun:
+    """State of a single `train_persons` call."""
+
+    def __init__(self, hass: HomeAssistant, path: str, space: int) -> None:
+        self.hass = hass
+        self.path = path
+        self.space = space
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.total = 0
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: list[str] = []
+        self.ingested: set[str] = set()
+
+    def report(self) -> None:
+        self.hass.bus.async_fire(EVENT_TRAINING_PROGRESS, {
+            "space": self.space,
+            "total": self.total,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        })
+
+    async def run_batches(
+        self,
+        batch: list[tuple[TrainingPhoto, str]],
+        send: Callable[[list[tuple[TrainingPhoto, str]], list[bytes]], Awaitable[list[bool]]],
+    ) -> None:
+        """Send photos in batches of `BATCH_SIZE` with bounded concurrency."""
+        async def send_batch(chunk: list[tuple[TrainingPhoto, str]]) -> None:
+            async with self.semaphore:
+                loaded = await self.hass.async_add_executor_job(
+                    load_photos, self.path, [photo for photo, _ in chunk]
+                )
+                readable = [(item, data) for item, data in zip(chunk, loaded) if data is not None]
+                self.failed += len(chunk) - len(readable)
+                try:
+                    results = await send([item for item, _ in readable], [data for _, data in readable])
+                except Exception as err:
+                    LOGGER.error("Training batch failed: %s", err)
+                    self.errors.append(str(err))
+                    results = [False] * len(readable)
+                for (_, digest), ok in zip((item for item, _ in readable), results):
+                    if ok:
+                        self.ingested.add(digest)
+                    else:
+                        self.failed += 1
+                self.processed += len(chunk)
+                self.report()
+
+        await asyncio.gather(*(send_batch(batch[i:i + BATCH_SIZE]) for i in range(0, len(batch), BATCH_SIZE)))
+
+
+async def async_train_persons(hass: HomeAssistant, data: VKCloudVisionData, path: str, space: int) -> dict[str, Any]:
+    """Train persons of a space from a directory or zip archive of labelled photos.
+
+    New labels are enrolled with one `persons/recognize(create_new=True)` photo
+    each, the next photo of a label is tried if no face is found on one. All
+    other photos are attached to their person with `persons/set`.
+    Photos already ingested into the space are skipped by content hash.
+    """
+    store: Store[dict[str, list[str]]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+    hashes = await store.async_load() or {}
+    known = set(hashes.get(str(space), []))
+
+    photos = await hass.async_add_executor_job(list_photos, path)
+    if not photos:
+        raise HomeAssistantError(f"No photos found in {path}")
+    digests = await hass.async_add_executor_job(hash_photos, path, photos)
+
+    run = _TrainingRun(hass, path, space)
+    run.total = len(photos)
+    pending: list[tuple[TrainingPhoto, str]] = []
+    seen = set(known)
+    for photo, digest in zip(photos, digests):
+        if digest in seen:
+            run.skipped += 1
+            run.processed += 1
+        else:
+            seen.add(digest)
+            pending.append((photo, digest))
+    run.report()
+
+    # Labels that already have a person in the space
+    person_ids = {alias: int(tag.removeprefix("person")) for tag, alias in data.aliases.tag_to_alias_map(space).items()}
+    # Photos of labels without a person, in the order they are tried for enrollment
+    candidates: dict[str, list[tuple[TrainingPhoto, str]]] = {}
+    for item in pending:
+        if item[0].label not in person_ids:
+            candidates.setdefault(item[0].label, []).append(item)
+    enrolled: dict[str, int] = {}
+
+    async def send_recognize(items: list[tuple[TrainingPhoto, str]], files: list[bytes]) -> list[bool]:
+        names = [f"photo{i}" for i in range(len(items))]
+        response = await data.client.persons.recognize(
+            files=files,
+            space=space,
+            images=[{"name": name} for name in names],
+            create_new=True,
+            update_embedding=True,
+            max_retries=1,
+        )
+        results = []
+        for (photo, _), name in zip(items, names):
+            persons = [
+                person for person in response.persons_by_image.get(name, [])
+                if person.get("tag", "undefined") != "undefined"
+            ]
+            if not persons:
+                run.errors.append(f"{photo.name}: no face found")
+                results.append(False)
+                continue
+            best = max(persons, key=lambda person: person.get("confidence", 0))
+            enrolled[photo.label] = int(best["tag"].removeprefix("person"))
+            results.append(True)
+        return results
+
+    async def send_set(items: list[tuple[TrainingPhoto, str]], files: list[bytes]) -> list[bool]:
+        names = [f"photo{i}" for i in range(len(items))]
+        response = await data.client.persons.set(
+            files=files,
+            space=space,
+            images=[
+                {"name": name, "person_id": person_ids[photo.label]}
+                for (photo, _), name in zip(items, names)
+            ],
+        )
+        status = {obj.get("name"): obj for obj in response.get("objects", [])}
+        results = []
+        for (photo, _), name in zip(items, names):
+            obj = status.get(name, {})
+            if obj.get("status", 0) != 0:
+                run.errors.append(f"{photo.name}: {obj.get('error', 'unknown')}")
+                results.append(False)
+            else:
+                results.append(True)
+        return results
+
+    # One photo per label and round, until every label is enrolled or has no photos left to try
+    tried: set[tuple[TrainingPhoto, str]] = set()
+    while attempt := [photos.pop(0) for label, photos in candidates.items() if photos and label not in enrolled]:
+        tried.update(attempt)
+        await run.run_batches(attempt, send_recognize)
+    person_ids.update(enrolled)
+
+    # Photos of labels that couldn't be enrolled were all tried above
+    await run.run_batches([item for item in pending if item not in tried], send_set)
+
+    # One alias update and one hash log write for the whole run
+    data.aliases.async_set_many(space, {person_id: label for label, person_id in enrolled.items()})
+    hashes[str(space)] = sorted(known | run.ingested)
+    await store.async_save(hashes)
+
+    LOGGER.info(
+        "Trained space %s from %s: %d photos, %d skipped, %d failed, %d new persons",
+        space, path, run.total, run.skipped, run.failed, len(enrolled),
+    )
+    return {
+        "total": run.total,
+        "trained": len(run.ingested),
+        "skipped": run.skipped,
+        "failed": run.failed,
+        "persons": {
+            photo.label: f"person{person_ids[photo.label]}" for photo in photos if photo.label in person_ids
+        },
+        "errors": run.errors,
+    }
@@ -0,0 +1,169 @@
+"""Live result stream over the WebSocket API for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (async_dispatcher_connect,
+                                              async_dispatcher_send)
+
+from .api.vkcloud.vision.frames import FrameData
+from .bounding_boxes import DEFAULT_COLOR, BoundingBoxes
+from .const import (ANALYSIS_TEXT, ATTR_ANALYSES, ATTR_CAMERA_IDS,
+                    ATTR_FRAME_WIDTH, ATTR_LABELS, ATTR_MIN_PROB, LOGGER,
+                    SIGNAL_LIVE_RESULT, VALID_ANALYSES, BoundingBoxesType)
+
+WS_TYPE_SUBSCRIBE = "vkcloud_vision/subscribe"
+FRAME_QUALITY = 70
+
+
+@dataclass
+class LiveResult:
+    """A result of one analysis of a camera snapshot, as published to subscribers."""
+
+    camera_id: str
+    # One of VALID_ANALYSES
+    kind: str
+    timestamp: datetime
+    labels: list[dict[str, Any]]
+    # Kind-specific fields of the message, e.g. recognized text
+    data: dict[str, Any] = field(default_factory=dict)
+    image: FrameData | None = None
+    # Labels to draw on the frame if they aren't `labels` (e.g. words of recognized lines)
+    frame_labels: list[dict[str, Any]] | None = None
+    bounding_boxes: BoundingBoxesType = BoundingBoxesType.RUS
+    color: tuple[int, int, int] = DEFAULT_COLOR
+
+
+@callback
+def async_publish_result(hass: HomeAssistant, result: LiveResult) -> None:
+    """Send a result to live subscribers."""
+    async_dispatcher_send(hass, SIGNAL_LIVE_RESULT, result)
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe)
+
+
+def _label_names(label: dict[str, Any]) -> set[str]:
+    return {str(label[key]).lower() for key in ("eng", "rus", "tag", "alias") if label.get(key)}
+
+
+def _label_prob(label: dict[str, Any]) -> float:
+    return float(label.get("prob", label.get("similarity", 1.0)))
+
+
+class _Subscription:
+    """Filters of one subscription and frames being rendered for it."""
+
+    def __init__(self, hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+        self.hass = hass
+        self.connection = connection
+        self.msg_id: int = msg["id"]
+        self.cameras = set(msg.get(ATTR_CAMERA_IDS) or ())
+        self.kinds = set(msg[ATTR_ANALYSES])
+        self.labels = {name.strip().lower() for name in msg.get(ATTR_LABELS) or ()}
+        self.min_prob: float | None = msg.get(ATTR_MIN_PROB)
+        self.frame_width: int | None = msg.get(ATTR_FRAME_WIDTH)
+        # Camera -> frame being rendered, newer frames of a busy camera are dropped
+        self._rendering: dict[str, asyncio.Task] = {}
+
+    def _matches(self, label: dict[str, Any]) -> bool:
+        if self.labels and not _label_names(label) & self.labels:
+            return False
+        return self.min_prob is None or _label_prob(label) >= self.min_prob
+
+    @callback
+    def async_handle(self, result: LiveResult) -> None:
+        if self.cameras and result.camera_id not in self.cameras:
+            return
+        if result.kind not in self.kinds:
+            return
+
+        labels = result.labels
+        frame_labels = result.frame_labels if result.frame_labels is not None else result.labels
+        # Recognized text has no names or probabilities to filter by
+        if result.kind != ANALYSIS_TEXT and (self.labels or self.min_prob is not None):
+            labels = [label for label in labels if self._matches(label)]
+            if not labels:
+                return
+            frame_labels = [label for label in frame_labels if self._matches(label)]
+
+        self.connection.send_message(websocket_api.event_message(self.msg_id, {
+            "type": "result",
+            "camera_id": result.camera_id,
+            "kind": result.kind,
+            "timestamp": result.timestamp.isoformat(),
+            "labels": labels,
+            **result.data,
+        }))
+
+        if self.frame_width is None or result.image is None or result.camera_id in self._rendering:
+            return
+        boxes = BoundingBoxes(result.image, [], BoundingBoxesType.NONE)
+        boxes.add_layer(frame_labels, result.bounding_boxes, result.color)
+        task = self.hass.async_create_background_task(
+            self._async_send_frame(result, boxes), f"{WS_TYPE_SUBSCRIBE} frame {result.camera_id}"
+        )
+        self._rendering[result.camera_id] = task
+        task.add_done_callback(lambda _task: self._rendering.pop(result.camera_id, None))
+
+    async def _async_send_frame(self, result: LiveResult, boxes: BoundingBoxes) -> None:
+        try:
+            frame = await self.hass.async_add_executor_job(boxes.to_jpeg, self.frame_width, FRAME_QUALITY)
+        except Exception as err:
+            LOGGER.debug("Unable to render a live frame of %s: %s", result.camera_id, err)
+            return
+        self.connection.send_message(websocket_api.event_message(self.msg_id, {
+            "type": "frame",
+            "camera_id": result.camera_id,
+            "kind": result.kind,
+            "timestamp": result.timestamp.isoformat(),
+            "content_type": "image/jpeg",
+            "image": base64.b64encode(frame).decode(),
+        }))
+
+    @callback
+    def async_cancel(self) -> None:
+        for task in list(self._rendering.values()):
+            task.cancel()
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): WS_TYPE_SUBSCRIBE,
+    vol.Optional(ATTR_CAMERA_IDS): vol.All(cv.ensure_list, [cv.entity_id]),
+    vol.Optional(ATTR_ANALYSES, default=VALID_ANALYSES): vol.All(cv.ensure_list, [vol.In(VALID_ANALYSES)]),
+    vol.Optional(ATTR_LABELS): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_MIN_PROB): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+    vol.Optional(ATTR_FRAME_WIDTH): vol.All(vol.Coerce(int), vol.Range(min=64, max=1920)),
+})
+@callback
+def ws_subscribe(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+    """Stream results of detection, face and text recognition as they are produced.
+
+    Results are filtered by camera, kind, label names and probability on the
+    server. With `frame_width` the snapshot, downscaled and annotated, follows
+    its result in a separate `frame` message.
+    """
+    subscription = _Subscription(hass, connection, msg)
+    unsub = async_dispatcher_connect(hass, SIGNAL_LIVE_RESULT, subscription.async_handle)
+
+    @callback
+    def async_unsubscribe() -> None:
+        unsub()
+        subscription.async_cancel()
+
+    connection.subscriptions[msg["id"]] = async_unsubscribe
+    connection.send_result(msg["id"])
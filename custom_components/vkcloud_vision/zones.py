@@ -0,0 +1,96 @@
+"""Polygon zone occupancy for VK Cloud Vision integration."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections.abc import Mapping
+from typing import Any
+
+import numpy as np
+
+from .const import CONF_CAMERA, CONF_NAME, CONF_POINTS, CONF_ZONES
+from .roi import parse_polygon
+
+
+def points_in_polygons(points: np.ndarray, polygons: list[np.ndarray]) -> np.ndarray:
+    """Return an (N, Z) mask of which of N points fall into which of Z polygons.
+
+    All polygon edges are stacked into one array so the even-odd ray casting
+    test runs over every point × edge pair at once.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if not polygons or points.shape[0] == 0:
+        return np.zeros((points.shape[0], len(polygons)), dtype=bool)
+
+    starts = np.concatenate(polygons)
+    ends = np.concatenate([np.roll(polygon, -1, axis=0) for polygon in polygons])
+    edge_zone = np.repeat(np.arange(len(polygons)), [len(polygon) for polygon in polygons])
+
+    px = points[:, 0:1]
+    py = points[:, 1:2]
+    x1, y1 = starts[:, 0], starts[:, 1]
+    x2, y2 = ends[:, 0], ends[:, 1]
+
+    straddles = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    crossings = straddles & (px < x_cross)
+
+    zone_onehot = np.zeros((len(edge_zone), len(polygons)), dtype=np.int64)
+    zone_onehot[np.arange(len(edge_zone)), edge_zone] = 1
+    return (crossings.astype(np.int64) @ zone_onehot) % 2 == 1
+
+
+def get_camera_zones(options: Mapping[str, Any], camera_id: str) -> dict[str, list[tuple[float, float]]]:
+    """Return configured zone polygons for a camera."""
+    return {
+        zone[CONF_NAME]: parse_polygon(zone[CONF_POINTS])
+        for zone in options.get(CONF_ZONES, [])
+        if zone.get(CONF_CAMERA) == camera_id
+    }
+
+
+class ZoneEngine:
+    """Keep per-camera zone occupancy and report changes."""
+
+    def __init__(self) -> None:
+        self._occupancy: dict[tuple[str, str], dict[str, Any]] = {}
+
+    def reset(self) -> None:
+        """Forget occupancy of all zones."""
+        self._occupancy.clear()
+
+    def update(
+        self,
+        camera_id: str,
+        zones: Mapping[str, list[tuple[float, float]]],
+        labels: list[dict[str, Any]],
+        frame_size: tuple[int, int],
+    ) -> tuple[dict[str, dict[str, Any]], list[str]]:
+        """Assign labels to zones by their box anchor (bottom center) and return occupancy and changed zone names."""
+        width, height = frame_size
+        boxed = [label for label in labels if label.get("coord")]
+        anchors = np.array(
+            [[(label["coord"][0] + label["coord"][2]) / 2 / width, label["coord"][3] / height] for label in boxed],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+
+        names = list(zones)
+        inside = points_in_polygons(anchors, [np.asarray(zones[name], dtype=np.float64) for name in names])
+
+        occupancy: dict[str, dict[str, Any]] = {}
+        changed: list[str] = []
+        for zone_idx, name in enumerate(names):
+            label_counts: dict[str, int] = {}
+            for label_idx in np.flatnonzero(inside[:, zone_idx]):
+                label_name = boxed[label_idx].get("eng") or boxed[label_idx].get("tag") or "unknown"
+                label_counts[label_name] = label_counts.get(label_name, 0) + 1
+
+            state = {"count": sum(label_counts.values()), "labels": label_counts}
+            occupancy[name] = state
+            if self._occupancy.get((camera_id, name)) != state:
+                self._occupancy[(camera_id, name)] = state
+                changed.append(name)
+
+        return occupancy, changed
@@ -0,0 +1,134 @@
+"""Tests for the API circuit breaker."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from custom_components.vkcloud_vision.api.vkcloud.exceptions import (
+    VKCloudVisionAPIError, VKCloudVisionBadRequestError,
+    VKCloudVisionUnavailableError)
+from custom_components.vkcloud_vision.api.vkcloud.vision import circuit
+from custom_components.vkcloud_vision.api.vkcloud.vision.circuit import (
+    COOL_DOWN, FAILURE_THRESHOLD, VKCloudVisionCircuitBreaker, is_unavailable)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(circuit.time, "monotonic", clock)
+    return clock
+
+
+def _open(breaker: VKCloudVisionCircuitBreaker) -> None:
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+
+
+def _retries_exhausted(cause: Exception) -> VKCloudVisionAPIError:
+    err = VKCloudVisionAPIError("Max retries exceeded")
+    err.__cause__ = cause
+    return err
+
+
+@pytest.mark.parametrize(
+    ("err", "expected"),
+    [
+        (ClientConnectionError(), True),
+        (TimeoutError(), True),
+        (VKCloudVisionUnavailableError("down"), True),
+        (VKCloudVisionAPIError("server", http_status=503), True),
+        (VKCloudVisionBadRequestError("bad", http_status=400), False),
+        (_retries_exhausted(ClientConnectionError()), True),
+        (_retries_exhausted(ValueError()), False),
+        (VKCloudVisionAPIError("no status"), False),
+        (ValueError(), False),
+    ],
+)
+def test_is_unavailable(err: BaseException, expected: bool) -> None:
+    assert is_unavailable(err) is expected
+
+
+def test_opens_after_threshold(clock: _Clock) -> None:
+    breaker = VKCloudVisionCircuitBreaker()
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert not breaker.is_open
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count(clock: _Clock) -> None:
+    breaker = VKCloudVisionCircuitBreaker()
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_single_probe_after_cool_down(clock: _Clock) -> None:
+    breaker = VKCloudVisionCircuitBreaker()
+    _open(breaker)
+
+    clock.now += COOL_DOWN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_failed_probe_restarts_cool_down(clock: _Clock) -> None:
+    breaker = VKCloudVisionCircuitBreaker()
+    _open(breaker)
+
+    clock.now += COOL_DOWN
+    assert breaker.allow_request()
+    clock.now += 5
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+    clock.now += COOL_DOWN - 1
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+
+
+def test_released_probe_lets_another_caller_probe(clock: _Clock) -> None:
+    breaker = VKCloudVisionCircuitBreaker()
+    _open(breaker)
+
+    clock.now += COOL_DOWN
+    assert breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_lost_probe_expires(clock: _Clock) -> None:
+    breaker = VKCloudVisionCircuitBreaker()
+    _open(breaker)
+
+    clock.now += COOL_DOWN
+    assert breaker.allow_request()
+    clock.now += COOL_DOWN - 1
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
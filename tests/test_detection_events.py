@@ -0,0 +1,80 @@
+"""Tests for debounced per-label detection events."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from datetime import datetime, timedelta
+
+from custom_components.vkcloud_vision.detection_events import (
+    EVENT_APPEARED, EVENT_CLEARED, DetectionEventEngine)
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+CAMERA = "camera.front"
+PERSON = {"eng": "Person", "prob": 0.8}
+
+
+def _update(engine: DetectionEventEngine, labels: list[dict], seconds: float, on_delay: float = 0.0,
+            off_delay: float = 30.0) -> tuple[list[dict], list[str]]:
+    return engine.update(
+        CAMERA, labels, START + timedelta(seconds=seconds), timedelta(seconds=on_delay), timedelta(seconds=off_delay)
+    )
+
+
+def test_appears_and_clears() -> None:
+    engine = DetectionEventEngine()
+    transitions, present = _update(engine, [PERSON, {"eng": "Person", "prob": 0.9}], 0)
+    assert [(event["type"], event["label"], event["count"], event["max_prob"]) for event in transitions] == [
+        (EVENT_APPEARED, "Person", 2, 0.9)
+    ]
+    assert present == ["Person"]
+
+    # Short gaps don't clear the label
+    assert _update(engine, [], 29) == ([], ["Person"])
+    transitions, present = _update(engine, [], 30)
+    assert [(event["type"], event["label"]) for event in transitions] == [(EVENT_CLEARED, "Person")]
+    assert present == []
+
+
+def test_on_delay() -> None:
+    engine = DetectionEventEngine()
+    assert _update(engine, [PERSON], 0, on_delay=5) == ([], [])
+    assert _update(engine, [PERSON], 4, on_delay=5) == ([], [])
+    transitions, present = _update(engine, [PERSON], 5, on_delay=5)
+    assert [event["type"] for event in transitions] == [EVENT_APPEARED]
+    assert transitions[0]["first_seen"] == START.isoformat()
+    assert present == ["Person"]
+
+
+def test_gap_restarts_pending_label() -> None:
+    engine = DetectionEventEngine()
+    _update(engine, [PERSON], 0, on_delay=10, off_delay=3)
+    # Not seen for longer than the off delay: the run of sightings starts over
+    assert _update(engine, [PERSON], 10, on_delay=10, off_delay=3) == ([], [])
+    for seconds in (12, 14, 16, 18):
+        assert _update(engine, [PERSON], seconds, on_delay=10, off_delay=3) == ([], [])
+    transitions, _ = _update(engine, [PERSON], 20, on_delay=10, off_delay=3)
+    assert [(event["type"], event["first_seen"]) for event in transitions] == [
+        (EVENT_APPEARED, (START + timedelta(seconds=10)).isoformat())
+    ]
+
+
+def test_pending_label_clears_silently() -> None:
+    engine = DetectionEventEngine()
+    _update(engine, [PERSON], 0, on_delay=10)
+    assert _update(engine, [], 30, on_delay=10) == ([], [])
+
+
+def test_cameras_are_independent() -> None:
+    engine = DetectionEventEngine()
+    _update(engine, [PERSON], 0)
+    transitions, present = engine.update("camera.back", [], START, timedelta(0), timedelta(0))
+    assert (transitions, present) == ([], [])
+
+
+def test_reset() -> None:
+    engine = DetectionEventEngine()
+    _update(engine, [PERSON], 0)
+    engine.reset()
+    transitions, _ = _update(engine, [PERSON], 1)
+    assert [event["type"] for event in transitions] == [EVENT_APPEARED]
@@ -0,0 +1,84 @@
+"""Tests for OCR line reconstruction and text change detection."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import random
+
+from custom_components.vkcloud_vision.api.vkcloud.vision.layout import (
+    reconstruct_layout, word_box)
+from custom_components.vkcloud_vision.text_state import TextStateCache
+
+# Two lines of a paragraph on the left and a price tag far to the right
+WORDS = [
+    {"text": "Hello", "coord": [10, 10, 60, 30]},
+    {"text": "world", "coord": [70, 12, 120, 32]},
+    {"text": "Price", "coord": [400, 10, 460, 30]},
+    {"text": "Second", "coord": [10, 40, 80, 60]},
+    {"text": "line", "coord": [90, 41, 130, 61]},
+]
+
+
+def test_word_box() -> None:
+    assert word_box([1, 2, 3, 4]) == (1, 2, 3, 4)
+    assert word_box([[5, 1], [9, 2], [8, 7], [4, 6]]) == (4, 1, 9, 7)
+    assert word_box([]) is None
+    assert word_box(None) is None
+
+
+def test_reconstruct_layout() -> None:
+    lines, blocks = reconstruct_layout(WORDS)
+    assert [(line["text"], line["block"]) for line in lines] == [("Hello world", 0), ("Price", 1), ("Second line", 0)]
+    assert lines[0]["coord"] == [10, 10, 120, 32]
+    assert blocks == [
+        {"text": "Hello world\nSecond line", "coord": [10, 10, 130, 61]},
+        {"text": "Price", "coord": [400, 10, 460, 30]},
+    ]
+
+
+def test_reconstruct_layout_ignores_word_order() -> None:
+    words = list(WORDS)
+    random.Random(0).shuffle(words)
+    assert reconstruct_layout(words) == reconstruct_layout(WORDS)
+
+
+def test_reconstruct_layout_point_coords() -> None:
+    # Slightly rotated words given as corner points
+    words = [
+        {"text": "left", "coord": [[10, 12], [50, 10], [50, 30], [10, 32]]},
+        {"text": "right", "coord": [[60, 10], [100, 8], [100, 28], [60, 30]]},
+    ]
+    lines, blocks = reconstruct_layout(words)
+    assert [line["text"] for line in lines] == ["left right"]
+    assert len(blocks) == 1
+
+
+def test_reconstruct_layout_distant_lines_split_blocks() -> None:
+    words = [{"text": "top", "coord": [10, 10, 60, 30]}, {"text": "bottom", "coord": [10, 200, 60, 220]}]
+    lines, blocks = reconstruct_layout(words)
+    assert [line["block"] for line in lines] == [0, 1]
+    assert [block["text"] for block in blocks] == ["top", "bottom"]
+
+
+def test_reconstruct_layout_skips_empty_words() -> None:
+    words = [{"text": "", "coord": [0, 0, 10, 10]}, {"text": "no box"}, {"text": "ok", "coord": [0, 0, 10, 10]}]
+    lines, _ = reconstruct_layout(words)
+    assert [line["text"] for line in lines] == ["ok"]
+    assert reconstruct_layout([]) == ([], [])
+
+
+def test_text_state_changes() -> None:
+    cache = TextStateCache()
+    assert cache.update("camera.door", ["Open", "9-18"]) == (True, {"added": ["Open", "9-18"], "removed": []})
+    # Moved lines and extra whitespace are not a change
+    assert cache.update("camera.door", ["9-18 ", " Open"]) == (False, {"added": [], "removed": []})
+    assert cache.update("camera.door", ["Closed", "9-18", ""]) == (True, {"added": ["Closed"], "removed": ["Open"]})
+    assert cache.update("camera.yard", [])[0] is False
+
+
+def test_text_state_reset() -> None:
+    cache = TextStateCache()
+    cache.update("camera.door", ["Open"])
+    cache.reset()
+    assert cache.update("camera.door", ["Open"]) == (True, {"added": ["Open"], "removed": []})
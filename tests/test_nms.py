@@ -0,0 +1,76 @@
+"""Tests for box overlap and grouping helpers."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import numpy as np
+import pytest
+
+from custom_components.vkcloud_vision.api.vkcloud.vision.nms import (
+    box_iom, box_iou, group_boxes, seam_overlap)
+
+
+def test_box_iou() -> None:
+    iou = box_iou(np.array([[0, 0, 10, 10]]), np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]]))
+    assert iou.shape == (1, 3)
+    assert iou[0] == pytest.approx([1.0, 50 / 150, 0.0])
+
+
+def test_box_iou_degenerate_boxes() -> None:
+    assert box_iou(np.array([[0, 0, 0, 0]]), np.array([[0, 0, 0, 0]]))[0, 0] == 0.0
+
+
+def test_box_iom_partial_box_inside() -> None:
+    full, part = [0, 0, 100, 100], [0, 0, 50, 100]
+    assert box_iom(np.array([full]), np.array([part]))[0, 0] == pytest.approx(1.0)
+    assert box_iou(np.array([full]), np.array([part]))[0, 0] == pytest.approx(0.5)
+
+
+def test_group_boxes_keeps_best_score_first() -> None:
+    boxes = [[0, 0, 10, 10], [1, 1, 10, 10], [50, 50, 60, 60]]
+    groups = group_boxes(boxes, [0.5, 0.9, 0.7], iou_threshold=0.5)
+    assert groups == [[1, 0], [2]]
+
+
+def test_group_boxes_empty() -> None:
+    assert group_boxes([], [], iou_threshold=0.5) == []
+
+
+def test_group_boxes_sources() -> None:
+    # Boxes of one source are never merged, a keeper takes the best box of every other source
+    boxes = [[0, 0, 10, 10], [0, 0, 10, 10], [1, 0, 10, 10], [0, 0, 9, 10]]
+    groups = group_boxes(boxes, [0.9, 0.8, 0.7, 0.6], iou_threshold=0.5, sources=[0, 0, 1, 1])
+    assert groups[0] == [0, 2]
+    assert sorted(idx for group in groups for idx in group) == [0, 1, 2, 3]
+
+
+def test_group_boxes_classes() -> None:
+    boxes = [[0, 0, 10, 10], [0, 0, 10, 10]]
+    assert group_boxes(boxes, [0.9, 0.8], iou_threshold=0.5, classes=[0, 1]) == [[0], [1]]
+    assert group_boxes(boxes, [0.9, 0.8], iou_threshold=0.5, classes=[1, 1]) == [[0, 1]]
+
+
+def test_group_boxes_precomputed_overlaps() -> None:
+    # Groups don't chain: box 2 overlaps box 1 but not the keeper
+    boxes = [[0, 0, 10, 10], [6, 0, 16, 10], [12, 0, 22, 10]]
+    overlaps = np.array([[0, 0.9, 0], [0.9, 0, 0.9], [0, 0.9, 0]])
+    assert group_boxes(boxes, [0.9, 0.8, 0.7], iou_threshold=0.5, overlaps=overlaps) == [[0, 1], [2]]
+
+
+def test_seam_overlap_vertical_seam() -> None:
+    # Two tiles side by side, seam band 80..120; a person cut by both tile borders
+    tiles = [[0, 0, 120, 100], [80, 0, 200, 100]]
+    boxes = [[50, 20, 120, 90], [80, 22, 150, 88], [10, 10, 30, 30]]
+    overlap = seam_overlap(np.array(boxes), np.array([tiles[0], tiles[1], tiles[0]]), (0, 0, 200, 100))
+    assert overlap[0, 1] == overlap[1, 0] == pytest.approx(66 / 70)
+    assert overlap[0, 2] == overlap[1, 2] == 0.0
+    # Boxes at the frame edge are not cut
+    assert seam_overlap(np.array([[0, 0, 10, 10]] * 2), np.array([[0, 0, 10, 10]] * 2), (0, 0, 10, 10)).max() == 0
+
+
+def test_seam_overlap_corner() -> None:
+    frame = (0, 0, 200, 200)
+    tiles = np.array([[0, 0, 120, 120], [80, 80, 200, 200]])
+    overlap = seam_overlap(np.array([[60, 60, 120, 120], [80, 80, 140, 140]]), tiles, frame)
+    assert overlap[0, 1] == 1.0
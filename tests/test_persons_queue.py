@@ -0,0 +1,141 @@
+"""Tests for serialized writes of the persons client."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from custom_components.vkcloud_vision.api.vkcloud.exceptions import \
+    VKCloudVisionAPIError
+from custom_components.vkcloud_vision.api.vkcloud.vision.clients import (
+    MAX_IMAGES_PER_SET, VKCloudVisionPersonsClient)
+
+SPACE = 1
+
+
+class _FakePersonsClient(VKCloudVisionPersonsClient):
+    """Persons client that records requests instead of sending them."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self._space_queues = {}
+        self.requests: list[tuple[str, dict[str, Any], int]] = []
+        self.release = asyncio.Event()
+        self.started = asyncio.Event()
+        self.error = error
+
+    async def _make_request(self, endpoint, meta, files=None, params=None, max_retries=3):
+        self.requests.append((endpoint, meta, len(files or [])))
+        self.started.set()
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return {"objects": [{"name": image["name"], "status": 0} for image in meta.get("images", [])]}
+
+
+def _set(client: _FakePersonsClient, name: str, count: int = 1) -> asyncio.Task:
+    images = [{"name": f"{name}{idx}", "person_id": 1} for idx in range(count)]
+    return asyncio.create_task(client.set([b"jpeg"] * count, SPACE, images))
+
+
+def test_queued_sets_are_batched() -> None:
+    async def run() -> None:
+        client = _FakePersonsClient()
+        first = _set(client, "a")
+        await client.started.wait()
+        queued = [_set(client, "b", 2), _set(client, "c")]
+        await asyncio.sleep(0)
+        client.release.set()
+        results = await asyncio.gather(first, *queued)
+
+        assert [(endpoint, files) for endpoint, _, files in client.requests] == [
+            ("/v1/persons/set", 1),
+            ("/v1/persons/set", 3),
+        ]
+        assert [image["name"] for image in client.requests[1][1]["images"]] == ["0_b0", "0_b1", "1_c0"]
+        # Each caller gets back its own objects with original names
+        assert [[obj["name"] for obj in result["objects"]] for result in results] == [["a0"], ["b0", "b1"], ["c0"]]
+
+    asyncio.run(run())
+
+
+def test_batch_is_capped() -> None:
+    async def run() -> None:
+        client = _FakePersonsClient()
+        first = _set(client, "a")
+        await client.started.wait()
+        half = MAX_IMAGES_PER_SET // 2 + 1
+        queued = [_set(client, "b", half), _set(client, "c", half)]
+        await asyncio.sleep(0)
+        client.release.set()
+        await asyncio.gather(first, *queued)
+
+        assert [files for _, _, files in client.requests] == [1, half, half]
+
+    asyncio.run(run())
+
+
+def test_batch_error_is_raised_by_every_caller() -> None:
+    async def run() -> None:
+        client = _FakePersonsClient(VKCloudVisionAPIError("boom"))
+        first = _set(client, "a")
+        await client.started.wait()
+        queued = [_set(client, "b"), _set(client, "c")]
+        await asyncio.sleep(0)
+        client.release.set()
+        results = await asyncio.gather(first, *queued, return_exceptions=True)
+
+        assert all(isinstance(result, VKCloudVisionAPIError) for result in results)
+        assert len(client.requests) == 2
+
+    asyncio.run(run())
+
+
+def test_cancelled_flusher_hands_over_batch() -> None:
+    async def run() -> None:
+        client = _FakePersonsClient()
+        first = _set(client, "a")
+        await client.started.wait()
+        queued = [_set(client, "b"), _set(client, "c")]
+        await asyncio.sleep(0)
+
+        # Caller "b" takes the lock and starts sending "b" and "c", then is cancelled
+        release_first, client.release = client.release, asyncio.Event()
+        client.started.clear()
+        release_first.set()
+        await first
+        await client.started.wait()
+        assert [image["name"] for image in client.requests[-1][1]["images"]] == ["0_b0", "1_c0"]
+        queued[0].cancel()
+        client.release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await queued[0]
+        result = await queued[1]
+        assert [obj["name"] for obj in result["objects"]] == ["c0"]
+        assert [image["name"] for image in client.requests[-1][1]["images"]] == ["0_c0"]
+        assert client._space_queues[SPACE].pending_sets == []
+
+    asyncio.run(run())
+
+
+def test_read_only_recognize_skips_write_lock() -> None:
+    async def run() -> None:
+        client = _FakePersonsClient()
+        writer = _set(client, "a")
+        await client.started.wait()
+
+        reader = asyncio.create_task(client.recognize([b"jpeg"], SPACE, [{"name": "r"}], update_embedding=False))
+        trainer = asyncio.create_task(client.recognize([b"jpeg"], SPACE, [{"name": "t"}], create_new=True))
+        await asyncio.sleep(0)
+        # The read-only call is in flight next to the write, training waits for it
+        assert [meta["images"][0]["name"] for _, meta, _ in client.requests] == ["0_a0", "r"]
+
+        client.release.set()
+        await asyncio.gather(writer, reader, trainer)
+        assert client.requests[-1][1]["create_new"] is True
+
+    asyncio.run(run())
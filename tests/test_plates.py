@@ -0,0 +1,171 @@
+"""Tests for licence plate lookup and consensus."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from custom_components.vkcloud_vision.const import (CONF_NAME, CONF_PLATE,
+                                                    CONF_PLATE_LIST,
+                                                    CONF_PLATE_MAX_DISTANCE,
+                                                    CONF_PLATES,
+                                                    PLATE_LIST_ALLOW,
+                                                    PLATE_LIST_DENY)
+from custom_components.vkcloud_vision.plates import (ARRIVAL_COOLDOWN,
+                                                     CONSENSUS_WINDOW, BKTree,
+                                                     KnownPlate,
+                                                     PlateConsensus,
+                                                     PlateIndex,
+                                                     get_plate_index,
+                                                     levenshtein,
+                                                     normalize_plate,
+                                                     plate_readings)
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+CAMERA = "camera.gate"
+
+
+def test_normalize_plate() -> None:
+    assert normalize_plate("а 123 вс 77") == "A123BC77"
+    assert normalize_plate("A123BC-77") == "A123BC77"
+    assert normalize_plate(" ") == ""
+
+
+@pytest.mark.parametrize(
+    ("a", "b", "distance"),
+    [("", "", 0), ("A123BC77", "A123BC77", 0), ("A123BC77", "A128BC77", 1), ("A123BC77", "A123BC777", 1),
+     ("A123BC77", "", 8), ("KITTEN", "SITTING", 3)],
+)
+def test_levenshtein(a: str, b: str, distance: int) -> None:
+    assert levenshtein(a, b) == distance
+    assert levenshtein(b, a) == distance
+
+
+def test_levenshtein_max_distance() -> None:
+    assert levenshtein("A123BC77", "X999YZ11", max_distance=2) == 3
+    assert levenshtein("A123BC77", "A1", max_distance=2) == 3
+    assert levenshtein("A123BC77", "A128BC77", max_distance=2) == 1
+
+
+def test_bk_tree_matches_brute_force() -> None:
+    rng = random.Random(0)
+    words = ["".join(rng.choice("ABC123") for _ in range(rng.randint(3, 6))) for _ in range(300)]
+    tree = BKTree(words)
+    assert len(tree) == len(set(words))
+
+    for query in words[:20] + ["A1B2", "CCCCCC"]:
+        expected = sorted({(levenshtein(query, word), word) for word in words if levenshtein(query, word) <= 2})
+        assert tree.search(query, 2) == expected
+
+
+def test_bk_tree_empty() -> None:
+    assert BKTree().search("A123BC77", 2) == []
+
+
+def test_plate_index_match() -> None:
+    index = PlateIndex(
+        [KnownPlate("A123BC77", "Car", PLATE_LIST_ALLOW), KnownPlate("X999YZ99", "Stranger", PLATE_LIST_DENY)],
+        max_distance=1,
+    )
+    assert index.match("A123BC77") == (KnownPlate("A123BC77", "Car", PLATE_LIST_ALLOW), 0)
+    known, distance = index.match("A128BC77")
+    assert (known.name, distance) == ("Car", 1)
+    assert index.match("A188BC77") is None
+
+
+def test_plate_index_deny_wins() -> None:
+    # Same plate on both lists, and two lists' plates at the same distance from a reading
+    index = PlateIndex(
+        [
+            KnownPlate("A123BC77", "Allowed", PLATE_LIST_ALLOW),
+            KnownPlate("A123BC77", "Denied", PLATE_LIST_DENY),
+            KnownPlate("B123BC77", "Allowed too", PLATE_LIST_ALLOW),
+            KnownPlate("C123BC77", "Denied too", PLATE_LIST_DENY),
+        ],
+        max_distance=1,
+    )
+    assert len(index) == 3
+    assert index.match("A123BC77")[0].name == "Denied"
+    assert index.match("D123BC77") == (KnownPlate("A123BC77", "Denied", PLATE_LIST_DENY), 1)
+
+
+def test_plate_index_exact_only() -> None:
+    index = PlateIndex([KnownPlate("A123BC77", "Car", PLATE_LIST_ALLOW)], max_distance=0)
+    assert index.match("A128BC77") is None
+
+
+def test_get_plate_index() -> None:
+    index = get_plate_index({
+        CONF_PLATES: [
+            {CONF_PLATE: "а123вс 77", CONF_NAME: "Car"},
+            {CONF_PLATE: "X999YZ99", CONF_PLATE_LIST: PLATE_LIST_DENY},
+            {CONF_PLATE: " - "},
+        ],
+        CONF_PLATE_MAX_DISTANCE: 1,
+    })
+    assert len(index) == 2
+    assert index.match("A123BC77")[0] == KnownPlate("A123BC77", "Car", PLATE_LIST_ALLOW)
+    assert index.match("X999YZ98")[0] == KnownPlate("X999YZ99", "X999YZ99", PLATE_LIST_DENY)
+
+
+def test_plate_readings() -> None:
+    response = {
+        "car_number": [
+            {"labels": [{"eng": "A123BC77", "prob": 0.9}, {"rus": "в456ек 99"}, {"eng": ""}]},
+            {"labels": []},
+        ],
+        "object": [{"labels": [{"eng": "Car", "prob": 0.8}]}],
+    }
+    assert plate_readings(response) == [("A123BC77", 0.9), ("B456EK99", 1.0)]
+    assert plate_readings({}) == []
+
+
+def test_consensus_corrects_misread_character() -> None:
+    consensus = PlateConsensus()
+    consensus.update(CAMERA, [("A123BC77", 0.9), ("A123BC77", 0.8)], START)
+    results = consensus.update(CAMERA, [("A128BC77", 0.6)], START + timedelta(seconds=1))
+    assert [(result["plate"], result["votes"]) for result in results] == [("A123BC77", 3)]
+    assert 0 < results[0]["confidence"] < 1
+
+
+def test_consensus_keeps_distinct_plates_apart() -> None:
+    consensus = PlateConsensus()
+    results = consensus.update(CAMERA, [("A123BC77", 0.9), ("X999YZ99", 0.9)], START)
+    assert sorted(result["plate"] for result in results) == ["A123BC77", "X999YZ99"]
+    assert all(result["votes"] == 1 and result["confidence"] == 1 for result in results)
+
+
+def test_consensus_forgets_old_readings() -> None:
+    consensus = PlateConsensus()
+    consensus.update(CAMERA, [("A123BC77", 0.9), ("A123BC77", 0.9)], START)
+    results = consensus.update(CAMERA, [("A128BC77", 0.6)], START + CONSENSUS_WINDOW + timedelta(seconds=1))
+    assert [(result["plate"], result["votes"]) for result in results] == [("A128BC77", 1)]
+
+
+def test_consensus_cameras_are_independent() -> None:
+    consensus = PlateConsensus()
+    consensus.update(CAMERA, [("A123BC77", 0.9), ("A123BC77", 0.9)], START)
+    results = consensus.update("camera.yard", [("A128BC77", 0.6)], START)
+    assert results[0]["plate"] == "A128BC77"
+
+
+def test_announce_cooldown() -> None:
+    consensus = PlateConsensus()
+    assert consensus.announce(CAMERA, "A123BC77", START)
+    assert not consensus.announce(CAMERA, "A123BC77", START + ARRIVAL_COOLDOWN - timedelta(seconds=1))
+    assert consensus.announce("camera.yard", "A123BC77", START)
+    # Cool-down counts from the last announcement, not from the last sighting
+    assert consensus.announce(CAMERA, "A123BC77", START + ARRIVAL_COOLDOWN)
+
+
+def test_reset_forgets_announcements() -> None:
+    consensus = PlateConsensus()
+    consensus.update(CAMERA, [("A123BC77", 0.9)], START)
+    consensus.announce(CAMERA, "A123BC77", START)
+    consensus.reset()
+    assert consensus.announce(CAMERA, "A123BC77", START)
+    assert consensus.update(CAMERA, [("A128BC77", 0.6)], START)[0]["votes"] == 1
@@ -0,0 +1,110 @@
+"""Tests for label filtering and compact projections of detection responses."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from custom_components.vkcloud_vision.api.vkcloud.vision.response import (
+    LabelFilter, VKCloudVisionObjectDetectionResponse)
+
+RAW_RESPONSE = {
+    "object": [
+        {
+            "name": "frame0",
+            "status": 0,
+            "labels": [
+                {"eng": "Person", "rus": "Человек", "prob": 0.9, "coord": [0, 0, 10, 10]},
+                {"eng": "Person", "rus": "Человек", "prob": 0.6, "coord": [20, 0, 30, 10]},
+                {"eng": "Car", "rus": "Автомобиль", "prob": 0.8, "coord": [40, 0, 90, 30]},
+                {"eng": "Tree", "rus": "Дерево", "prob": 0.05, "coord": [0, 50, 10, 90]},
+            ],
+        },
+        {"name": "frame1", "status": 0, "labels": [{"eng": "Dog", "rus": "Собака", "prob": 0.9}]},
+    ],
+    "scene": [
+        {"name": "frame0", "status": 0, "labels": [{"eng": "Street", "rus": "Улица", "prob": 0.7}]},
+    ],
+}
+
+
+def test_label_filter_from_names() -> None:
+    assert LabelFilter.from_names() is None
+    assert LabelFilter.from_names([], []) is None
+    assert LabelFilter.from_names([" Person "], ["CAR"]) == LabelFilter(frozenset({"person"}), frozenset({"car"}))
+
+
+def test_label_filter_matches() -> None:
+    person = {"eng": "Person", "rus": "Человек"}
+    car = {"eng": "Car", "rus": "Автомобиль"}
+
+    include = LabelFilter.from_names(["человек"])
+    assert include.matches(person)
+    assert not include.matches(car)
+
+    exclude = LabelFilter.from_names(exclude=["car"])
+    assert exclude.matches(person)
+    assert not exclude.matches(car)
+
+    # Excluding wins over including
+    both = LabelFilter.from_names(["person", "car"], ["Автомобиль"])
+    assert both.matches(person)
+    assert not both.matches(car)
+
+
+def test_response_applies_threshold_and_filter() -> None:
+    response = VKCloudVisionObjectDetectionResponse(
+        RAW_RESPONSE, prob_threshold=0.1, label_filter=LabelFilter.from_names(exclude=["car"])
+    )
+    assert [label["eng"] for label in response.data["object"][0]["labels"]] == ["Person", "Person"]
+    assert [label["eng"] for label in response.labels] == ["Person", "Person", "Street"]
+    assert not response.has_errors
+
+
+def test_compact() -> None:
+    response = VKCloudVisionObjectDetectionResponse(RAW_RESPONSE, prob_threshold=0.1)
+    assert response.compact() == {
+        "frame0": {
+            "Person": [0.9, 2, [[0, 0, 10, 10], [20, 0, 30, 10]]],
+            "Car": [0.8, 1, [[40, 0, 90, 30]]],
+            "Street": [0.7, 1, []],
+        },
+        "frame1": {"Dog": [0.9, 1, []]},
+    }
+
+
+def test_counts() -> None:
+    response = VKCloudVisionObjectDetectionResponse(RAW_RESPONSE, prob_threshold=0.1)
+    assert response.counts() == {"frame0": {"Person": 2, "Car": 1, "Street": 1}, "frame1": {"Dog": 1}}
+
+    filtered = VKCloudVisionObjectDetectionResponse(
+        RAW_RESPONSE, prob_threshold=0.7, label_filter=LabelFilter.from_names(["person", "street"])
+    )
+    assert filtered.counts() == {"frame0": {"Person": 1, "Street": 1}, "frame1": {}}
+
+
+def test_errors_are_reported() -> None:
+    response = VKCloudVisionObjectDetectionResponse({"object": [{"name": "frame0", "status": 2, "error": "timeout"}]})
+    assert response.has_errors
+    assert response.error_message == "frame0 (object) timeout"
+    assert response.compact() == {"frame0": {}}
+
+
+def test_merge_overlapping_replaces_labels() -> None:
+    raw = {
+        "object": [{"name": "frame0", "status": 0, "labels": [
+            {"eng": "Person", "prob": 0.6, "coord": [0, 0, 10, 10]},
+            {"eng": "Car", "prob": 0.8, "coord": [40, 0, 90, 30]},
+        ]}],
+        "multiobject": [{"name": "frame0", "status": 0, "labels": [
+            {"eng": "Person", "prob": 0.9, "coord": [1, 0, 10, 10]},
+        ]}],
+    }
+    response = VKCloudVisionObjectDetectionResponse(raw, prob_threshold=0.1)
+    assert response.merge_overlapping(0.5) == {"before": 3, "after": 2}
+
+    # The weaker duplicate is gone from the response and attached to the best label
+    assert [label["eng"] for label in response.data["object"][0]["labels"]] == ["Car"]
+    person = response.data["multiobject"][0]["labels"][0]
+    assert person["alternates"] == [{"mode": "object", "eng": "Person", "rus": None, "prob": 0.6}]
+    assert response.counts() == {"frame0": {"Person": 1, "Car": 1}}
+    assert "alternates" not in raw["multiobject"][0]["labels"][0]
@@ -0,0 +1,78 @@
+"""Tests for region of interest masks."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import io
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+from PIL import Image
+
+from custom_components.vkcloud_vision.const import (CONF_CAMERA, CONF_POINTS,
+                                                    CONF_REGIONS_OF_INTEREST)
+from custom_components.vkcloud_vision.roi import (RegionOfInterest,
+                                                  get_camera_roi,
+                                                  parse_polygon)
+
+
+def _jpeg(width: int, height: int, color: tuple[int, int, int] = (255, 255, 255)) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(output, format="JPEG")
+    return output.getvalue()
+
+
+def test_parse_rectangle() -> None:
+    assert parse_polygon("0.1,0.2 0.5,0.6") == [(0.1, 0.2), (0.5, 0.2), (0.5, 0.6), (0.1, 0.6)]
+
+
+def test_parse_polygon_with_semicolons() -> None:
+    assert parse_polygon("0,0;1,0;0.5,1") == [(0.0, 0.0), (1.0, 0.0), (0.5, 1.0)]
+
+
+@pytest.mark.parametrize("points", ["", "0.5,0.5", "0,0 1.5,1", "0,0 1,-0.1 1,1", "0,0 1"])
+def test_parse_invalid(points: str) -> None:
+    with pytest.raises(ValueError):
+        parse_polygon(points)
+
+
+def test_is_rectangle() -> None:
+    assert RegionOfInterest(parse_polygon("0,0 0.5,0.5")).is_rectangle
+    assert not RegionOfInterest(parse_polygon("0,0 1,0 0.5,1")).is_rectangle
+    assert not RegionOfInterest(parse_polygon("0,0 1,0 1,1 0.2,1")).is_rectangle
+
+
+def test_crop_rectangle() -> None:
+    roi = RegionOfInterest(parse_polygon("0.25,0.5 0.75,1"))
+    data, offset = roi.crop(_jpeg(200, 100))
+    assert offset == (50, 50)
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.size == (100, 50)
+
+
+def test_crop_polygon_blanks_outside() -> None:
+    roi = RegionOfInterest(parse_polygon("0,0 1,0 0,1"))
+    data, offset = roi.crop(_jpeg(100, 100))
+    assert offset == (0, 0)
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.size == (100, 100)
+        inside = image.getpixel((10, 10))
+        outside = image.getpixel((90, 90))
+    assert min(inside) > 200
+    assert max(outside) < 50
+
+
+def test_crop_bad_data() -> None:
+    roi = RegionOfInterest(parse_polygon("0,0 1,1"))
+    with pytest.raises(HomeAssistantError):
+        roi.crop(b"not an image")
+
+
+def test_get_camera_roi() -> None:
+    options = {CONF_REGIONS_OF_INTEREST: [{CONF_CAMERA: "camera.front", CONF_POINTS: "0,0 0.5,0.5"}]}
+    roi = get_camera_roi(options, "camera.front")
+    assert roi is not None
+    assert roi.polygon[2] == (0.5, 0.5)
+    assert get_camera_roi(options, "camera.back") is None
+    assert get_camera_roi({}, "camera.front") is None
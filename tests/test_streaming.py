@@ -0,0 +1,64 @@
+"""Tests for frames kept by streaming uploads for retries."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+from typing import AsyncIterator
+
+import pytest
+
+from custom_components.vkcloud_vision.api.vkcloud.exceptions import \
+    VKCloudVisionAPIError
+from custom_components.vkcloud_vision.api.vkcloud.vision import streaming
+from custom_components.vkcloud_vision.api.vkcloud.vision.streaming import \
+    VKCloudVisionFrameStream
+
+
+class _FakeHass:
+    """Runs executor jobs inline."""
+
+    async def async_add_executor_job(self, target, *args):
+        return target(*args)
+
+
+async def _frames(*frames: bytes) -> AsyncIterator[bytes]:
+    for frame in frames:
+        yield frame
+
+
+async def _collect(frames: AsyncIterator) -> list[bytes]:
+    return [bytes(frame) async for frame in frames]
+
+
+def test_retry_resends_buffered_frames(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(streaming, "MAX_BUFFER_BYTES", 4)
+    stream = VKCloudVisionFrameStream(_FakeHass(), _frames(b"aa", b"bb", b"cc"))
+
+    async def run() -> None:
+        first = stream._async_frames()
+        assert [bytes(await anext(first)), bytes(await anext(first))] == [b"aa", b"bb"]
+        # Frames that fit in the buffer stay in memory
+        assert stream._spill.spooled_bytes == 0
+        assert bytes(await anext(first)) == b"cc"
+        assert stream._spill.spooled_bytes == 2
+
+        assert await _collect(stream._async_frames()) == [b"aa", b"bb", b"cc"]
+
+    asyncio.run(run())
+    stream.close()
+
+
+def test_overflowed_spill_fails_retry(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(streaming, "MAX_BUFFER_BYTES", 2)
+    monkeypatch.setattr(streaming, "MAX_SPILL_BYTES", 1)
+    stream = VKCloudVisionFrameStream(_FakeHass(), _frames(b"aa", b"bb", b"c"))
+
+    async def run() -> None:
+        assert await _collect(stream._async_frames()) == [b"aa", b"bb", b"c"]
+        with pytest.raises(VKCloudVisionAPIError):
+            await _collect(stream._async_frames())
+
+    asyncio.run(run())
+    stream.close()
@@ -0,0 +1,74 @@
+"""Tests for tiled detection."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import io
+
+from PIL import Image
+
+from custom_components.vkcloud_vision.api.vkcloud.vision.response import \
+    VKCloudVisionObjectDetectionResponse
+from custom_components.vkcloud_vision.tiling import (plan_tiles,
+                                                     split_into_tiles)
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height)).save(output, format="JPEG")
+    return output.getvalue()
+
+
+def test_plan_tiles_covers_frame() -> None:
+    tiles = plan_tiles(3000, 1000, 1024, 128, 6)
+    assert len(tiles) <= 6
+    assert max(right for _, _, right, _ in tiles) == 3000
+    assert max(bottom for _, _, _, bottom in tiles) == 1000
+
+
+def test_split_into_tiles_respects_max_tiles() -> None:
+    image = _jpeg(3000, 2000)
+    tiles = split_into_tiles(image, 1024, 128, 6)
+    assert 1 < len(tiles) <= 6
+    assert all(box != (0, 0, 3000, 2000) for _, box in tiles)
+
+    with_frame = split_into_tiles(image, 1024, 128, 6, full_frame=True)
+    assert len(with_frame) <= 6
+    assert with_frame[0] == (image, (0, 0, 3000, 2000))
+
+
+def test_split_small_frame_is_not_tiled() -> None:
+    image = _jpeg(800, 600)
+    assert split_into_tiles(image, 1024, 128, 6) == [(image, (0, 0, 800, 600))]
+    assert split_into_tiles(_jpeg(3000, 2000), 1024, 128, 1, full_frame=True)[0][1] == (0, 0, 3000, 2000)
+
+
+def _tile(name: str, labels: list[dict]) -> dict:
+    return {"name": name, "status": 0, "labels": labels}
+
+
+def test_merge_tiles_joins_seam_parts_pairwise() -> None:
+    tiles = {"f_t0": ("f", (0, 0, 120, 100)), "f_t1": ("f", (80, 0, 200, 100))}
+    response = VKCloudVisionObjectDetectionResponse({
+        "object": [
+            # A car cut by the seam and two people in the left tile, one of them seen again in the right tile
+            _tile("f_t0", [
+                {"eng": "Car", "prob": 0.9, "coord": [50, 20, 120, 90]},
+                {"eng": "Person", "prob": 0.8, "coord": [82, 0, 98, 40]},
+                {"eng": "Person", "prob": 0.7, "coord": [100, 0, 116, 40]},
+            ]),
+            _tile("f_t1", [
+                {"eng": "Car", "prob": 0.8, "coord": [0, 22, 70, 88]},
+                {"eng": "Person", "prob": 0.6, "coord": [2, 0, 36, 40]},
+            ]),
+        ]
+    })
+    response.merge_tiles(tiles, 0.6)
+
+    [frame] = response.data["object"]
+    assert frame["name"] == "f"
+    boxes = sorted((label["eng"], label["coord"]) for label in frame["labels"])
+    assert boxes[0] == ("Car", [50, 20, 150, 90])
+    # The wide box of the right tile joins one person only
+    assert [name for name, _ in boxes].count("Person") == 2
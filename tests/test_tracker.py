@@ -0,0 +1,92 @@
+"""Tests for per-camera object tracking."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from datetime import datetime, timedelta
+
+from custom_components.vkcloud_vision.tracker import ObjectTracker
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+CAMERA = "camera.front"
+
+
+def _label(name: str, coord: list[int]) -> dict:
+    return {"eng": name, "coord": coord}
+
+
+def test_new_labels_enter() -> None:
+    tracker = ObjectTracker()
+    labels = [_label("Person", [0, 0, 10, 10]), _label("Person", [50, 50, 60, 60])]
+    events = tracker.update(CAMERA, labels, START)
+    assert [event["track_id"] for event in events["entered"]] == [1, 2]
+    assert [label["track_id"] for label in labels] == [1, 2]
+    assert events["exited"] == events["dwelling"] == []
+
+
+def test_moving_label_keeps_its_track() -> None:
+    tracker = ObjectTracker()
+    tracker.update(CAMERA, [_label("Person", [0, 0, 10, 10]), _label("Person", [50, 50, 60, 60])], START)
+
+    # Order of labels doesn't matter, each one follows the track it overlaps most
+    labels = [_label("Person", [52, 50, 62, 60]), _label("Person", [1, 0, 11, 10])]
+    events = tracker.update(CAMERA, labels, START + timedelta(seconds=1))
+    assert [label["track_id"] for label in labels] == [2, 1]
+    assert events["entered"] == []
+
+
+def test_labels_match_only_tracks_of_same_name() -> None:
+    tracker = ObjectTracker()
+    tracker.update(CAMERA, [_label("Person", [0, 0, 10, 10])], START)
+    labels = [_label("Dog", [0, 0, 10, 10])]
+    events = tracker.update(CAMERA, labels, START + timedelta(seconds=1))
+    assert labels[0]["track_id"] == 2
+    assert [event["label"] for event in events["entered"]] == ["Dog"]
+
+
+def test_distant_label_starts_new_track() -> None:
+    tracker = ObjectTracker(iou_threshold=0.3)
+    tracker.update(CAMERA, [_label("Person", [0, 0, 10, 10])], START)
+    labels = [_label("Person", [8, 8, 18, 18])]
+    tracker.update(CAMERA, labels, START + timedelta(seconds=1))
+    assert labels[0]["track_id"] == 2
+
+
+def test_track_exits_after_max_age() -> None:
+    tracker = ObjectTracker(max_age=timedelta(seconds=30))
+    tracker.update(CAMERA, [_label("Person", [0, 0, 10, 10])], START)
+
+    events = tracker.update(CAMERA, [], START + timedelta(seconds=30))
+    assert events["exited"] == []
+
+    events = tracker.update(CAMERA, [], START + timedelta(seconds=31))
+    assert [event["track_id"] for event in events["exited"]] == [1]
+
+
+def test_dwelling_reported_once() -> None:
+    tracker = ObjectTracker(dwell_time=timedelta(seconds=60))
+    tracker.update(CAMERA, [_label("Car", [0, 0, 10, 10])], START)
+
+    events = tracker.update(CAMERA, [_label("Car", [0, 0, 10, 10])], START + timedelta(seconds=60))
+    assert [event["dwell_sec"] for event in events["dwelling"]] == [60.0]
+
+    events = tracker.update(CAMERA, [_label("Car", [0, 0, 10, 10])], START + timedelta(seconds=90))
+    assert events["dwelling"] == []
+
+
+def test_cameras_are_independent() -> None:
+    tracker = ObjectTracker()
+    tracker.update(CAMERA, [_label("Person", [0, 0, 10, 10])], START)
+    labels = [_label("Person", [0, 0, 10, 10])]
+    events = tracker.update("camera.back", labels, START)
+    assert labels[0]["track_id"] == 1
+    assert len(events["entered"]) == 1
+
+
+def test_reset_forgets_tracks() -> None:
+    tracker = ObjectTracker()
+    tracker.update(CAMERA, [_label("Person", [0, 0, 10, 10])], START)
+    tracker.reset()
+    events = tracker.update(CAMERA, [_label("Person", [0, 0, 10, 10])], START + timedelta(seconds=1))
+    assert [event["track_id"] for event in events["entered"]] == [1]
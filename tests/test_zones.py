@@ -0,0 +1,95 @@
+"""Tests for polygon zone occupancy."""
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import numpy as np
+
+from custom_components.vkcloud_vision.const import (CONF_CAMERA, CONF_NAME,
+                                                    CONF_POINTS, CONF_ZONES)
+from custom_components.vkcloud_vision.zones import (ZoneEngine,
+                                                    get_camera_zones,
+                                                    points_in_polygons)
+
+SQUARE = np.array([(0.0, 0.0), (0.5, 0.0), (0.5, 0.5), (0.0, 0.5)])
+TRIANGLE = np.array([(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)])
+# Concave "U" shape open at the top
+U_SHAPE = np.array([(0.0, 0.0), (0.3, 0.0), (0.3, 0.7), (0.7, 0.7), (0.7, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+
+
+def test_points_in_polygons() -> None:
+    points = np.array([(0.25, 0.25), (0.75, 0.75), (0.4, 0.4), (0.9, 0.05)])
+    inside = points_in_polygons(points, [SQUARE, TRIANGLE])
+    assert inside.shape == (4, 2)
+    assert inside.tolist() == [[True, True], [False, False], [True, True], [False, True]]
+
+
+def test_points_in_concave_polygon() -> None:
+    inside = points_in_polygons(np.array([(0.5, 0.3), (0.5, 0.9), (0.1, 0.1)]), [U_SHAPE])
+    assert inside[:, 0].tolist() == [False, True, True]
+
+
+def test_points_in_polygons_empty() -> None:
+    assert points_in_polygons(np.empty((0, 2)), [SQUARE]).shape == (0, 1)
+    assert points_in_polygons(np.array([(0.1, 0.1)]), []).shape == (1, 0)
+
+
+def test_get_camera_zones() -> None:
+    options = {
+        CONF_ZONES: [
+            {CONF_NAME: "door", CONF_CAMERA: "camera.front", CONF_POINTS: "0,0 0.5,0.5"},
+            {CONF_NAME: "yard", CONF_CAMERA: "camera.back", CONF_POINTS: "0,0 1,1"},
+        ]
+    }
+    zones = get_camera_zones(options, "camera.front")
+    assert list(zones) == ["door"]
+    assert zones["door"] == [(0.0, 0.0), (0.5, 0.0), (0.5, 0.5), (0.0, 0.5)]
+    assert get_camera_zones({}, "camera.front") == {}
+
+
+def test_zone_engine_uses_bottom_center_anchor() -> None:
+    engine = ZoneEngine()
+    zones = {"floor": [(0.0, 0.5), (1.0, 0.5), (1.0, 1.0), (0.0, 1.0)]}
+    labels = [
+        # Box mostly above the zone, but standing in it
+        {"eng": "Person", "coord": [10, 10, 30, 60]},
+        {"eng": "Person", "coord": [10, 0, 30, 40]},
+        {"eng": "Dog", "coord": [50, 70, 70, 90]},
+        {"eng": "Cat"},
+    ]
+    occupancy, changed = engine.update("camera.front", zones, labels, (100, 100))
+    assert occupancy == {"floor": {"count": 2, "labels": {"Person": 1, "Dog": 1}}}
+    assert changed == ["floor"]
+
+
+def test_zone_engine_reports_changes_only() -> None:
+    engine = ZoneEngine()
+    zones = {"left": [(0.0, 0.0), (0.5, 0.0), (0.5, 1.0), (0.0, 1.0)], "right": [(0.5, 0.0), (1.0, 0.0), (1.0, 1.0)]}
+    labels = [{"eng": "Car", "coord": [10, 10, 20, 20]}]
+
+    _, changed = engine.update("camera.front", zones, labels, (100, 100))
+    assert changed == ["left", "right"]
+
+    _, changed = engine.update("camera.front", zones, labels, (100, 100))
+    assert changed == []
+
+    occupancy, changed = engine.update("camera.front", zones, [], (100, 100))
+    assert changed == ["left"]
+    assert occupancy["left"] == {"count": 0, "labels": {}}
+
+    # Another camera has its own state
+    _, changed = engine.update("camera.back", zones, [], (100, 100))
+    assert changed == ["left", "right"]
+
+
+def test_zone_engine_reset() -> None:
+    engine = ZoneEngine()
+    zones = {"all": [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]}
+    labels = [{"eng": "Car", "coord": [10, 10, 20, 20]}]
+    engine.update("camera.front", zones, labels, (100, 100))
+    engine.reset()
+
+    # Occupancy is reported again as if the camera was seen for the first time
+    _, changed = engine.update("camera.front", zones, labels, (100, 100))
+    assert changed == ["all"]